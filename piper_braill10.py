@@ -1,1130 +1,5506 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-
-import os
-import sys
-import time
-import json
-import requests
-import subprocess
-import threading
-from threading import Thread, Lock, Event
-import RPi.GPIO as GPIO
-import tempfile
-import wave
-
-# ==================== KONFİGÜRASYON ====================
-GITHUB_REPO = "mehkerer8/pdfs"
-GITHUB_API_URL = f"https://api.github.com/repos/{GITHUB_REPO}/contents"
-LOCAL_BOOKS_DIR = "/home/pixel/braille_books"
-UPDATE_INTERVAL = 3600
-
-# PIPER TTS AYARLARI 
-PIPER_BINARY_PATH = "./piper/piper"  # Piper binary dosyasının yolu
-PIPER_MODEL_PATH = "./tr_TR-fettah-medium.onnx"  # Model dosyası
-
-# ==================== PİPER TTS SES SİSTEMİ ====================
-class VoiceEngine:
-    def __init__(self):
-        self.setup()
-    
-    def setup(self):
-        """Piper TTS sistemini kur"""
-        print("🔊 Piper TTS sistemi kuruluyor...")
-        
-        # Piper binary kontrolü
-        if not os.path.exists(PIPER_BINARY_PATH):
-            print("❌ Piper binary bulunamadı!")
-            print("Lütfen şu komutla indirin:")
-            print("  cd /home/pixel && mkdir -p piper")
-            print("  cd /home/pixel/piper")
-            print("  wget https://github.com/rhasspy/piper/releases/download/2023.12.06-09.23.38/piper_linux-arm64")
-            print("  mv piper_linux-arm64 piper")
-            print("  chmod +x piper")
-            raise FileNotFoundError("Piper binary bulunamadı")
-        
-        # Model kontrolü
-        if not os.path.exists(PIPER_MODEL_PATH):
-            print("❌ Piper modeli bulunamadı!")
-            print("Lütfen şu komutla indirin:")
-            print("  mkdir -p /home/pixel/piper_models")
-            print("  cd /home/pixel/piper_models")
-            print("  wget https://github.com/rhasspy/piper/releases/download/2023.12.06-09.23.38/tr_TR-rüştü-hoca-tts-high.onnx")
-            raise FileNotFoundError("Piper modeli bulunamadı")
-        
-        # Piper binary çalıştırılabilir mi kontrol et
-        try:
-            result = subprocess.run([PIPER_BINARY_PATH, "--help"], 
-                                   capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                print("✅ Piper TTS kurulu ve hazır")
-            else:
-                print("❌ Piper binary çalışmıyor, çalıştırma izni verin:")
-                print(f"  chmod +x {PIPER_BINARY_PATH}")
-                raise Exception("Piper binary çalışmıyor")
-        except Exception as e:
-            print(f"❌ Piper kontrol hatası: {e}")
-            raise
-    
-    def speak(self, text, wait=True, speed=1.0):
-        """Metni Piper TTS ile seslendir - SUBPROCESS İLE"""
-        try:
-            # Türkçe metni hazırla
-            text = self.prepare_turkish_text(text)
-            
-            # Geçici WAV dosyası oluştur
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                wav_path = tmp_file.name
-            
-            # Piper komutunu oluştur 
-            # Hız ayarı için --length_scale kullanılır (1.0 normal, küçük = hızlı, büyük = yavaş)
-            length_scale = 1.0 / speed  # speed > 1 ise daha hızlı
-            
-            # SADECE SUBPROCESS İLE ECHO KULLAN 
-            cmd = f'echo "{text}" | {PIPER_BINARY_PATH} --model {PIPER_MODEL_PATH} --output_file {wav_path} --length_scale {length_scale}'
-            
-            print(f"🔊 Piper TTS: '{text[:50]}...' (hız: {speed})")
-            
-            # Komutu çalıştır
-            result = subprocess.run(cmd, shell=True, 
-                                   capture_output=True, text=True, timeout=30)
-            
-            if result.returncode != 0:
-                print(f"❌ Piper hatası: {result.stderr}")
-                return
-            
-            # WAV dosyasını aplay ile çal
-            self.play_wav_with_aplay(wav_path)
-            
-            # Dosyayı temizle
-            if os.path.exists(wav_path):
-                os.remove(wav_path)
-                
-        except subprocess.TimeoutExpired:
-            print("❌ Piper zaman aşımı")
-        except Exception as e:
-            print(f"❌ Piper seslendirme hatası: {e}")
-            # Hata durumunda sessiz bekle
-            if wait:
-                time.sleep(len(text) / (15 * speed))
-    
-    def play_wav_with_aplay(self, wav_path):
-        if not os.path.exists(wav_path):
-            return
-        
-        try:
-            # aplay komutu ile WAV dosyasını çal
-            subprocess.run(['aplay', '-q', wav_path], 
-                          capture_output=True, timeout=10)
-        except Exception as e:
-            print(f"❌ Ses çalma hatası: {e}")
-            # Alternatif: cat ile raw audio
-            try:
-                subprocess.run(['cat', wav_path, '>', '/dev/dsp'], 
-                              shell=True, timeout=5)
-            except:
-                pass
-    
-    def speak_async(self, text, speed=1.0):
-        """Asenkron seslendirme"""
-        Thread(target=self.speak, args=(text, True, speed), daemon=True).start()
-    
-    def prepare_turkish_text(self, text):
-        """Türkçe metni Piper TTS için hazırla"""
-        # Piper Türkçe modeli Türkçe karakterleri destekler
-        # Tırnak işaretlerini escape et ve satır sonlarını kaldır
-        text = text.replace('"', '\\"').replace('\n', ' ').replace('\r', ' ')
-        text = ' '.join(text.split())  # Fazla boşlukları temizle
-        return text
-
-# ==================== GPIO AYARLARI ====================
-class GPIOPins:
-    # Röle Pinleri (6 solenoid için)
-    RELAY_PINS = [4, 17, 27, 22, 23, 24]
-    
-    # Buton Pinleri
-    BUTTON_NEXT = 5        # Sonraki kitap
-    BUTTON_CONFIRM = 6     # Onay/Seçim
-    BUTTON_MODE = 13       # Mod değiştirme
-    BUTTON_SPEED_UP = 19   # Hız artırma
-    BUTTON_SPEED_DOWN = 26 # Hız azaltma
-    BUTTON_UPDATE = 21     # Kitapları güncelle
-    
-    ALL_BUTTONS = [BUTTON_NEXT, BUTTON_CONFIRM, BUTTON_MODE, 
-                   BUTTON_SPEED_UP, BUTTON_SPEED_DOWN, BUTTON_UPDATE]
-
-# ==================== BRAILLE KİTAP OKUYUCU ====================
-class BrailleBookReader:
-    def __init__(self):
-        print("🎵 BRAİLLE KİTAP OKUYUCU - PİPER TTS SÜRÜMÜ")
-        print("=" * 50)
-        
-        # PİPER TTS ses motorunu kur
-        print("🔊 PİPER TTS başlatılıyor...")
-        self.voice_engine = VoiceEngine()
-        
-        # GPIO Ayarları
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setwarnings(False)
-        
-        try:
-            GPIO.cleanup()
-            time.sleep(0.3)
-        except:
-            pass
-        
-        # Değişkenler
-        self.books = []
-        self.current_book_index = 0
-        self.selected_book = None
-        self.current_mode = 0
-        self.modes = ["sadece_yazma", "sadece_okuma", "hem_okuma_hem_yazma", "egitim_modu"]
-        self.mode_names = ["Sadece Yazma", "Sadece Okuma", "Hem Okuma Hem Yazma", "Braille Eğitimi"]
-        
-        # HIZ AYARLARI
-        self.speech_speed = 1.0    # Ses hızı (1.0 normal)
-        self.write_speed = 0.5     # Yazma hızı (0.5 saniye/her karakter)
-        self.min_speed = 0.3       # Minimum yazma hızı
-        self.max_speed = 1.0       # Maksimum yazma hızı
-        
-        # Fiziksel solenoid ayarları
-        self.solenoid_up_time = 0.1    # Solenoid yukarı çıkma süresi
-        self.solenoid_down_time = 0.05 # Solenoid aşağı inme süresi (bekleme)
-        
-        # Sistem durumu
-        self.is_running = True
-        self.is_playing = False
-        self.is_paused = False
-        self.stop_event = Event()
-        self.progress_data = {}
-        self.current_position = 0
-        self.current_text = ""
-        
-        # Buton takibi
-        self.button_states = {}
-        self.button_press_start = {}
-        self.last_button_time = {}
-        self.button_debounce = {}
-        for pin in GPIOPins.ALL_BUTTONS:
-            self.button_debounce[pin] = 0
-        
-        self.lock = Lock()
-        
-        # Dizinleri oluştur
-        self.setup_directories()
-        
-        # GPIO'yu ayarla
-        self.setup_gpio()
-        
-        # Braille haritasını yükle
-        self.setup_braille_map()
-        
-        # İlerlemeyi yükle
-        self.load_progress()
-        
-        # Kitapları yükle (yerelden)
-        self.load_local_books()
-        
-        # Otomatik güncelleme thread'i
-        self.update_thread = Thread(target=self.auto_update_check, daemon=True)
-        self.update_thread.start()
-        
-        # Başlangıç mesajı - PİPER TTS İLE
-        self.speak("Braille kitap okuyucuya hoş geldiniz.")
-        time.sleep(0.5)
-        
-        if self.books:
-            self.speak(f"Kütüphanenizde {len(self.books)} kitap bulunuyor.")
-            time.sleep(0.5)
-            book_name = self.books[0]['name_tr']
-            self.speak(f"İlk kitap: {book_name}")
-        else:
-            self.speak("Henüz hiç kitap yok. Lütfen güncelle tuşuna basarak kitapları indirin.")
-        
-        self.speak("İleri tuşu ile kitaplar arasında gezin.")
-        time.sleep(0.3)
-        self.speak("Onay tuşu ile seçin veya duraklat.")
-        time.sleep(0.3)
-        self.speak("Mod tuşu ile okuma modunu değiştirin.")
-        time.sleep(0.3)
-        self.speak("Hız artırma ve azaltma tuşları ile okuma hızını ayarlayın.")
-        
-        print("✅ PİPER TTS sistemi başlatıldı!")
-    
-    # ==================== PİPER TTS SES FONKSİYONLARI ====================
-    def speak(self, text):
-        """Metni PİPER TTS ile seslendir"""
-        self.voice_engine.speak(text, wait=True, speed=self.speech_speed)
-    
-    def speak_async(self, text):
-        """Asenkron seslendirme - PİPER TTS"""
-        self.voice_engine.speak_async(text, self.speech_speed)
-    
-    def adjust_speed(self, increase=True):
-        """Ses ve yazma hızını ayarla"""
-        with self.lock:
-            if increase:
-                # Ses hızını artır (daha hızlı konuşma)
-                self.speech_speed = min(2.0, self.speech_speed + 0.2)
-                # Yazma hızını azalt (daha hızlı yazma)
-                self.write_speed = max(0.3, self.write_speed - 0.1)
-            else:
-                # Ses hızını azalt (daha yavaş konuşma)
-                self.speech_speed = max(0.5, self.speech_speed - 0.2)
-                # Yazma hızını artır (daha yavaş yazma)
-                self.write_speed = min(1.0, self.write_speed + 0.1)
-            
-            speed_text = "hızlı" if self.speech_speed > 1.3 else "normal" if self.speech_speed > 0.8 else "yavaş"
-            write_text = "hızlı" if self.write_speed < 0.4 else "normal" if self.write_speed < 0.7 else "yavaş"
-            print(f"🔧 Hız ayarı: ses={self.speech_speed:.1f} ({speed_text}), yazma={self.write_speed:.1f}s ({write_text})")
-            self.speak(f"Ses hızı {speed_text}, yazma hızı {write_text}")
-    
-    # ==================== GİTHUB PDF SİSTEMİ ====================
-    def setup_directories(self):
-        """Gerekli dizinleri oluştur"""
-        os.makedirs(LOCAL_BOOKS_DIR, exist_ok=True)
-        os.makedirs(f"{LOCAL_BOOKS_DIR}/pdfs", exist_ok=True)
-    
-    def load_local_books(self):
-        """Yerel kitapları yükle"""
-        auto_file = f"{LOCAL_BOOKS_DIR}/kitaplar_auto.json"
-        
-        if os.path.exists(auto_file):
-            try:
-                with open(auto_file, 'r', encoding='utf-8') as f:
-                    self.books = json.load(f)
-                print(f"📚 {len(self.books)} kitap yüklendi")
-            except Exception as e:
-                print(f"Kitaplar yüklenirken hata: {e}")
-                self.books = []
-        else:
-            self.books = []
-    
-    def scan_github_for_pdfs(self):
-        """GitHub'daki PDF'leri tara"""
-        print("🌐 GitHub'daki PDF'ler taranıyor...")
-        
-        try:
-            headers = {'User-Agent': 'Braille-Book-Reader'}
-            response = requests.get(GITHUB_API_URL, headers=headers, timeout=15)
-            
-            if response.status_code == 200:
-                files = response.json()
-                books = []
-                
-                for file in files:
-                    if isinstance(file, dict) and file.get('type') == 'file':
-                        filename = file.get('name', '')
-                        if filename.lower().endswith('.pdf'):
-                            book_name = self.create_book_name(filename)
-                            books.append({
-                                'filename': filename,
-                                'name_tr': book_name,
-                                'download_url': file.get('download_url', ''),
-                                'size': file.get('size', 0),
-                                'sha': file.get('sha', '')[:8]
-                            })
-                
-                print(f"✅ {len(books)} PDF bulundu")
-                return books
-            else:
-                print(f"❌ GitHub API hatası: {response.status_code}")
-                return []
-                
-        except Exception as e:
-            print(f"❌ Tarama hatası: {e}")
-            return []
-    
-    def create_book_name(self, filename):
-        """Dosya adından kitap adı oluştur"""
-        name = filename.replace('.pdf', '').replace('.PDF', '')
-        for char in ['_', '-', '.']:
-            name = name.replace(char, ' ')
-        
-        words = []
-        for word in name.split():
-            if word.lower() in ['ve', 'ile', 'de', 'da', 'ki']:
-                words.append(word.lower())
-            else:
-                words.append(word[0].upper() + word[1:].lower())
-        
-        result = ' '.join(words)
-        return result[:40] if len(result) > 40 else result
-    
-    def update_library(self, speak_progress=True):
-        """Kitaplığı güncelle"""
-        if speak_progress:
-            self.speak("Kitaplar güncelleniyor.")
-        
-        github_books = self.scan_github_for_pdfs()
-        
-        if not github_books:
-            if speak_progress:
-                self.speak("GitHub'dan kitap listesi alınamadı.")
-            return
-        
-        if speak_progress:
-            self.speak(f"{len(github_books)} kitap bulundu.")
-        
-        new_books = []
-        for book in github_books:
-            local_path = f"{LOCAL_BOOKS_DIR}/pdfs/{book['filename']}"
-            if not os.path.exists(local_path):
-                new_books.append(book)
-        
-        if speak_progress and new_books:
-            self.speak(f"{len(new_books)} yeni kitap indirilecek.")
-        
-        success_count = 0
-        for book in new_books:
-            if self.download_book(book):
-                success_count += 1
-        
-        self.save_book_metadata(github_books)
-        self.books = github_books
-        
-        if speak_progress:
-            if success_count > 0:
-                self.speak(f"Güncelleme tamamlandı. {success_count} kitap eklendi.")
-            else:
-                self.speak("Tüm kitaplar güncel.")
-    
-    def download_book(self, book):
-        """Kitabı indir"""
-        try:
-            response = requests.get(book['download_url'], timeout=60)
-            if response.status_code == 200:
-                file_path = f"{LOCAL_BOOKS_DIR}/pdfs/{book['filename']}"
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
-                print(f"📥 {book['filename']} indirildi")
-                return True
-            else:
-                print(f"❌ {book['filename']} indirilemedi: {response.status_code}")
-        except Exception as e:
-            print(f"❌ {book['filename']} indirme hatası: {e}")
-        return False
-    
-    def save_book_metadata(self, books):
-        """Metadata'yı kaydet"""
-        metadata_path = f"{LOCAL_BOOKS_DIR}/kitaplar_auto.json"
-        try:
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(books, f, ensure_ascii=False, indent=2)
-            print("📁 Metadata kaydedildi")
-        except Exception as e:
-            print(f"❌ Metadata kaydetme hatası: {e}")
-    
-    def auto_update_check(self):
-        """Otomatik güncelleme kontrolü"""
-        while self.is_running:
-            time.sleep(UPDATE_INTERVAL)
-            try:
-                requests.get("https://api.github.com", timeout=5)
-                self.update_library(speak_progress=False)
-            except:
-                pass
-    
-    # ==================== GPIO ve BUTON KONTROLÜ ====================
-    def setup_gpio(self):
-        """GPIO pinlerini ayarla"""
-        try:
-            # Röle pinleri - LOW = Röle kapalı (solenoid pasif)
-            for pin in GPIOPins.RELAY_PINS:
-                GPIO.setup(pin, GPIO.OUT)
-                GPIO.output(pin, GPIO.LOW)  # Başlangıçta tüm röleler KAPALI
-            
-            # Buton pinleri
-            for pin in GPIOPins.ALL_BUTTONS:
-                GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-                self.button_states[pin] = GPIO.HIGH
-                self.button_press_start[pin] = 0
-                self.last_button_time[pin] = time.time()
-            
-            print("✅ GPIO ayarlandı - Tüm röleler başlangıçta kapalı")
-            
-        except Exception as e:
-            print(f"❌ GPIO hatası: {e}")
-    
-    def check_buttons(self):
-        """Butonları kontrol et - DEBOUNCE ile"""
-        current_time = time.time()
-        
-        for pin in GPIOPins.ALL_BUTTONS:
-            try:
-                current_state = GPIO.input(pin)
-                last_state = self.button_states.get(pin, GPIO.HIGH)
-                
-                # Debounce kontrolü (50ms)
-                if current_time - self.last_button_time[pin] < 0.05:
-                    continue
-                
-                # Buton basıldı
-                if current_state == GPIO.LOW and last_state == GPIO.HIGH:
-                    self.button_press_start[pin] = current_time
-                    self.last_button_time[pin] = current_time
-                    self.handle_button_press(pin)
-                
-                # Buton basılı tutuluyor
-                elif current_state == GPIO.LOW and last_state == GPIO.LOW:
-                    press_duration = current_time - self.button_press_start[pin]
-                    
-                    # 2 saniye basılı tutunca BAŞTAN BAŞLAT
-                    if press_duration >= 2.0 and pin == GPIOPins.BUTTON_NEXT:
-                        if self.is_playing and not self.is_paused:
-                            self.handle_long_press(pin, press_duration)
-                            self.button_press_start[pin] = current_time
-                
-                # Buton bırakıldı
-                elif current_state == GPIO.HIGH and last_state == GPIO.LOW:
-                    self.button_press_start[pin] = 0
-                
-                self.button_states[pin] = current_state
-                
-            except Exception as e:
-                print(f"Buton kontrol hatası: {e}")
-    
-    def handle_button_press(self, pin):
-        """Kısa basma işleyici"""
-        current_time = time.time()
-        
-        # Double press koruması (300ms)
-        if current_time - self.button_debounce[pin] < 0.3:
-            return
-        
-        self.button_debounce[pin] = current_time
-        
-        with self.lock:
-            if pin == GPIOPins.BUTTON_NEXT:
-                self.next_book()
-            elif pin == GPIOPins.BUTTON_CONFIRM:
-                self.confirm_selection()
-            elif pin == GPIOPins.BUTTON_MODE:
-                self.next_mode()
-            elif pin == GPIOPins.BUTTON_SPEED_UP:
-                print("⬆️ Hız artırma butonuna basıldı")
-                self.adjust_speed(increase=True)
-            elif pin == GPIOPins.BUTTON_SPEED_DOWN:
-                print("⬇️ Hız azaltma butonuna basıldı")
-                self.adjust_speed(increase=False)
-            elif pin == GPIOPins.BUTTON_UPDATE:
-                self.manual_update()
-    
-    def handle_long_press(self, pin, duration):
-        """Uzun basma işleyici - KİTABI BAŞTAN BAŞLAT"""
-        if pin == GPIOPins.BUTTON_NEXT and self.is_playing and not self.is_paused:
-            print(f"⏪ Uzun basma ({duration:.1f}s): Kitap baştan başlatılıyor...")
-            self.speak("Kitap baştan başlatılıyor")
-            
-            self.stop_event.set()
-            time.sleep(0.2)
-            self.stop_event.clear()
-            
-            # Pozisyonu sıfırla
-            self.current_position = 0
-            
-            # İlerlemeyi kaydet
-            if self.selected_book:
-                book_key = self.selected_book['filename']
-                self.progress_data[book_key] = {
-                    'position': 0,
-                    'mode': self.current_mode,
-                    'timestamp': time.time()
-                }
-                self.save_progress()
-            
-            # Yeniden başlat (duraklatma durumunu koru)
-            self.start_reading()
-    
-    def next_book(self):
-        """Sonraki kitap"""
-        if not self.books:
-            self.speak("Henüz kitap yok. Güncelle tuşuna basın.")
-            return
-        
-        self.current_book_index = (self.current_book_index + 1) % len(self.books)
-        book = self.books[self.current_book_index]
-        self.speak(book['name_tr'])
-    
-    def confirm_selection(self):
-        """Seçimi onayla veya DURAKLAT/DEVAM ET"""
-        if not self.books:
-            self.speak("Önce kitapları güncelleyin.")
-            return
-        
-        if self.selected_book is None:
-            # Kitap seçimi
-            self.selected_book = self.books[self.current_book_index]
-            book = self.selected_book
-            self.speak(f"{book['name_tr']} seçildi. Mod seçmek için mod tuşuna basın.")
-        elif self.is_playing:
-            # DURAKLAT/DEVAM ET
-            self.toggle_pause()
-        else:
-            # Mod seçimi
-            self.speak(f"{self.mode_names[self.current_mode]} seçildi. Başlıyor...")
-            time.sleep(0.5)
-            self.start_reading()
-    
-    def toggle_pause(self):
-        """Duraklat/Devam et"""
-        if not self.is_playing:
-            return
-        
-        self.is_paused = not self.is_paused
-        
-        if self.is_paused:
-            self.speak("Duraklatıldı")
-            self.clear_solenoids()  # Duraklatma sırasında röleleri kapat
-        else:
-            self.speak("Devam ediliyor")
-    
-    def next_mode(self):
-        """Sonraki mod"""
-        if self.selected_book is None:
-            self.speak("Önce bir kitap seçin.")
-            return
-        
-        self.current_mode = (self.current_mode + 1) % len(self.modes)
-        self.speak(self.mode_names[self.current_mode])
-    
-    def manual_update(self):
-        """Manuel güncelleme"""
-        Thread(target=self.update_library, args=(True,), daemon=True).start()
-    
-    # ==================== BRAILLE SİSTEMİ ====================
-    def setup_braille_map(self):
-        """Braille haritasını yükle"""
-        self.braille_map = {
-            'a': [1,0,0,0,0,0], 'b': [1,1,0,0,0,0], 'c': [1,0,0,1,0,0],
-            'ç': [1,0,0,1,1,0], 'd': [1,0,0,1,1,1], 'e': [1,0,0,0,1,0],
-            'f': [1,1,0,1,0,0], 'g': [1,1,0,1,1,0], 'ğ': [1,1,0,1,1,1],
-            'h': [1,1,0,0,1,0], 'ı': [0,1,0,1,0,1], 'i': [0,1,0,1,0,0],
-            'j': [0,1,0,1,1,0], 'k': [1,0,1,0,0,0], 'l': [1,1,1,0,0,0],
-            'm': [1,0,1,1,0,0], 'n': [1,0,1,1,1,0], 'o': [1,0,1,0,1,0],
-            'ö': [0,1,1,1,0,1], 'p': [1,1,1,1,0,0], 'r': [1,1,1,1,1,0],
-            's': [0,1,1,1,0,0], 'ş': [1,1,1,0,1,1], 't': [0,1,1,1,1,1],
-            'u': [1,0,1,0,0,1], 'ü': [0,1,1,1,1,0], 'v': [0,1,1,1,0,1],
-            'y': [1,0,1,1,1,1], 'z': [1,0,1,0,1,1],
-            ' ': [0,0,0,0,0,0], '.': [0,1,0,0,1,1], ',': [0,1,0,0,0,0],
-            '!': [0,1,1,0,1,0], '?': [0,1,1,0,0,1],
-            '0': [0,1,0,1,0,1], '1': [1,0,0,0,0,0], '2': [1,1,0,0,0,0],
-            '3': [1,0,0,1,0,0], '4': [1,0,0,1,1,0], '5': [1,0,0,0,1,0],
-            '6': [1,1,0,1,0,0], '7': [1,1,0,1,1,0], '8': [1,1,0,0,1,0],
-            '9': [0,1,0,1,1,0]
-        }
-    
-    def set_solenoids(self, pattern):
-        """Solenoidleri ayarla - 1 = HIGH (Aktif), 0 = LOW (Pasif)"""
-        for i, state in enumerate(pattern[:6]):
-            if i < len(GPIOPins.RELAY_PINS):
-                if state == 1:
-                    GPIO.output(GPIOPins.RELAY_PINS[i], GPIO.HIGH)
-                else:
-                    GPIO.output(GPIOPins.RELAY_PINS[i], GPIO.LOW)
-    
-    def clear_solenoids(self):
-        """Tüm solenoidleri KAPAT (LOW)"""
-        for pin in GPIOPins.RELAY_PINS:
-            GPIO.output(pin, GPIO.LOW)
-    
-    def write_character_fast(self, char):
-        """Bir karakteri FİZİKSEL olarak doğru şekilde yaz"""
-        char_lower = char.lower()
-        if char_lower in self.braille_map:
-            pattern = self.braille_map[char_lower]
-            
-            # Solenoidleri aktif et
-            self.set_solenoids(pattern)
-            
-            # SOLENOİDLERİN YUKARI ÇIKMASI İÇİN YETERLİ SÜRE BEKLE
-            time.sleep(self.solenoid_up_time)
-            
-            # Karakteri yazma süresi (hıza göre ayarlanır)
-            time.sleep(max(0.1, self.write_speed - self.solenoid_up_time))
-            
-            # Solenoidleri kapat
-            self.clear_solenoids()
-            
-            # SOLENOİDLERİN AŞAĞI İNMESİ İÇİN YETERLİ SÜRE BEKLE
-            time.sleep(self.solenoid_down_time)
-            
-            # Harf arası boşluk
-            time.sleep(0.03)
-            return True
-        elif char == ' ':
-            # Boşluk için daha uzun bekle
-            self.clear_solenoids()
-            time.sleep(self.write_speed * 3)
-            return True
-        return False
-    
-    def write_word_fast(self, word):
-        """Bir kelimeyi HIZLI yaz"""
-        for char in word:
-            if self.stop_event.is_set() or not self.is_playing or self.is_paused:
-                return False
-            
-            # Duraklatma kontrolü
-            while self.is_paused and self.is_playing and not self.stop_event.is_set():
-                time.sleep(0.1)
-            
-            if not self.write_character_fast(char):
-                # Bilinmeyen karakter için boşluk
-                time.sleep(self.write_speed)
-        
-        return True
-    
-    # ==================== PDF OKUMA ====================
-    def read_pdf_content(self, book):
-        """PDF içeriğini oku"""
-        pdf_path = f"{LOCAL_BOOKS_DIR}/pdfs/{book['filename']}"
-        
-        if not os.path.exists(pdf_path):
-            return ""
-        
-        try:
-            # pdftotext kontrolü
-            result = subprocess.run(['which', 'pdftotext'], 
-                                   capture_output=True, 
-                                   text=True)
-            if result.returncode != 0:
-                print("⚠️ pdftotext bulunamadı, kuruluyor...")
-                subprocess.run(['sudo', 'apt', 'install', '-y', 'poppler-utils'], 
-                              stdout=subprocess.DEVNULL, 
-                              stderr=subprocess.DEVNULL)
-            
-            temp_file = "/tmp/kitap_temp.txt"
-            cmd = ["pdftotext", "-layout", "-enc", "UTF-8", pdf_path, temp_file]
-            subprocess.run(cmd, capture_output=True, text=True)
-            
-            if os.path.exists(temp_file):
-                with open(temp_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    text = f.read()
-                os.remove(temp_file)
-                
-                # Metni temizle
-                text = ' '.join(text.split())
-                return text
-            return ""
-        except Exception as e:
-            print(f"PDF okuma hatası: {e}")
-            return ""
-    
-    def start_reading(self):
-        """Okumaya başla"""
-        if not self.selected_book:
-            return
-        
-        # Her okuma başlamadan önce solenoidleri kapat
-        self.clear_solenoids()
-        
-        self.stop_event.set()
-        self.is_playing = False
-        self.is_paused = False
-        time.sleep(0.3)
-        self.stop_event.clear()
-        
-        self.speak("Kitap yükleniyor.")
-        self.current_text = self.read_pdf_content(self.selected_book)
-        
-        if not self.current_text or len(self.current_text) < 10:
-            self.speak("Kitap okunamadı veya boş.")
-            return
-        
-        book_key = self.selected_book['filename']
-        if book_key in self.progress_data:
-            self.current_position = self.progress_data[book_key]['position']
-            if self.current_position > 0:
-                percent_complete = (self.current_position / len(self.current_text)) * 100
-                self.speak(f"Kitap yüklendi. Yüzde {int(percent_complete)} tamamlanmış. Kayıtlı yerden devam ediliyor.")
-            else:
-                self.speak("Kitap baştan başlatılıyor.")
-        else:
-            self.current_position = 0
-        
-        self.is_playing = True
-        
-        # Başlamadan önce tekrar solenoidleri kontrol et
-        self.clear_solenoids()
-        
-        if self.modes[self.current_mode] == "sadece_yazma":
-            self.mode_write_only()
-        elif self.modes[self.current_mode] == "sadece_okuma":
-            self.mode_read_only()
-        elif self.modes[self.current_mode] == "hem_okuma_hem_yazma":
-            self.mode_read_and_write()
-        elif self.modes[self.current_mode] == "egitim_modu":
-            self.mode_education()
-    
-    def mode_write_only(self):
-        """Sadece yazma modu - TÜM KİTAP"""
-        self.speak("Sadece yazma modu başlıyor. Kitabın tamamı yazılacak.")
-        time.sleep(0.5)
-        
-        total_chars = len(self.current_text)
-        char_count = 0
-        
-        while self.current_position < total_chars and self.is_playing:
-            if self.stop_event.is_set():
-                break
-            
-            # Duraklatma kontrolü
-            while self.is_paused and self.is_playing and not self.stop_event.is_set():
-                time.sleep(0.1)
-            
-            char = self.current_text[self.current_position]
-            
-            if self.write_character_fast(char):
-                char_count += 1
-                self.current_position += 1
-            
-            # Her 100 karakterde bir ilerlemeyi kaydet
-            if char_count % 100 == 0:
-                self.save_progress()
-                # İlerlemeyi sesli bildir (isteğe bağlı)
-                percent_complete = (self.current_position / total_chars) * 100
-                if percent_complete % 10 == 0:  # Her %10'da bir bildir
-                    self.speak_async(f"Yüzde {int(percent_complete)} tamamlandı")
-        
-        self.is_playing = False
-        self.clear_solenoids()  # Mod bittiğinde solenoidleri kapat
-        self.save_progress()
-        
-        if self.current_position >= total_chars:
-            self.speak("Kitabın tamamı yazıldı. Tebrikler!")
-            # Kitabı tamamladık, pozisyonu sıfırla
-            self.current_position = 0
-            if self.selected_book:
-                book_key = self.selected_book['filename']
-                self.progress_data[book_key] = {'position': 0, 'timestamp': time.time()}
-                self.save_progress()
-        else:
-            self.speak("Yazma durduruldu.")
-    
-    def mode_read_only(self):
-        """Sadece okuma modu - TÜM KİTAP"""
-        self.speak("Okuma modu başlıyor. Kitabın tamamı okunacak.")
-        time.sleep(0.3)
-        
-        total_chars = len(self.current_text)
-        read_position = self.current_position
-        
-        # Okuma işlemi için bloklar halinde okuma
-        while read_position < total_chars and self.is_playing:
-            if self.stop_event.is_set():
-                break
-            
-            # Duraklatma kontrolü
-            while self.is_paused and self.is_playing and not self.stop_event.is_set():
-                time.sleep(0.1)
-            
-            # 1000 karakterlik bloklar halinde oku (ama sınır yok, kitap bitene kadar)
-            remaining_text = self.current_text[read_position:]
-            
-            # Anlamlı bir noktada kesmek için cümle sonu arayalım
-            chunk_size = 2000  # Daha büyük bloklar
-            text_chunk = remaining_text[:chunk_size]
-            
-            # Cümle sonu bul
-            sentence_end = max(text_chunk.rfind('.'), text_chunk.rfind('!'), text_chunk.rfind('?'))
-            if sentence_end > 500:  # En az 500 karakter olsun
-                text_chunk = text_chunk[:sentence_end + 1]
-            
-            if text_chunk.strip():
-                self.speak(text_chunk)
-            
-            read_position += len(text_chunk)
-            self.current_position = read_position
-            
-            # Her 5000 karakterde bir ilerlemeyi kaydet
-            if read_position % 5000 < len(text_chunk):
-                self.save_progress()
-                percent_complete = (read_position / total_chars) * 100
-                if percent_complete % 10 == 0:  # Her %10'da bir bildir
-                    self.speak_async(f"Yüzde {int(percent_complete)} tamamlandı")
-            
-            # Kısa bekleme
-            time.sleep(0.1)
-        
-        self.is_playing = False
-        self.clear_solenoids()  # Mod bittiğinde solenoidleri kapat
-        self.save_progress()
-        
-        if read_position >= total_chars:
-            self.speak("Kitabın tamamı okundu. Tebrikler!")
-            # Kitabı tamamladık, pozisyonu sıfırla
-            self.current_position = 0
-            if self.selected_book:
-                book_key = self.selected_book['filename']
-                self.progress_data[book_key] = {'position': 0, 'timestamp': time.time()}
-                self.save_progress()
-        else:
-            self.speak("Okuma durduruldu.")
-    
-    def mode_read_and_write(self):
-        """Hem okuma hem yazma modu - TÜM KİTAP"""
-        self.speak("Okuma ve yazma modu başlıyor. Kitabın tamamı okunup yazılacak.")
-        time.sleep(0.3)
-        
-        total_chars = len(self.current_text)
-        
-        while self.current_position < total_chars and self.is_playing:
-            # Duraklatma kontrolü
-            while self.is_paused and self.is_playing and not self.stop_event.is_set():
-                time.sleep(0.1)
-            
-            # Mevcut pozisyondan 200 karakterlik bir blok al
-            remaining_text = self.current_text[self.current_position:]
-            text_chunk = remaining_text[:200]
-            
-            if not text_chunk.strip():
-                break
-            
-            # Cümle veya kelime sınırı bul
-            words = text_chunk.split()
-            
-            for word in words:
-                if self.stop_event.is_set() or not self.is_playing or self.current_position >= total_chars:
-                    break
-                
-                # Duraklatma kontrolü
-                while self.is_paused and self.is_playing and not self.stop_event.is_set():
-                    time.sleep(0.1)
-                
-                # Kelimeyi yaz
-                if self.write_word_fast(word):
-                    # Kelimeyi OKU (asenkron olarak)
-                    self.speak_async(word)
-                    
-                    # Boşluk yaz (sessiz)
-                    self.clear_solenoids()
-                    time.sleep(self.write_speed * 1.5)
-                
-                # Pozisyonu güncelle
-                self.current_position += len(word) + 1  # +1 for space
-                
-                # Her 500 karakterde bir kaydet
-                if self.current_position % 500 < len(word):
-                    self.save_progress()
-                    percent_complete = (self.current_position / total_chars) * 100
-                    if percent_complete % 10 == 0:  # Her %10'da bir bildir
-                        self.speak_async(f"Yüzde {int(percent_complete)} tamamlandı")
-            
-            # Kısa bekleme
-            time.sleep(0.05)
-        
-        # MOD BİTİŞİ
-        if not self.is_paused:
-            self.is_playing = False
-            self.clear_solenoids()  # Mod bittiğinde solenoidleri kapat
-            self.save_progress()
-            
-            if self.current_position >= total_chars:
-                self.speak("Kitabın tamamı okunup yazıldı. Tebrikler!")
-                # Kitabı tamamladık, pozisyonu sıfırla
-                self.current_position = 0
-                if self.selected_book:
-                    book_key = self.selected_book['filename']
-                    self.progress_data[book_key] = {'position': 0, 'timestamp': time.time()}
-                    self.save_progress()
-            else:
-                self.speak("Okuma modu durduruldu. Devam etmek için onay tuşuna basın.")
-    
-    def mode_education(self):
-        """Braille eğitim modu - TÜM ALFABE"""
-        self.speak("Braille eğitim modu başlıyor. Tüm alfabe öğretilecek.")
-        time.sleep(0.5)
-        
-        # Tüm harfleri ve rakamları içeren liste
-        letters = [
-            ("a", "a harfi"), ("b", "b harfi"), ("c", "c harfi"),
-            ("ç", "ç harfi"), ("d", "d harfi"), ("e", "e harfi"),
-            ("f", "f harfi"), ("g", "g harfi"), ("ğ", "ğ harfi"),
-            ("h", "h harfi"), ("ı", "ı harfi"), ("i", "i harfi"),
-            ("j", "j harfi"), ("k", "k harfi"), ("l", "l harfi"),
-            ("m", "m harfi"), ("n", "n harfi"), ("o", "o harfi"),
-            ("ö", "ö harfi"), ("p", "p harfi"), ("r", "r harfi"),
-            ("s", "s harfi"), ("ş", "ş harfi"), ("t", "t harfi"),
-            ("u", "u harfi"), ("ü", "ü harfi"), ("v", "v harfi"),
-            ("y", "y harfi"), ("z", "z harfi")
-        ]
-        
-        numbers = [
-            ("0", "sıfır"), ("1", "bir"), ("2", "iki"),
-            ("3", "üç"), ("4", "dört"), ("5", "beş"),
-            ("6", "altı"), ("7", "yedi"), ("8", "sekiz"),
-            ("9", "dokuz")
-        ]
-        
-        punctuation = [
-            (".", "nokta"), (",", "virgül"), 
-            ("!", "ünlem işareti"), ("?", "soru işareti")
-        ]
-        
-        # Harfleri öğret
-        self.speak("Şimdi harfleri öğrenelim.")
-        for char, description in letters:
-            if self.stop_event.is_set() or not self.is_playing:
-                break
-            
-            # Duraklatma kontrolü
-            while self.is_paused and self.is_playing and not self.stop_event.is_set():
-                time.sleep(0.1)
-            
-            self.speak(description)
-            time.sleep(0.3)
-            
-            if char in self.braille_map:
-                self.set_solenoids(self.braille_map[char])
-                time.sleep(1.5)
-                self.clear_solenoids()  # Her harften sonra solenoidleri kapat
-                time.sleep(0.3)
-        
-        if self.stop_event.is_set() or not self.is_playing:
-            self.is_playing = False
-            self.clear_solenoids()  # Durdurulduğunda solenoidleri kapat
-            self.speak("Eğitim durduruldu.")
-            return
-        
-        # Rakamları öğret
-        self.speak("Şimdi rakamları öğrenelim.")
-        for char, description in numbers:
-            if self.stop_event.is_set() or not self.is_playing:
-                break
-            
-            # Duraklatma kontrolü
-            while self.is_paused and self.is_playing and not self.stop_event.is_set():
-                time.sleep(0.1)
-            
-            self.speak(description)
-            time.sleep(0.3)
-            
-            if char in self.braille_map:
-                self.set_solenoids(self.braille_map[char])
-                time.sleep(1.5)
-                self.clear_solenoids()  # Her rakamdan sonra solenoidleri kapat
-                time.sleep(0.3)
-        
-        if self.stop_event.is_set() or not self.is_playing:
-            self.is_playing = False
-            self.clear_solenoids()  # Durdurulduğunda solenoidleri kapat
-            self.speak("Eğitim durduruldu.")
-            return
-        
-        # Noktalama işaretleri
-        self.speak("Şimdi noktalama işaretlerini öğrenelim.")
-        for char, description in punctuation:
-            if self.stop_event.is_set() or not self.is_playing:
-                break
-            
-            # Duraklatma kontrolü
-            while self.is_paused and self.is_playing and not self.stop_event.is_set():
-                time.sleep(0.1)
-            
-            self.speak(description)
-            time.sleep(0.3)
-            
-            if char in self.braille_map:
-                self.set_solenoids(self.braille_map[char])
-                time.sleep(1.5)
-                self.clear_solenoids()  # Her işaretten sonra solenoidleri kapat
-                time.sleep(0.3)
-        
-        self.is_playing = False
-        self.clear_solenoids()  # Mod bittiğinde solenoidleri kapat
-        self.speak("Braille eğitimi tamamlandı. Tüm harfleri, rakamları ve noktalama işaretlerini öğrendiniz.")
-    
-    # ==================== İLERLEME YÖNETİMİ ====================
-    def load_progress(self):
-        """İlerlemeyi yükle"""
-        progress_file = f"{LOCAL_BOOKS_DIR}/progress.json"
-        if os.path.exists(progress_file):
-            try:
-                with open(progress_file, 'r', encoding='utf-8') as f:
-                    self.progress_data = json.load(f)
-                print("📈 İlerleme yüklendi")
-            except:
-                self.progress_data = {}
-    
-    def save_progress(self):
-        """İlerlemeyi kaydet"""
-        if not self.selected_book:
-            return
-        
-        try:
-            book_key = self.selected_book['filename']
-            self.progress_data[book_key] = {
-                'position': self.current_position,
-                'mode': self.current_mode,
-                'timestamp': time.time()
-            }
-            
-            progress_file = f"{LOCAL_BOOKS_DIR}/progress.json"
-            with open(progress_file, 'w', encoding='utf-8') as f:
-                json.dump(self.progress_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"❌ İlerleme kaydetme hatası: {e}")
-    
-    # ==================== ANA DÖNGÜ ====================
-    def main_loop(self):
-        """Ana program döngüsü"""
-        try:
-            while self.is_running:
-                self.check_buttons()
-                time.sleep(0.02)  # Hızlı kontrol
-                
-        except KeyboardInterrupt:
-            print("\n⏹️ Durduruldu")
-            self.cleanup()
-        except Exception as e:
-            print(f"Hata: {e}")
-            self.cleanup()
-    
-    def cleanup(self):
-        """Temizlik"""
-        self.is_running = False
-        self.stop_event.set()
-        self.is_playing = False
-        
-        time.sleep(0.3)
-        self.clear_solenoids()  # Kapanmadan önce solenoidleri kapat
-        self.save_progress()
-        GPIO.cleanup()
-        print("✅ Sistem kapatıldı")
-
-# ==================== ANA PROGRAM ====================
-def main():
-    """Ana fonksiyon"""
-    print("=" * 60)
-    print("🎵 BRAİLLE KİTAP OKUYUCU - PİPER TTS SÜRÜMÜ")
-    print("=" * 60)
-    print("🎯 ÖZELLİKLER:")
-    print("  • Fiziksel solenoid kontrolü iyileştirildi")
-    print("  • Hız kontrolü butonları düzeltildi")
-    print("  • Debounce eklenerek buton tepkisi iyileştirildi")
-    print("  • Solenoidler için yukarı çıkma/aşağı inme süreleri eklendi")
-    print("  • Röleler sadece yazarken aktif")
-    print("=" * 60)
-    
-    # Bağımlılıkları kontrol et
-    try:
-        import requests
-        import RPi.GPIO
-        print("✅ Temel Python paketleri yüklü")
-    except ImportError as e:
-        print(f"❌ Eksik paket: {e}")
-        print("Kurulum için: pip install requests RPi.GPIO")
-        return
-    
-    # Programı başlat
-    reader = BrailleBookReader()
-    
-    try:
-        reader.main_loop()
-    except Exception as e:
-        print(f"Hata: {e}")
-        reader.cleanup()
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import json
+import requests
+import subprocess
+import threading
+import multiprocessing
+from threading import Thread, Lock, RLock, Event
+from collections import deque, namedtuple
+from concurrent.futures import Future
+import tempfile
+import wave
+import io
+import math
+import hashlib
+import argparse
+import socket
+import socketserver
+import contextlib
+import ctypes
+import errno
+import logging.handlers
+import bisect
+import heapq
+import glob
+import mmap
+import sqlite3
+import shutil
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None  # Simüle GPIO ile çalışırken gerekmez
+
+try:
+    import pigpio
+except ImportError:
+    pigpio = None  # DMA dalga biçimi yerine yazılım zamanlaması kullanılır
+
+try:
+    from systemd import journal
+except ImportError:
+    journal = None  # Kayıtlar dosyaya yazılır
+
+# ==================== KONFİGÜRASYON ====================
+GITHUB_REPO = "mehkerer8/pdfs"
+GITHUB_API_URL = f"https://api.github.com/repos/{GITHUB_REPO}/contents"
+LOCAL_BOOKS_DIR = "/home/pixel/braille_books"
+UPDATE_INTERVAL = 3600
+STORAGE_QUOTA_MB = 4096     # Kitaplar ve türetilmiş dosyalar için disk kotası
+STORAGE_MIN_FREE_MB = 512   # Kartta her zaman boş bırakılacak alan
+CATALOG_PATH = f"{LOCAL_BOOKS_DIR}/katalog.db"
+AUDIO_CACHE_DIR = f"{LOCAL_BOOKS_DIR}/audio_cache"
+AUDIO_CACHE_MAX_MB = 512  # Ses önbelleği üst sınırı
+TEXT_INDEX_STRIDE = 1024  # Metin indeksinde kaç karakterde bir bayt ofseti tutulur
+DOWNLOAD_CHUNK_KB = 16         # İndirme akışında diske yazılan parça (bu kadar veri gelince yazılır)
+PROGRESSIVE_EXTRACT_KB = 256   # Kısmi PDF'ten yeni sayfa denemeden önce beklenen yeni veri
+PROGRESSIVE_PAGE_BATCH = 4     # Kısmi PDF'ten tek seferde çıkarılan sayfa sayısı
+PROGRESSIVE_WAIT_POLL = 0.5    # Büyüyen metni beklerken okumanın durdurulup durdurulmadığına bakma aralığı
+AUDIOBOOK_DIR = f"{LOCAL_BOOKS_DIR}/audiobooks"
+AUDIOBOOK_FORMAT = "flac"  # Önceden seslendirme biçimi: "flac" veya "opus"
+SPEECH_CHARS_PER_SECOND = 15  # Normal hızda saniyede seslendirilen yaklaşık karakter
+
+# ARKA PLAN ÖN HAZIRLIK AYARLARI
+PRECOMPUTE_WORKERS = 2         # Düşük öncelikli ön hazırlık süreç sayısı
+PRECOMPUTE_AUDIO_MINUTES = 3   # Her kitabın baştan kaç dakikası önceden seslendirilir
+PRECOMPUTE_IDLE_DELAY = 120    # Son okumadan kaç saniye sonra cihaz boşta sayılır
+PRECOMPUTE_NICE = 19           # İşçi süreçlerin nice değeri (G-Ç sınıfı: idle)
+WORKER_START_METHOD = "forkserver"  # İşçi süreç başlatma (çok iş parçacıklı süreçten fork edilmez)
+
+# PIPER TTS AYARLARI 
+PIPER_BINARY_PATH = "./piper/piper"  # Piper binary dosyasının yolu
+PIPER_MODEL_PATH = "./tr_TR-fettah-medium.onnx"  # Model dosyası
+PIPER_WORKERS = 1  # Paylaşılan Piper işçi sayısı (sunucu modunda yapılandırılır)
+
+# HIZLI TTS AYARLARI (arayüz komutları için)
+ESPEAK_BINARY = "espeak-ng"  # Hafif yerel TTS motoru
+ESPEAK_VOICE = "tr"
+ESPEAK_WPM = 175             # Normal hızda dakikadaki kelime
+TTS_LATENCY_BUDGET = {       # Sınıf başına gecikme bütçesi (saniye), aşılırsa hızlı motora düşülür
+    'ui': 0.25,
+    'content': 3.0,
+}
+
+# KAYNAK YÖNETİMİ (ısı ve yük)
+GOVERNOR_INTERVAL = 5.0       # Sensör okuma aralığı (saniye)
+GOVERNOR_TEMP_WARM = 65.0     # Bu sıcaklıkta arka plan işleri durur (°C)
+GOVERNOR_TEMP_HOT = 75.0      # Bu sıcaklıkta sentez tek işçiye iner (Pi 80°C'de kısar)
+GOVERNOR_HYSTERESIS = 3.0     # Seviyeden çıkmak için eşiğin bu kadar altına inilmeli
+GOVERNOR_THROTTLE_RATIO = 0.8 # Yük altındayken frekans bu oranın altındaysa kısılmış sayılır
+
+# KAYIT AYARLARI
+LOG_LEVEL = "info"            # debug, info, warning, error
+LOG_TARGET = "auto"           # "journald", "file", "console" ya da "auto" (journald varsa o, yoksa dosya)
+LOG_FILE = f"{LOCAL_BOOKS_DIR}/okuyucu.log"
+LOG_FILE_MAX_KB = 1024        # Dönen kayıt dosyasının boyutu
+LOG_FILE_BACKUPS = 3
+LOG_BUFFER_SIZE = 2000        # Bellekteki halka tampon (son kayıtlar)
+LOG_RATE_WINDOW = 10.0        # Aynı uyarı/hata bu süre içinde bir kez yazılır, tekrarlar sayılır
+LOG_ECHO = True               # Kayıtları konsola da yaz (yazıcı iş parçacığında)
+
+# SES ÇIKIŞI AYARLARI
+PRIORITY_URGENT = 0   # Arayüz komutları: içerik anlatımını keser
+PRIORITY_CONTENT = 1  # Kitap anlatımı: boşluksuz art arda çalar
+AUDIO_BLOCK_MS = 40   # Ses çıkışına tek seferde yazılan blok (kesme gecikmesi)
+AUDIO_LEAD_MS = 60    # Yazıcının çalan sesin en fazla bu kadar önünde kalması (kesilen ses bu sürede susar)
+NAV_REPEAT_GUARD = 0.15  # Aynı tuşa art arda basmalar arasındaki en kısa süre (saniye)
+NAV_PREFETCH_RANGE = 2   # Seçili kitabın iki yanında adı önceden sentezlenen kitap sayısı
+
+# SOLENOİD SÜRÜŞ AYARLARI
+SOLENOID_HOLD_SUPPORTED = False  # Sürücü PWM ile düşük tutma seviyesini destekliyor mu
+SOLENOID_HOLD_DUTY = 40          # Tutma seviyesi (PWM görev oranı, %)
+SOLENOID_PWM_FREQ = 1000         # Tutma PWM frekansı (Hz)
+SOLENOID_MIN_HOLD_TIME = 0.08    # Noktanın parmakla hissedilmesi için en kısa tutma süresi
+SOLENOID_HEAT_LIMIT = 6.0        # Bobin başına izin verilen ısı (tam akım-saniye)
+SOLENOID_COOLING_TAU = 8.0       # Bobin soğuma zaman sabiti (saniye)
+SOLENOID_BACKEND = "gpio"        # "gpio" (yazılım zamanlaması), "pigpio" (DMA dalga biçimi) veya "mock"
+WAVE_MAX_CELLS = 32              # Tek dalga biçimine derlenen en fazla hücre (kelime/satır parçası)
+WAVE_POLL_INTERVAL = 0.005       # Dalga gönderilirken durdurma/duraklatma kontrol aralığı
+WAVE_CBS_PER_PULSE = 2           # pigpio'nun darbe başına harcadığı DMA denetim bloğu (ihtiyatlı)
+
+# Gerçek zaman yalıtımı (isteğe bağlı, --realtime)
+REALTIME_MODE = False              # Açılışta yalıtımı etkinleştir
+REALTIME_CPU = None                # Zamanlama iş parçacıklarına ayrılan çekirdek (None: son çekirdek)
+REALTIME_PRIORITY = {'actuation': 60, 'audio': 50}  # SCHED_FIFO öncelikleri
+REALTIME_BACKGROUND_NICE = 10      # Sentez, metin çıkarma ve indirme iş parçacıklarının nice değeri
+REALTIME_STACK_KB = 512            # Kilitli bellekte iş parçacığı yığını (mlockall tüm yığını kilitler)
+
+# Simülasyon (sanal zaman)
+SIM_POLL_INTERVAL = 0.02         # Sanal saatte duraklatma/çalma bitişi kontrol aralığı (saniye)
+
+# Yerel denetim soketi (isteğe bağlı, --control)
+CONTROL_SOCKET = f"{LOCAL_BOOKS_DIR}/kontrol.sock"  # Unix soketi (yalnızca bu makineden erişilir)
+CONTROL_STATE_INTERVAL = 1.0     # Abonelere durum satırı gönderme aralığı (saniye)
+CONTROL_SUBSCRIBER_QUEUE = 1000  # Yavaş aboneye biriken en fazla olay (eskiler düşürülür)
+CONTROL_STALL_SECONDS = 30.0     # Yük testinde takılma payı: bölütün beklenen süresini aşan ilerlemesizlik, yanıtsız komut
+
+# ==================== KAYIT ====================
+class EventLog:
+    """Sıcak yolları bekletmeyen yapılandırılmış kayıt.
+    
+    log() yalnızca bellekteki halka tampona ekler; journald'a, dönen kayıt
+    dosyasına ve konsola yazma ayrı bir iş parçacığında yapılır. Yazıcı
+    yetişemezse en eski bekleyen kayıtlar düşürülür (sayılır), çağıran hiçbir
+    zaman G/Ç beklemez. Aynı uyarı veya hata LOG_RATE_WINDOW içinde tekrar
+    ederse yalnızca ilki yazılır; bastırılan tekrar sayısı sonraki kayda eklenir.
+    """
+    
+    LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+    JOURNAL_PRIORITY = {'debug': 7, 'info': 6, 'warning': 4, 'error': 3}
+    
+    def __init__(self, target=LOG_TARGET, level=LOG_LEVEL, size=LOG_BUFFER_SIZE,
+                 path=LOG_FILE, echo=LOG_ECHO, rate_window=LOG_RATE_WINDOW):
+        self.target = target
+        self.level = self.LEVELS[level]
+        self.size = size
+        self.path = path
+        self.echo = echo
+        self.rate_window = rate_window
+        self.ring = deque(maxlen=size)  # Son kayıtlar (inceleme için)
+        self.pending = deque()          # Yazılmayı bekleyen kayıtlar
+        self.repeats = {}               # (olay, mesaj) -> [ilk zaman, bastırılan tekrar]
+        self.lock = Lock()
+        self.wake = Event()
+        self.idle = Event()
+        self.idle.set()
+        self.thread = None
+        self.writer = None
+        self.handler = None
+        self.written = 0
+        self.dropped = 0
+        self.suppressed = 0
+        self.subscribers = []           # Yazılan her kaydı alan çağrılar (denetim soketi)
+        self.reopen = False             # Hedef değişti: yazıcı sıradaki kayıtta yeniden açılır
+    
+    def configure(self, target=None, path=None):
+        """Hedefi değiştir (sunucu yapılandırması, simülatörün kitaplık dizini)"""
+        with self.lock:
+            if target is not None:
+                self.target = target
+            if path is not None:
+                self.path = path
+            self.reopen = True
+    
+    def log(self, level, event, message, **fields):
+        """Kaydı tampona ekle (bloklamaz)"""
+        levelno = self.LEVELS[level]
+        if levelno < self.level:
+            return
+        now = time.time()
+        with self.lock:
+            repeated = 0
+            if levelno >= self.LEVELS['warning']:
+                key = (event, message)
+                repeat = self.repeats.get(key)
+                if repeat and now - repeat[0] < self.rate_window:
+                    repeat[1] += 1
+                    self.suppressed += 1
+                    return
+                repeated = repeat[1] if repeat else 0
+                self.repeats[key] = [now, 0]
+                if len(self.repeats) > 256:
+                    self.repeats = {k: v for k, v in self.repeats.items()
+                                    if now - v[0] < self.rate_window}
+            
+            record = {'ts': now, 'level': level, 'event': event, 'msg': message, **fields}
+            if repeated:
+                record['repeated'] = repeated
+            self.ring.append(record)
+            if len(self.pending) >= self.size:
+                self.pending.popleft()
+                self.dropped += 1
+            self.pending.append(record)
+            self.idle.clear()
+            if self.thread is None:
+                self.thread = Thread(target=self._drain, name="kayit", daemon=True)
+                self.thread.start()
+        self.wake.set()
+    
+    def debug(self, event, message, **fields):
+        self.log('debug', event, message, **fields)
+    
+    def info(self, event, message, **fields):
+        self.log('info', event, message, **fields)
+    
+    def warning(self, event, message, **fields):
+        self.log('warning', event, message, **fields)
+    
+    def error(self, event, message, **fields):
+        self.log('error', event, message, **fields)
+    
+    def subscribe(self, callback):
+        """Yazılan her kaydı callback(record) ile bildir (yazıcı iş parçacığından)"""
+        with self.lock:
+            self.subscribers.append(callback)
+    
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+    
+    def recent(self, count=100):
+        """Halka tampondaki son kayıtlar"""
+        with self.lock:
+            return list(self.ring)[-count:]
+    
+    def detach(self):
+        """İşçi süreçte (ProcessPoolExecutor) çağrılır: kendi yazıcısıyla yeniden başla
+        
+        fork ile kopyalanan bekleyen kayıtlar ve yazıcı iş parçacığı bu
+        süreçte yoktur. Dönen kayıt dosyasını yalnızca ana süreç yazar;
+        işçi kayıtları journald'a, o yoksa konsola gider.
+        """
+        self.lock = Lock()
+        self.wake = Event()
+        self.idle = Event()
+        self.idle.set()
+        self.ring.clear()
+        self.pending.clear()
+        self.subscribers = []
+        self.thread = None
+        self.handler = None
+        if self.target != 'console':
+            self.target = 'journald' if journal is not None else 'console'
+    
+    def flush(self, timeout=None):
+        """Bekleyen kayıtlar yazılana kadar bekle (kapanışta)"""
+        return self.idle.wait(timeout)
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'written': self.written,
+                'pending': len(self.pending),
+                'dropped': self.dropped,
+                'suppressed': self.suppressed,
+            }
+    
+    def _open_writer(self):
+        """Hedefi aç: journald, dönen dosya ya da yalnızca konsol"""
+        target = self.target
+        if target == 'auto':
+            target = 'journald' if journal is not None else 'file'
+        if target == 'journald' and journal is not None:
+            return self._write_journald
+        if target == 'file':
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self.handler = logging.handlers.RotatingFileHandler(
+                    self.path, maxBytes=LOG_FILE_MAX_KB * 1024,
+                    backupCount=LOG_FILE_BACKUPS, encoding='utf-8')
+                return self._write_file
+            except OSError as e:
+                print(f"⚠️ Kayıt dosyası açılamadı, yalnızca konsola yazılacak: {e}")
+        return None
+    
+    def _write_journald(self, record):
+        fields = {k.upper(): str(v) for k, v in record.items()
+                  if k not in ('msg', 'ts', 'level')}
+        journal.send(record['msg'], PRIORITY=self.JOURNAL_PRIORITY[record['level']],
+                     SYSLOG_IDENTIFIER="braille-okuyucu", **fields)
+    
+    def _write_file(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        self.handler.emit(logging.makeLogRecord({'msg': line}))
+    
+    def _drain(self):
+        self.writer = self._open_writer()
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            while True:
+                with self.lock:
+                    if not self.pending:
+                        self.idle.set()
+                        break
+                    record = self.pending.popleft()
+                    reopen, self.reopen = self.reopen, False
+                if reopen:
+                    if self.handler:
+                        self.handler.close()
+                        self.handler = None
+                    self.writer = self._open_writer()
+                try:
+                    if self.echo:
+                        suffix = f" (son {self.rate_window:g}s içinde {record['repeated']} tekrar)" \
+                            if 'repeated' in record else ""
+                        print(f"{record['msg']}{suffix}")
+                    if self.writer:
+                        self.writer(record)
+                    self.written += 1
+                    for callback in list(self.subscribers):
+                        callback(record)
+                except Exception:
+                    pass  # Kayıt yazılamaması okuyucuyu durdurmamalı
+
+log = EventLog()
+
+# ==================== GERÇEK ZAMAN YALITIMI ====================
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+MCL_ONFAULT = 4  # Linux 4.4+: sayfalar önceden getirilmez, dokunuldukça kilitlenir
+
+class RealtimeIsolation:
+    """Solenoid ve ses iş parçacıklarını ağır işlerden yalıtan isteğe bağlı mod.
+    
+    Etkinleştirilince süreç (ve sonradan açılan tüm iş parçacıkları ile alt
+    süreçler: Piper, pdftotext, ön hazırlık işçileri) ayrılmış çekirdek
+    dışındaki çekirdeklere sabitlenir, bellek mlockall ile kilitlenir (sayfa
+    hatası gecikmesi olmaz). Zamanlama iş parçacıkları yalnızca zamanlamalı
+    çıktı süresince promote() ile ayrılmış çekirdeğe taşınıp SCHED_FIFO
+    önceliği alır; demote() iş parçacığını normal zamanlamaya ve diğer
+    çekirdeklere geri alır, ağır işler ayrıca daha düşük önceliğe iner.
+    Yetki yoksa her adım ayrı ayrı atlanır ve nedeni kaydedilir; mod
+    kapalıyken tüm çağrılar etkisizdir.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.reserved = None    # Ayrılmış çekirdek (tek çekirdekte None: yalnızca öncelik)
+        self.background = None  # Ayrılmış çekirdek dışındaki çekirdekler
+        self.mlocked = False
+        self.threads = {}       # Şu an yükseltilmiş "rol:iş parçacığı" -> uygulanan ayarlar
+        self.errors = []
+        self.lock = Lock()
+    
+    def enable(self, cpu=REALTIME_CPU):
+        """Modu aç - iş parçacıkları oluşturulmadan önce (açılışta) çağrılmalı"""
+        cpus = sorted(os.sched_getaffinity(0))
+        if cpu not in cpus:
+            cpu = cpus[-1]
+        self.enabled = True
+        self.background = set(cpus)
+        if len(cpus) > 1:
+            self.reserved = cpu
+            self.background.discard(cpu)
+            # Bu iş parçacığından doğan her şey kalan çekirdeklerde çalışır
+            os.sched_setaffinity(0, self.background)
+        else:
+            self._error("Tek çekirdek: ayrılmış çekirdek yok, yalnızca öncelik uygulanacak")
+        threading.stack_size(REALTIME_STACK_KB * 1024)
+        self.mlocked = self._mlockall()
+        core = f"çekirdek {self.reserved} ayrıldı" if self.reserved is not None else "ayrılmış çekirdek yok"
+        log.info('realtime', f"⏱️ Gerçek zaman modu: {core}, bellek kilidi {'var' if self.mlocked else 'yok'}",
+                 cpu=self.reserved, mlock=self.mlocked)
+    
+    def _mlockall(self):
+        """Mevcut ve gelecekteki sayfaları belleğe kilitle
+        
+        MCL_ONFAULT ile gelecekteki eşlemeler (kitap metni ve hücre akışı
+        mmap'leri) önceden okunmaz, yalnızca dokunulan sayfalar kilitlenir;
+        eşleme kapanınca kilit de kalkar. Çekirdek desteklemiyorsa tüm kitap
+        dosyalarını kilitlememek için yalnızca mevcut sayfalar kilitlenir.
+        """
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.mlockall(MCL_CURRENT | MCL_FUTURE | MCL_ONFAULT) == 0:
+                return True
+            if ctypes.get_errno() == errno.EINVAL and libc.mlockall(MCL_CURRENT) == 0:
+                self._error("MCL_ONFAULT desteklenmiyor: yalnızca açılıştaki bellek kilitlendi")
+                return True
+            self._error(f"mlockall başarısız: {os.strerror(ctypes.get_errno())} "
+                        f"(CAP_IPC_LOCK veya 'ulimit -l unlimited' gerekir)")
+        except (OSError, AttributeError) as e:
+            self._error(f"mlockall kullanılamıyor: {e}")
+        return False
+    
+    def promote(self, role):
+        """Çağıran iş parçacığını ayrılmış çekirdeğe sabitle ve SCHED_FIFO önceliği ver"""
+        if not self.enabled:
+            return
+        tid = threading.get_native_id()
+        applied = {'cpu': None, 'policy': 'normal'}
+        if self.reserved is not None:
+            try:
+                os.sched_setaffinity(tid, {self.reserved})
+                applied['cpu'] = self.reserved
+            except OSError as e:
+                self._error(f"{role}: çekirdeğe sabitlenemedi: {e}")
+        try:
+            os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(REALTIME_PRIORITY[role]))
+            applied['policy'] = 'fifo'
+        except OSError as e:
+            self._error(f"{role}: SCHED_FIFO verilemedi ({e}), normal öncelikle sürüyor")
+        with self.lock:
+            self.threads[f"{role}:{threading.current_thread().name}"] = applied
+    
+    def demote(self, nice=REALTIME_BACKGROUND_NICE):
+        """Çağıran iş parçacığını normal zamanlamaya ve ayrılmamış çekirdeklere al
+        
+        Yükseltilmiş bir iş parçacığından doğmuş olabilir; SCHED_FIFO ve
+        ayrılmış çekirdek açıkça geri alınır (alt süreçleri de devralır).
+        nice None ise nice değeri değiştirilmez.
+        """
+        if not self.enabled:
+            return
+        tid = threading.get_native_id()
+        try:
+            os.sched_setscheduler(tid, os.SCHED_OTHER, os.sched_param(0))
+        except OSError as e:
+            self._error(f"normal zamanlamaya dönülemedi: {e}")
+        if self.reserved is not None:
+            try:
+                os.sched_setaffinity(tid, self.background)
+            except OSError as e:
+                self._error(f"ayrılmış çekirdekten çıkılamadı: {e}")
+        if nice is not None:
+            try:
+                os.setpriority(os.PRIO_PROCESS, tid, nice)
+            except OSError as e:
+                self._error(f"nice ayarlanamadı: {e}")
+        suffix = f":{threading.current_thread().name}"
+        with self.lock:
+            for key in [key for key in self.threads if key.endswith(suffix)]:
+                del self.threads[key]
+    
+    @contextlib.contextmanager
+    def promoted(self, role):
+        """Yalnızca blok süresince promote(role); blokta alt süreç başlatılmamalı"""
+        self.promote(role)
+        try:
+            yield
+        finally:
+            self.demote(nice=None)
+    
+    def _error(self, message):
+        with self.lock:
+            if message in self.errors:
+                return
+            self.errors.append(message)
+        log.warning('realtime', f"⚠️ {message}")
+    
+    def stats(self):
+        with self.lock:
+            return {'enabled': self.enabled, 'reserved_cpu': self.reserved,
+                    'mlocked': self.mlocked, 'threads': dict(self.threads),
+                    'errors': list(self.errors)}
+
+realtime = RealtimeIsolation()
+
+def measure_jitter(seconds=5.0, period=0.005, role=None):
+    """period aralıklı uyanmaların gecikmesi (solenoid zamanlaması gibi), milisaniye"""
+    samples = []
+    
+    def run():
+        if role:
+            realtime.promote(role)
+        deadline = time.monotonic()
+        end = deadline + seconds
+        while deadline < end:
+            deadline += period
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            samples.append(time.monotonic() - deadline)
+    
+    thread = Thread(target=run, name=f"titreme-{role or 'normal'}")
+    thread.start()
+    thread.join()
+    ordered = sorted(samples)
+    ms = lambda value: round(value * 1000, 3)
+    return {'samples': len(ordered), 'median_ms': ms(ordered[len(ordered) // 2]),
+            'p99_ms': ms(ordered[int(len(ordered) * 0.99)]), 'max_ms': ms(ordered[-1])}
+
+def jitter_report(seconds=5.0):
+    """Tüm çekirdekler yüklüyken zamanlama titremesini mod kapalı ve açık ölç (--jitter)"""
+    def with_load(measure):
+        # Piper/pdftotext yerine geçen CPU yükü; mod açıkken ayrılmış çekirdeğe giremez
+        hogs = [subprocess.Popen([sys.executable, '-c', 'while True: pass'])
+                for _ in range(os.cpu_count() or 1)]
+        try:
+            return measure()
+        finally:
+            for hog in hogs:
+                hog.kill()
+                hog.wait()
+    
+    report = {'off': with_load(lambda: measure_jitter(seconds))}
+    realtime.enable()
+    report['on'] = with_load(lambda: measure_jitter(seconds, role='actuation'))
+    report['realtime'] = realtime.stats()
+    print(f"⏱️ Zamanlama titremesi (yük altında): {json.dumps(report, ensure_ascii=False)}")
+    return report
+
+# ==================== SES ÖNBELLEĞİ ====================
+class AudioCache:
+    """Sentezlenmiş WAV dosyalarının içerik anahtarlı önbelleği"""
+    
+    def __init__(self, cache_dir=AUDIO_CACHE_DIR, max_mb=AUDIO_CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.lock = Lock()
+        self.puts = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def key(self, text, length_scale):
+        """Metin, hız ve modelden önbellek anahtarı üret"""
+        raw = f"{PIPER_MODEL_PATH}|{length_scale:.3f}|{text}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    
+    def path(self, key):
+        return f"{self.cache_dir}/{key}.wav"
+    
+    def get(self, key):
+        """Önbellekteki WAV yolunu döndür (yoksa None)"""
+        path = self.path(key)
+        if os.path.exists(path):
+            self.hits += 1
+            try:
+                os.utime(path)  # Son kullanım zamanı (eviction için)
+            except OSError:
+                pass
+            return path
+        self.misses += 1
+        return None
+    
+    def put(self, key, wav_path):
+        """Geçici WAV dosyasını önbelleğe taşı"""
+        path = self.path(key)
+        os.replace(wav_path, path)
+        with self.lock:
+            self.puts += 1
+            if self.puts % 50 == 0:
+                self.trim()
+        return path
+    
+    def trim(self):
+        """Önbellek sınırı aşıldıysa en eski dosyaları sil"""
+        try:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                path = f"{self.cache_dir}/{name}"
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+        except OSError as e:
+            log.error('tts.cache', f"❌ Ses önbelleği temizleme hatası: {e}", dir=self.cache_dir)
+
+# ==================== PİPER İŞÇİ HAVUZU ====================
+class PiperWorkerPool:
+    """Oturumlar arasında paylaşılan Piper sentez havuzu.
+    
+    Her oturumun kendi kuyruğu vardır; işçiler kuyruklardan sırayla
+    (round-robin) iş alır, böylece uzun bir anlatım diğer oturumların
+    kısa komutlarını bekletmez. Aynı metin aynı anda birden fazla oturumdan
+    istenirse tek sentez yapılır.
+    """
+    
+    def __init__(self, workers=PIPER_WORKERS, cache=None):
+        self.cache = cache if cache is not None else AudioCache()
+        self.queues = {}          # session_id -> deque[(key, text, length_scale)]
+        self.ready = deque()      # Bekleyen işi olan oturumlar (sıra)
+        self.inflight = {}        # key -> Future
+        self.waiters = {}         # key -> aynı sentezi bekleyen istek sayısı (oturumlar, ön-getirme)
+        self.cond = threading.Condition()
+        self.running = True
+        self.max_workers = workers
+        self.limit = workers      # Aynı anda çalışabilecek işçi (kaynak yöneticisi düşürebilir)
+        self.busy = 0
+        self.prefetch_depth = 1   # Oturumların önden sentezlettiği blok sayısı
+        self.warm_range = NAV_PREFETCH_RANGE  # Gezinmede iki yanda adı ısıtılan kitap sayısı
+        self.threads = []
+        self.completed = 0
+        self.failed = 0
+        for _ in range(workers):
+            self._start_worker()
+    
+    def _start_worker(self):
+        t = Thread(target=self._worker, daemon=True)
+        self.threads.append(t)
+        t.start()
+    
+    def submit(self, session_id, text, length_scale=1.0):
+        """Sentez isteği gönder - WAV yolunu veren Future döndürür"""
+        key = self.cache.key(text, length_scale)
+        with self.cond:
+            if key in self.inflight:
+                self.waiters[key] += 1
+                return self.inflight[key]
+            
+            future = Future()
+            cached = self.cache.get(key)
+            if cached:
+                future.set_result(cached)
+                return future
+            
+            self.inflight[key] = future
+            self.waiters[key] = 1
+            queue = self.queues.setdefault(session_id, deque())
+            queue.append((key, text, length_scale))
+            if session_id not in self.ready:
+                self.ready.append(session_id)
+            self.cond.notify()
+            return future
+    
+    def _next_job(self):
+        """Sıradaki oturumdan bir iş al (cond kilidi altında çağrılır)"""
+        session_id = self.ready.popleft()
+        queue = self.queues[session_id]
+        job = queue.popleft()
+        if queue:
+            self.ready.append(session_id)
+        return job
+    
+    def _worker(self):
+        realtime.demote()  # Piper alt süreçleri bu önceliği devralır
+        while self.running:
+            with self.cond:
+                while self.running and (not self.ready or self.busy >= self.limit):
+                    self.cond.wait()
+                if not self.running:
+                    return
+                key, text, length_scale = self._next_job()
+                future = self.inflight[key]
+                self.busy += 1
+            
+            if future.set_running_or_notify_cancel():
+                try:
+                    wav_path = self.synthesize(text, length_scale)
+                    future.set_result(self.cache.put(key, wav_path))
+                    self.completed += 1
+                except Exception as e:
+                    self.failed += 1
+                    future.set_exception(e)
+            
+            with self.cond:
+                self.inflight.pop(key, None)
+                self.waiters.pop(key, None)
+                self.busy -= 1
+                self.cond.notify_all()
+    
+    def synthesize(self, text, length_scale):
+        """Piper ile metni geçici bir WAV dosyasına sentezle"""
+        # Önbellekle aynı dosya sisteminde: /tmp tmpfs olsa da put() taşıyabilsin (EXDEV)
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False,
+                                         dir=self.cache.cache_dir) as tmp_file:
+            wav_path = tmp_file.name
+        
+        # Hız ayarı için --length_scale kullanılır (1.0 normal, küçük = hızlı, büyük = yavaş)
+        cmd = [PIPER_BINARY_PATH, "--model", PIPER_MODEL_PATH,
+               "--output_file", wav_path, "--length_scale", str(length_scale)]
+        result = subprocess.run(cmd, input=text, capture_output=True,
+                                text=True, timeout=30)
+        
+        if result.returncode != 0:
+            if os.path.exists(wav_path):
+                os.remove(wav_path)
+            raise RuntimeError(f"Piper hatası: {result.stderr}")
+        return wav_path
+    
+    def withdraw(self, future):
+        """Henüz başlamamış sentezi kuyruktan çıkar (kesilen komut işçiyi meşgul etmesin)
+        
+        Aynı metni başka istekler de bekliyorsa (başka oturum, ön-getirme) yalnızca
+        bu isteğin payı düşülür; Future ancak son bekleyen çekilince iptal edilir.
+        """
+        with self.cond:
+            key = next((key for key, pending in self.inflight.items() if pending is future), None)
+            if key is None:
+                return False
+            if self.waiters.get(key, 1) > 1:
+                self.waiters[key] -= 1
+                return False
+            for session_id, queue in self.queues.items():
+                job = next((job for job in queue if job[0] == key), None)
+                if job is None:
+                    continue
+                queue.remove(job)
+                if not queue and session_id in self.ready:
+                    self.ready.remove(session_id)
+                del self.inflight[key]
+                del self.waiters[key]
+                future.cancel()
+                return True
+            return False  # Çalışıyor: sonucu önbelleğe girer
+    
+    def cached(self, text, length_scale=1.0):
+        """Önbellekte hazır WAV varsa yolunu döndür (istem önbelleği)"""
+        return self.cache.get(self.cache.key(text, length_scale))
+    
+    def set_limit(self, workers):
+        """Eş zamanlı sentez sayısını 1..max_workers aralığında ayarla"""
+        with self.cond:
+            self.limit = max(1, min(workers, self.max_workers))
+            self.cond.notify_all()
+    
+    def pending(self):
+        """Kuyrukta bekleyen iş sayısı"""
+        with self.cond:
+            return sum(len(q) for q in self.queues.values())
+    
+    def shutdown(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+# ==================== HIZLI TTS MOTORU ====================
+class EspeakEngine:
+    """espeak-ng ile anlık sentez - arayüz komutları ve yedek motor"""
+    
+    def __init__(self, binary=ESPEAK_BINARY, voice=ESPEAK_VOICE):
+        self.binary = binary
+        self.voice = voice
+        self.available = shutil.which(binary) is not None
+        if not self.available:
+            log.warning('tts.espeak', f"⚠️ {binary} bulunamadı, arayüz komutları da Piper ile seslendirilecek",
+                        binary=binary)
+    
+    def synthesize(self, text, speed=1.0):
+        """Geçici WAV dosyası üret ve yolunu döndür (silmek çağırana ait)"""
+        fd, wav_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            subprocess.run([self.binary, '-v', self.voice, '-s', str(int(ESPEAK_WPM * speed)),
+                            '-w', wav_path, '--stdin'],
+                           input=text.encode('utf-8'), capture_output=True, timeout=10, check=True)
+        except Exception:
+            os.remove(wav_path)
+            raise
+        return wav_path
+
+# ==================== KALICI SES ÇIKIŞI ====================
+class AudioClip:
+    """Ses çıkışı kuyruğundaki tek parça (PCM + biçim)"""
+    
+    def __init__(self, priority):
+        self.priority = priority
+        self.pcm = b""
+        self.fmt = None      # (örnekleme hızı, kanal, örnek genişliği)
+        self.offset = 0      # Çalınan bayt sayısı (kesilirse kaldığı yerden devam)
+        self.ready = Event()
+        self.done = Event()
+        self.cancelled = False
+        self.error = None
+        self.on_needed = None  # Sıra gelip hazır değilse bir kez çağrılır
+        self.requested_at = time.monotonic()  # Gecikme ölçümü: sıranın ayrıldığı an
+        self.needed_at = None  # İçerikte bütçenin başladığı an (sıra geldiğinde)
+        self.future = None     # Bekleyen Piper sentezi (komut kesilirse kuyruktan çekilir)
+    
+    def wait(self, timeout=None):
+        """Parça çalınıp bitene (veya iptal edilene) kadar bekle"""
+        return self.done.wait(timeout)
+
+class AudioSink:
+    """Tek, uzun ömürlü aplay sürecine PCM akıtan öncelikli ses çıkışı.
+    
+    Her öncelik sınıfının kendi sırası vardır. Yer sentezden önce ayrılır
+    (reserve), böylece parçalar sentez hangi sırayla biterse bitsin istenen
+    sırayla ve aralarında süreç başlatma boşluğu olmadan çalınır. Acil bir
+    parça hazır olduğunda çalan içerik blok sınırında kesilir, acil parça
+    çalınır ve içerik kaldığı yerden devam eder.
+    """
+    
+    def __init__(self, device=None):
+        self.device = device
+        self.queues = {PRIORITY_URGENT: deque(), PRIORITY_CONTENT: deque()}
+        self.cond = threading.Condition()
+        self.running = True
+        self.content_paused = False
+        self.process = None
+        self.process_fmt = None
+        
+        # İstatistikler
+        self.played = 0
+        self.underruns = 0
+        self.preemptions = 0
+        self.restarts = 0
+        self.starved = False
+        self.last_priority = None
+        self.play_until = 0.0  # Yazılan sesin çalınıp biteceği an (monotonic)
+        
+        self.thread = Thread(target=self._writer, daemon=True)
+        self.thread.start()
+    
+    # ---- Üretici tarafı ----
+    def reserve(self, priority):
+        """Kuyrukta sıra ayır; PCM daha sonra fill() ile verilir"""
+        clip = AudioClip(priority)
+        with self.cond:
+            self.queues[priority].append(clip)
+        return clip
+    
+    def fill(self, clip, pcm, fmt):
+        """Parçayı doldur - zaten doluysa (yedek motor kazandıysa) False döner"""
+        with self.cond:
+            if clip.ready.is_set() or clip.cancelled:
+                return False
+            clip.pcm = pcm
+            clip.fmt = fmt
+            clip.ready.set()
+            self.cond.notify_all()
+            return True
+    
+    def fill_wav(self, clip, wav_path):
+        """WAV dosyasını okuyup ayrılmış sıraya yerleştir"""
+        with wave.open(wav_path, 'rb') as wav:
+            fmt = (wav.getframerate(), wav.getnchannels(), wav.getsampwidth())
+            pcm = wav.readframes(wav.getnframes())
+        return self.fill(clip, pcm, fmt)
+    
+    def play_wav(self, wav_path, priority=PRIORITY_URGENT):
+        clip = self.reserve(priority)
+        try:
+            self.fill_wav(clip, wav_path)
+        except Exception as e:
+            clip.error = e
+            self.cancel(clip)
+        return clip
+    
+    def cancel(self, clip):
+        """Parçayı iptal et (çalıyorsa blok sınırında durur)"""
+        with self.cond:
+            clip.cancelled = True
+            queue = self.queues[clip.priority]
+            if clip in queue:
+                queue.remove(clip)
+            clip.done.set()
+            self.cond.notify_all()
+    
+    def cancel_all(self, priority):
+        """Bir öncelik sınıfındaki tüm parçaları iptal et - iptal edilenleri döndürür"""
+        with self.cond:
+            clips = list(self.queues[priority])
+        for clip in clips:
+            self.cancel(clip)
+        return clips
+    
+    def pause_content(self):
+        with self.cond:
+            self.content_paused = True
+    
+    def resume_content(self):
+        with self.cond:
+            self.content_paused = False
+            self.cond.notify_all()
+    
+    def stats(self):
+        """Kuyruk derinliği ve çalma istatistikleri"""
+        with self.cond:
+            return {
+                'urgent_depth': len(self.queues[PRIORITY_URGENT]),
+                'content_depth': len(self.queues[PRIORITY_CONTENT]),
+                'played': self.played,
+                'underruns': self.underruns,
+                'preemptions': self.preemptions,
+                'restarts': self.restarts,
+            }
+    
+    def shutdown(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self._stop_process()
+    
+    # ---- Yazıcı tarafı ----
+    def _select(self):
+        """Çalınacak sıradaki hazır parça (cond kilidi altında)"""
+        urgent = self.queues[PRIORITY_URGENT]
+        if urgent and urgent[0].ready.is_set():
+            return urgent[0]
+        content = self.queues[PRIORITY_CONTENT]
+        if content and not self.content_paused:
+            if content[0].ready.is_set():
+                self.starved = False
+                return content[0]
+            if content[0].on_needed:
+                # Gecikme bütçesi sıra geldiği andan itibaren sayılır
+                on_needed, content[0].on_needed = content[0].on_needed, None
+                on_needed()
+            # İçerik çalarken sıradaki blok henüz sentezlenmedi
+            if self.last_priority == PRIORITY_CONTENT and not self.starved:
+                self.starved = True
+                self.underruns += 1
+        return None
+    
+    def _writer(self):
+        realtime.promote('audio')  # aplay alt süreci de bu ayarları devralır
+        while True:
+            with self.cond:
+                clip = self._select()
+                while self.running and clip is None:
+                    self.cond.wait()
+                    clip = self._select()
+                if not self.running:
+                    return
+            self._play(clip)
+    
+    def _play(self, clip):
+        rate, channels, width = clip.fmt
+        frame = channels * width
+        block = max(frame, rate * AUDIO_BLOCK_MS // 1000 * frame)
+        
+        if not self._ensure_process(clip.fmt):
+            clip.error = RuntimeError("Ses çıkışı açılamadı")
+            self.cancel(clip)
+            return
+        
+        while clip.offset < len(clip.pcm):
+            with self.cond:
+                # Boruya önden ses yığma: iptal ve öne geçme AUDIO_LEAD_MS içinde duyulur
+                lead = self.play_until - time.monotonic() - AUDIO_LEAD_MS / 1000
+                while lead > 0 and self.running and not clip.cancelled:
+                    self.cond.wait(lead)
+                    lead = self.play_until - time.monotonic() - AUDIO_LEAD_MS / 1000
+                if clip.cancelled:
+                    return
+                if clip.priority == PRIORITY_CONTENT:
+                    if self.content_paused:
+                        return  # Parça sırada kalır, devam edince sürer
+                    urgent = self.queues[PRIORITY_URGENT]
+                    if urgent and urgent[0].ready.is_set():
+                        self.preemptions += 1
+                        return
+            
+            data = clip.pcm[clip.offset:clip.offset + block]
+            try:
+                self.process.stdin.write(data)
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                log.error('audio', f"❌ Ses çıkışı kesildi, yeniden açılıyor: {e}", device=self.device)
+                self._stop_process()
+                if not self._ensure_process(clip.fmt):
+                    break
+                continue
+            clip.offset += len(data)
+            self.play_until = max(self.play_until, time.monotonic()) + len(data) / (rate * frame)
+        
+        with self.cond:
+            self.last_priority = clip.priority
+            queue = self.queues[clip.priority]
+            if clip in queue:
+                queue.remove(clip)
+            self.played += 1
+            clip.done.set()
+    
+    def _ensure_process(self, fmt):
+        """Biçime uygun aplay süreci çalışıyor olsun"""
+        if self.process and self.process.poll() is None and self.process_fmt == fmt:
+            return True
+        if self.process:
+            self._stop_process()
+            self.restarts += 1
+        
+        rate, channels, width = fmt
+        sample_format = {1: 'U8', 2: 'S16_LE', 4: 'S32_LE'}[width]
+        cmd = ['aplay', '-q', '-t', 'raw', '-f', sample_format,
+               '-r', str(rate), '-c', str(channels),
+               '--buffer-time', str(2 * AUDIO_LEAD_MS * 1000)]
+        if self.device:
+            cmd += ['-D', self.device]
+        try:
+            self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL)
+            self.process_fmt = fmt
+            return True
+        except Exception as e:
+            log.error('audio', f"❌ Ses çıkışı açılamadı: {e}", device=self.device)
+            self.process = None
+            return False
+    
+    def _stop_process(self):
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except Exception:
+            process.kill()
+
+# ==================== PİPER TTS SES SİSTEMİ ====================
+class VoiceEngine:
+    def __init__(self, pool=None, session_id="default", audio_device=None):
+        self.session_id = session_id
+        self.audio_device = audio_device  # aplay -D (None = varsayılan cihaz)
+        self.setup()
+        self.pool = pool if pool is not None else PiperWorkerPool()
+        self.sink = AudioSink(audio_device)
+        self.fast = EspeakEngine()
+        self.latency = {route: deque(maxlen=100) for route in TTS_LATENCY_BUDGET}
+        self.fallbacks = {route: 0 for route in TTS_LATENCY_BUDGET}
+        self.content_started = False  # Anlatımın ilk bloğu bütçeden muaf (önünde çalacak ses yok)
+        self.warming = []             # Gezinme için ısıtılan sentezler (sonraki barge-in'de geri çekilir)
+    
+    def setup(self):
+        """Piper TTS sistemini kur"""
+        log.info('tts', "🔊 Piper TTS sistemi kuruluyor...")
+        
+        # Piper binary kontrolü
+        if not os.path.exists(PIPER_BINARY_PATH):
+            log.error('tts.piper', "\n".join([
+                "❌ Piper binary bulunamadı!",
+                "Lütfen şu komutla indirin:",
+                "  cd /home/pixel && mkdir -p piper",
+                "  cd /home/pixel/piper",
+                "  wget https://github.com/rhasspy/piper/releases/download/2023.12.06-09.23.38/piper_linux-arm64",
+                "  mv piper_linux-arm64 piper",
+                "  chmod +x piper"]), path=PIPER_BINARY_PATH)
+            raise FileNotFoundError("Piper binary bulunamadı")
+        
+        # Model kontrolü
+        if not os.path.exists(PIPER_MODEL_PATH):
+            log.error('tts.piper', "\n".join([
+                "❌ Piper modeli bulunamadı!",
+                "Lütfen şu komutla indirin:",
+                "  mkdir -p /home/pixel/piper_models",
+                "  cd /home/pixel/piper_models",
+                "  wget https://github.com/rhasspy/piper/releases/download/2023.12.06-09.23.38/tr_TR-rüştü-hoca-tts-high.onnx"]),
+                      path=PIPER_MODEL_PATH)
+            raise FileNotFoundError("Piper modeli bulunamadı")
+        
+        # Piper binary çalıştırılabilir mi kontrol et
+        try:
+            result = subprocess.run([PIPER_BINARY_PATH, "--help"], 
+                                   capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                log.info('tts.piper', "✅ Piper TTS kurulu ve hazır")
+            else:
+                log.error('tts.piper', f"❌ Piper binary çalışmıyor, çalıştırma izni verin:\n"
+                          f"  chmod +x {PIPER_BINARY_PATH}", path=PIPER_BINARY_PATH)
+                raise Exception("Piper binary çalışmıyor")
+        except Exception as e:
+            log.error('tts.piper', f"❌ Piper kontrol hatası: {e}")
+            raise
+    
+    def route(self, text, priority):
+        """Seslendirme sınıfı: arayüz komutları 'ui', kitap anlatımı (kısa olsa da) 'content'"""
+        return 'ui' if priority == PRIORITY_URGENT else 'content'
+    
+    def speak(self, text, wait=True, speed=1.0, priority=PRIORITY_URGENT):
+        """Metni seslendir - istem önbelleği, espeak-ng veya Piper (sınıfa göre)"""
+        # Türkçe metni hazırla
+        text = self.prepare_turkish_text(text)
+        
+        # Hız ayarı için --length_scale kullanılır (1.0 normal, küçük = hızlı, büyük = yavaş)
+        length_scale = 1.0 / speed  # speed > 1 ise daha hızlı
+        route = self.route(text, priority)
+        
+        log.info('tts', f"🔊 TTS [{route}]: '{text[:50]}...' (hız: {speed})",
+                 route=route, chars=len(text), speed=speed)
+        
+        # Sırayı hemen ayır: sentez ne zaman biterse bitsin bu sırada çalınır
+        clip = self.sink.reserve(priority)
+        
+        cached = self.pool.cached(text, length_scale)
+        if cached:
+            # Daha önce Piper ile seslendirilmiş komut: anında çal
+            self._fill_from(clip, route, lambda: self.sink.fill_wav(clip, cached))
+        elif route == 'ui' and self.fast.available:
+            # espeak-ng çağıranın iş parçacığında (kilit tutan tuş işleyicisi) çalışmaz
+            Thread(target=self._speak_fast, args=(clip, text, speed, route, length_scale),
+                   name="espeak", daemon=True).start()
+        else:
+            self._speak_piper(clip, text, speed, route, length_scale)
+        
+        if wait:
+            clip.wait()
+            if clip.error:
+                # Hata durumunda sessiz bekle
+                time.sleep(len(text) / (SPEECH_CHARS_PER_SECOND * speed))
+        return clip
+    
+    def _speak_fast(self, clip, text, speed, route, length_scale):
+        """Arayüz komutunu espeak-ng ile seslendir; olmazsa Piper'a bırak"""
+        if clip.cancelled:
+            return
+        if self._fill_fast(clip, text, speed, route):
+            if self.pool.pending() == 0:
+                # Boştayken Piper ile önbelleği ısıt: sonraki seferde doğal ses
+                self.pool.submit(self.session_id, text, length_scale)
+            return
+        self._speak_piper(clip, text, speed, route, length_scale)
+    
+    def _speak_piper(self, clip, text, speed, route, length_scale):
+        """Piper ile sentezlet; gecikirse bütçe dolunca espeak-ng'ye geçilir"""
+        future = clip.future = self.pool.submit(self.session_id, text, length_scale)
+        future.add_done_callback(lambda f: self._fill_clip(clip, f, text, speed, route))
+        if route == 'ui':
+            self._arm_fallback(clip, text, speed, route)
+        elif self.content_started:
+            clip.on_needed = lambda: self._arm_fallback(clip, text, speed, route)
+        else:
+            # İlk blok kuyruğun başına hemen gelir; uzun bir bloğu Piper bütçe
+            # içinde bitiremez ve her kitap espeak-ng ile başlardı. Sonraki
+            # bloklar önceki çalarken sentezlendiğinden bütçe onlar için anlamlı.
+            self.content_started = True
+    
+    def _fill_from(self, clip, route, fill):
+        """Parçayı doldur ve istekten (veya sıra gelmesinden) hazır olana kadar geçen süreyi kaydet"""
+        if fill():
+            start = clip.needed_at or clip.requested_at
+            self.latency[route].append(time.monotonic() - start)
+            return True
+        return False
+    
+    def _fill_fast(self, clip, text, speed, route):
+        """espeak-ng ile sentezle ve parçayı doldur"""
+        try:
+            wav_path = self.fast.synthesize(text, speed)
+        except Exception as e:
+            log.error('tts.espeak', f"❌ espeak-ng seslendirme hatası: {e}")
+            return False
+        try:
+            return self._fill_from(clip, route, lambda: self.sink.fill_wav(clip, wav_path))
+        finally:
+            os.remove(wav_path)
+    
+    def _arm_fallback(self, clip, text, speed, route):
+        """Bütçe dolana kadar Piper bitmezse hızlı motora geç"""
+        if not self.fast.available or clip.ready.is_set():
+            return
+        clip.needed_at = time.monotonic()
+        timer = threading.Timer(TTS_LATENCY_BUDGET[route], self._fallback, (clip, text, speed, route))
+        timer.daemon = True
+        timer.start()
+    
+    def _fallback(self, clip, text, speed, route):
+        if clip.ready.is_set() or clip.cancelled:
+            return
+        if self._fill_fast(clip, text, speed, route):
+            self.fallbacks[route] += 1
+            log.warning('tts.fallback',
+                        f"⚡ Piper {TTS_LATENCY_BUDGET[route]}s bütçeyi aştı, espeak-ng ile seslendirildi",
+                        route=route)
+    
+    def _fill_clip(self, clip, future, text, speed, route):
+        """Sentez bitince WAV'ı ayrılan sıraya yerleştir"""
+        if clip.cancelled:
+            return  # Komut kesildi (barge-in): yedek motora gerek yok
+        try:
+            self._fill_from(clip, route, lambda: self.sink.fill_wav(clip, future.result()))
+        except Exception as e:
+            log.error('tts.piper', f"❌ Piper seslendirme hatası: {e}")
+            if self.fast.available and self._fill_fast(clip, text, speed, route):
+                self.fallbacks[route] += 1
+                return
+            clip.error = e
+            self.sink.cancel(clip)
+    
+    def tts_stats(self):
+        """Sınıf başına gecikme (ortanca/en kötü) ve yedek motora düşme sayısı"""
+        stats = {}
+        for route, samples in self.latency.items():
+            ordered = sorted(samples)
+            stats[route] = {
+                'count': len(ordered),
+                'median': ordered[len(ordered) // 2] if ordered else None,
+                'worst': ordered[-1] if ordered else None,
+                'fallbacks': self.fallbacks[route],
+            }
+        return stats
+    
+    def play_file(self, path, wait=True, priority=PRIORITY_CONTENT):
+        """Sıkıştırılmış (FLAC/Opus) ses dosyasını çözüp ses çıkışına ver"""
+        if path.endswith('.opus'):
+            decode_cmd = ['opusdec', '--quiet', '--force-wav', path, '-']
+        else:
+            decode_cmd = ['flac', '-d', '-c', '-s', path]
+        
+        try:
+            result = subprocess.run(decode_cmd, capture_output=True, timeout=60, check=True)
+            with wave.open(io.BytesIO(result.stdout), 'rb') as wav:
+                fmt = (wav.getframerate(), wav.getnchannels(), wav.getsampwidth())
+                pcm = wav.readframes(wav.getnframes())
+        except Exception as e:
+            log.error('audio.decode', f"❌ Ses dosyası çözme hatası: {e}", path=path)
+            return None
+        
+        clip = self.sink.reserve(priority)
+        self.sink.fill(clip, pcm, fmt)
+        if wait:
+            clip.wait()
+        return clip
+    
+    def speak_async(self, text, speed=1.0, priority=PRIORITY_URGENT):
+        """Asenkron seslendirme"""
+        return self.speak(text, False, speed, priority)
+    
+    def prefetch(self, text, speed=1.0, priority=PRIORITY_CONTENT):
+        """Çalmadan önce sentezlet: Piper sınıfı metinler (veya havuz boştayken) önbelleğe"""
+        if self.route(text, priority) == 'content' or self.pool.pending() == 0:
+            self._synthesize_ahead(text, speed)
+    
+    def warm(self, text, speed=1.0):
+        """Metni her durumda Piper ile önbelleğe sentezlet (yakında istenecek komutlar)
+        
+        Gezinme içindir: sonraki tuş basışında (interrupt) henüz başlamamışsa
+        geri çekilir, yerine yeni komşular ısıtılır.
+        """
+        future = self._synthesize_ahead(text, speed)
+        if future is not None:
+            self.warming.append(future)
+    
+    def _synthesize_ahead(self, text, speed):
+        text = self.prepare_turkish_text(text)
+        if text and not self.pool.cached(text, 1.0 / speed):
+            return self.pool.submit(self.session_id, text, 1.0 / speed)
+        return None
+    
+    def interrupt(self):
+        """Barge-in: çalan ve sıradaki tüm arayüz komutlarını kes, bekleyen sentezlerini geri çek"""
+        for clip in self.sink.cancel_all(PRIORITY_URGENT):
+            if clip.future is not None:
+                self.pool.withdraw(clip.future)
+        warming, self.warming = self.warming, []
+        for future in warming:
+            self.pool.withdraw(future)
+    
+    def stop_content(self):
+        """Sıradaki ve çalan tüm içerik anlatımını iptal et"""
+        self.content_started = False
+        self.sink.resume_content()
+        self.sink.cancel_all(PRIORITY_CONTENT)
+    
+    def prepare_turkish_text(self, text):
+        """Türkçe metni Piper TTS için hazırla"""
+        # Piper Türkçe modeli Türkçe karakterleri destekler
+        # Metin stdin ile verildiği için kaçış gerekmez, satır sonlarını kaldır
+        text = text.replace('\n', ' ').replace('\r', ' ')
+        text = ' '.join(text.split())  # Fazla boşlukları temizle
+        return text
+
+# ==================== SAAT ====================
+class SystemClock:
+    """Gerçek zaman - okuyucudaki tüm bekleme ve zaman ölçümleri bu arayüzden geçer"""
+    
+    def time(self):
+        return time.time()
+    
+    def monotonic(self):
+        return time.monotonic()
+    
+    def sleep(self, seconds):
+        time.sleep(seconds)
+    
+    def wait(self, cond, timeout=None):
+        """Koşul değişkeninde bekle (cond kilidi tutularak çağrılır)"""
+        return cond.wait(timeout)
+    
+    def spawn(self, target, name):
+        """Saate bağlı iş parçacığı başlat"""
+        thread = Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
+    
+    def join(self, thread, timeout=None):
+        thread.join(timeout)
+
+SYSTEM_CLOCK = SystemClock()
+
+class VirtualClock:
+    """Sanal zaman - saatlerce sürecek okuma oturumlarını saniyeler içinde çalıştırır.
+    
+    Zaman yalnızca bekleyince ilerler. Saate bağlı iş parçacıkları
+    (spawn() ile başlatılan veya actor() içinde çalışan) aktör sayılır; hepsi
+    saatte beklerken zaman en yakın uyanma anına atlar. Böylece sonuç
+    makinenin hızından bağımsızdır ve aynı betik her seferinde aynı sırayı
+    üretir. Kilit veya kuyruk beklemeleri gerçek kalır: bir aktör başka bir
+    iş parçacığını beklerken zaman durur.
+    """
+    EPOCH = 1_700_000_000.0  # time() için sabit başlangıç (duvar saati)
+    
+    def __init__(self, start=0.0):
+        self.now = start
+        self.cond = threading.Condition()
+        self.actors = 0        # Saate bağlı iş parçacığı sayısı
+        self.blocked = 0       # Bunlardan saatte bekleyenler
+        self.sleepers = []     # heap: [uyanma anı, sıra, aktör mü]
+        self.sequence = 0
+        self.local = threading.local()
+    
+    def time(self):
+        return self.EPOCH + self.now
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleep_until(self.now + max(0.0, seconds))
+    
+    def sleep_until(self, deadline):
+        """Sanal zaman deadline anına gelene kadar bekle"""
+        with self.cond:
+            if deadline <= self.now:
+                return
+            actor = getattr(self.local, 'actor', False)
+            self.sequence += 1
+            heapq.heappush(self.sleepers, [deadline, self.sequence, actor])
+            if actor:
+                self.blocked += 1
+            self._advance()
+            while self.now < deadline:
+                self.cond.wait()
+    
+    def wait(self, cond, timeout=None):
+        """Koşul değişkeni beklemesi: kilidi bırakıp sanal zamanda uyu (uyanış yoklanır)"""
+        cond.release()
+        try:
+            self.sleep(SIM_POLL_INTERVAL if timeout is None else timeout)
+        finally:
+            cond.acquire()
+        return True
+    
+    def spawn(self, target, name):
+        """Aktör iş parçacığı başlat: sayım başlatan tarafta yapılır, arada zaman kaçmaz"""
+        with self.cond:
+            self.actors += 1
+        
+        def run():
+            self.local.actor = True
+            try:
+                target()
+            finally:
+                self._leave()
+        
+        thread = Thread(target=run, name=name, daemon=True)
+        thread.start()
+        return thread
+    
+    def join(self, thread, timeout=None):
+        """İş parçacığının bitmesini bekle; beklerken bu aktör zamanı tutmaz"""
+        actor = getattr(self.local, 'actor', False)
+        if actor:
+            with self.cond:
+                self.blocked += 1
+                self._advance()
+        try:
+            thread.join(timeout)
+        finally:
+            if actor:
+                with self.cond:
+                    self.blocked -= 1
+    
+    @contextlib.contextmanager
+    def actor(self):
+        """Çağıran iş parçacığını blok süresince aktör yap (with ile)"""
+        self.local.actor = True
+        with self.cond:
+            self.actors += 1
+        try:
+            yield self
+        finally:
+            self._leave()
+    
+    def _leave(self):
+        self.local.actor = False
+        with self.cond:
+            self.actors -= 1
+            self._advance()
+    
+    def _advance(self):
+        """Tüm aktörler bekliyorsa zamanı en yakın uyanma anına atlat (cond kilidi altında)"""
+        if self.blocked < self.actors or not self.sleepers:
+            return
+        self.now = max(self.now, self.sleepers[0][0])
+        while self.sleepers and self.sleepers[0][0] <= self.now:
+            _, _, actor = heapq.heappop(self.sleepers)
+            if actor:
+                self.blocked -= 1
+        self.cond.notify_all()
+
+# ==================== GPIO AYARLARI ====================
+class GPIOPins:
+    # Röle Pinleri (6 solenoid için)
+    RELAY_PINS = [4, 17, 27, 22, 23, 24]
+    
+    # Buton Pinleri
+    BUTTON_NEXT = 5        # Sonraki kitap
+    BUTTON_CONFIRM = 6     # Onay/Seçim
+    BUTTON_MODE = 13       # Mod değiştirme
+    BUTTON_SPEED_UP = 19   # Hız artırma
+    BUTTON_SPEED_DOWN = 26 # Hız azaltma
+    BUTTON_UPDATE = 21     # Kitapları güncelle
+    
+    ALL_BUTTONS = [BUTTON_NEXT, BUTTON_CONFIRM, BUTTON_MODE, 
+                   BUTTON_SPEED_UP, BUTTON_SPEED_DOWN, BUTTON_UPDATE]
+    BUTTON_NAMES = ["BUTTON_NEXT", "BUTTON_CONFIRM", "BUTTON_MODE",
+                    "BUTTON_SPEED_UP", "BUTTON_SPEED_DOWN", "BUTTON_UPDATE"]
+    
+    def __init__(self, relay_pins=None, buttons=None):
+        """Oturuma özel pin haritası (varsayılanların üzerine yazar)"""
+        if relay_pins:
+            self.RELAY_PINS = list(relay_pins)
+        for name, pin in (buttons or {}).items():
+            if not hasattr(GPIOPins, name):
+                raise ValueError(f"Bilinmeyen buton: {name}")
+            setattr(self, name, pin)
+        self.ALL_BUTTONS = [self.BUTTON_NEXT, self.BUTTON_CONFIRM, self.BUTTON_MODE,
+                            self.BUTTON_SPEED_UP, self.BUTTON_SPEED_DOWN, self.BUTTON_UPDATE]
+
+class SimulatedGPIO:
+    """RPi.GPIO ile aynı arayüze sahip simüle GPIO - donanımsız testler için
+    
+    Röle pinlerindeki her değişiklik (zaman, pin, değer) olarak kaydedilir,
+    buton durumları press()/release() ile dışarıdan verilir.
+    """
+    BCM = 11
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_UP = 22
+    
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.states = {}
+        self.modes = {}
+        self.edges = []
+        self.lock = Lock()
+    
+    def setmode(self, mode):
+        pass
+    
+    def setwarnings(self, flag):
+        pass
+    
+    def setup(self, pin, mode, pull_up_down=None):
+        self.modes[pin] = mode
+        self.states[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+    
+    def output(self, pin, value):
+        with self.lock:
+            if self.states.get(pin) != value:
+                self.edges.append((self.clock.monotonic(), pin, value))
+            self.states[pin] = value
+    
+    def input(self, pin):
+        return self.states.get(pin, self.HIGH)
+    
+    def cleanup(self, pins=None):
+        for pin in (pins if pins is not None else list(self.states)):
+            self.states.pop(pin, None)
+            self.modes.pop(pin, None)
+    
+    def press(self, pin):
+        """Butona bas (aktif düşük)"""
+        self.states[pin] = self.LOW
+    
+    def release(self, pin):
+        """Butonu bırak"""
+        self.states[pin] = self.HIGH
+    
+    class PWM:
+        def __init__(self, pin, frequency):
+            self.pin = pin
+            self.duty = 0
+        
+        def start(self, duty):
+            self.duty = duty
+        
+        def ChangeDutyCycle(self, duty):
+            self.duty = duty
+        
+        def stop(self):
+            self.duty = 0
+
+# ==================== SOLENOİD ISI MODELİ ====================
+class SolenoidThermalModel:
+    """Solenoid başına görev döngüsü ve ısı modeli.
+
+    Her bobinin ısısı "tam akım-saniye" biriminde tutulur: tam akımda geçen
+    her saniye 1 birim ekler, tutma seviyesinde görev oranı kadar ekler.
+    Isı zamanla üstel olarak soğur. Her hücre için, aktif bobinlerin hiçbiri
+    sınırı aşmayacak şekilde en kısa bekleme hesaplanır.
+    """
+
+    def __init__(self, count=6, heat_limit=SOLENOID_HEAT_LIMIT,
+                 cooling_tau=SOLENOID_COOLING_TAU,
+                 hold_supported=SOLENOID_HOLD_SUPPORTED,
+                 hold_duty=SOLENOID_HOLD_DUTY, clock=None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.count = count
+        self.heat_limit = heat_limit
+        self.cooling_tau = cooling_tau
+        self.hold_supported = hold_supported
+        # Tutma sırasında harcanan güç (tam akıma oranla)
+        self.hold_power = hold_duty / 100.0 if hold_supported else 1.0
+        self.heat = [0.0] * count
+        self.on_time = [0.0] * count
+        self.cells = 0
+        self.cooling_wait_total = 0.0
+        self.last_update = self.clock.monotonic()
+        self.lock = Lock()
+
+    def _cool(self, now):
+        """Isıyı verilen ana kadar soğut"""
+        elapsed = now - self.last_update
+        if elapsed <= 0:
+            return
+        factor = math.exp(-elapsed / self.cooling_tau)
+        self.heat = [h * factor for h in self.heat]
+        self.last_update = now
+
+    def cell_heat(self, pull_in, hold, full_current=False):
+        """Tek bir hücrenin bobin başına eklediği ısı"""
+        return pull_in + hold * (1.0 if full_current else self.hold_power)
+
+    def plan_cell(self, pattern, pull_in, on_time, now=None, full_current=False):
+        """Hücre için en hızlı güvenli zamanlamayı hesapla: (bekleme, çekme, tutma)
+        
+        full_current: tutma PWM'siz, tam akımla yapılacak (sürücü desteklese de)
+        """
+        if now is None:
+            now = self.clock.monotonic()
+
+        pull_in = min(pull_in, on_time)
+        hold = max(SOLENOID_MIN_HOLD_TIME, on_time - pull_in)
+
+        # Tek hücre sınırın yarısını geçmesin (aşırı uzun tutma); tutma yine de
+        # hissedilecek en kısa sürenin altına inmez, fazlası beklemeyle ödenir
+        max_added = self.heat_limit * 0.5
+        power = 1.0 if full_current else self.hold_power
+        if self.cell_heat(pull_in, hold, full_current) > max_added:
+            hold = max(SOLENOID_MIN_HOLD_TIME, (max_added - pull_in) / power)
+        added = self.cell_heat(pull_in, hold, full_current)
+        # Hücre tek başına sınırı aşıyorsa (çekme süresi çok uzun) en fazla
+        # bobin neredeyse tamamen soğuyana kadar beklenir
+        room = max(self.heat_limit - added, self.heat_limit * 0.01)
+
+        wait = 0.0
+        with self.lock:
+            self._cool(now)
+            for i, state in enumerate(pattern[:self.count]):
+                if state and self.heat[i] > room:
+                    # heat * exp(-wait / tau) = room
+                    wait = max(wait, self.cooling_tau * math.log(self.heat[i] / room))
+        return wait, pull_in, hold
+
+    def record_cell(self, pattern, pull_in, hold, now=None):
+        """Gerçekten yazılan hücreyi modele işle"""
+        if now is None:
+            now = self.clock.monotonic()
+
+        added = self.cell_heat(pull_in, hold)
+        with self.lock:
+            self._cool(now)
+            for i, state in enumerate(pattern[:self.count]):
+                if state:
+                    self.heat[i] += added
+                    self.on_time[i] += pull_in + hold
+            self.cells += 1
+
+    def record_wait(self, wait):
+        """Soğuma için yapılan beklemeyi kaydet"""
+        with self.lock:
+            self.cooling_wait_total += wait
+
+    def stats(self):
+        """Bobin yükleri ve toplam soğuma beklemesi"""
+        with self.lock:
+            self._cool(self.clock.monotonic())
+            return {
+                'load': [round(h / self.heat_limit, 3) for h in self.heat],
+                'on_time': [round(t, 2) for t in self.on_time],
+                'cells': self.cells,
+                'cooling_wait': round(self.cooling_wait_total, 2),
+            }
+
+# ==================== DMA DALGA BİÇİMİ (pigpio) ====================
+WavePulse = namedtuple('WavePulse', 'gpio_on gpio_off delay')  # pigpio.pulse ile aynı alanlar
+
+class MockPigpio:
+    """pigpio.pi yerine geçen sahte - donanımsız testler için
+    
+    Oluşturulan dalga biçimlerini saklar, gönderilenleri sent listesine
+    kaydeder ve süresi boyunca wave_tx_busy() ile meşgul görünür.
+    """
+    OUTPUT = 1
+    
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.connected = True
+        self.modes = {}
+        self.levels = {}
+        self.pulses = []
+        self.waves = {}
+        self.next_id = 0
+        self.sent = []
+        self.tx_end = 0.0
+        self.stopped = 0
+    
+    def set_mode(self, pin, mode):
+        self.modes[pin] = mode
+    
+    def write(self, pin, level):
+        self.levels[pin] = level
+    
+    def wave_clear(self):
+        self.pulses = []
+        self.waves = {}
+    
+    def wave_get_max_pulses(self):
+        return 12000
+    
+    def wave_get_max_cbs(self):
+        return 25016
+    
+    def wave_add_generic(self, pulses):
+        self.pulses.extend(pulses)
+        return len(self.pulses)
+    
+    def wave_create(self):
+        # pigpio gibi: sınırı aşan dalga oluşturulamaz
+        if (len(self.pulses) > self.wave_get_max_pulses() or
+                len(self.pulses) * WAVE_CBS_PER_PULSE > self.wave_get_max_cbs()):
+            self.pulses = []
+            raise RuntimeError("dalga çok uzun (PI_TOO_MANY_PULSES/PI_TOO_MANY_CBS)")
+        wave_id = self.next_id
+        self.next_id += 1
+        self.waves[wave_id] = self.pulses
+        self.pulses = []
+        return wave_id
+    
+    def wave_send_once(self, wave_id):
+        pulses = self.waves[wave_id]
+        self.sent.append(pulses)
+        self.tx_end = self.clock.monotonic() + sum(p.delay for p in pulses) / 1e6
+        return len(pulses)
+    
+    def wave_tx_busy(self):
+        return 1 if self.clock.monotonic() < self.tx_end else 0
+    
+    def wave_tx_stop(self):
+        if self.wave_tx_busy():
+            self.stopped += 1
+        self.tx_end = 0.0
+    
+    def wave_delete(self, wave_id):
+        self.waves.pop(wave_id, None)
+    
+    def stop(self):
+        self.connected = False
+
+class PigpioWaveActuator:
+    """Hücre dizisini pigpio DMA dalga biçimi olarak donanım zamanlamasıyla yaz.
+    
+    Bir kelimenin (veya satır parçasının) her hücresi ısı modeline göre
+    planlanır: soğuma beklemesi, tam akım çekme darbesi, tutma (sürücü
+    destekliyorsa PWM ile) ve iniş + harf arası boşluk. Tüm darbeler tek
+    dalga biçimine derlenip tek çağrıda gönderilir; zamanlama mikrosaniye
+    hassasiyetindedir ve CPU gerektirmez. Durdurma/duraklatma istenince
+    dalga hemen kesilir, röleler bırakılır ve yazılan hücre sayısı döner.
+    Isı modeli derleme anında işlenir; kesilen hücreler de yazılmış
+    sayılır (model ihtiyatlı tarafta kalır).
+    """
+    
+    def __init__(self, pi, relay_pins, model, clock=None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.pi = pi
+        self.relay_pins = list(relay_pins)
+        self.model = model
+        self.all_mask = sum(1 << pin for pin in self.relay_pins)
+        self.pulse = pigpio.pulse if pigpio is not None and not isinstance(pi, MockPigpio) else WavePulse
+        # Dalga başına darbe bütçesi: darbe sayısı ve DMA denetim blokları sınırı
+        self.max_pulses = min(pi.wave_get_max_pulses(), pi.wave_get_max_cbs() // WAVE_CBS_PER_PULSE)
+        self.single_level_holds = 0  # PWM'i dalgaya sığmadığı için tam akımla tutulan hücreler
+        self.waves_sent = 0
+        self.aborted = 0
+        self.stopped_at = None    # Süren dalganın kesildiği an (başka iş parçacığından da)
+        for pin in self.relay_pins:
+            pi.set_mode(pin, 1)  # pigpio.OUTPUT
+            pi.write(pin, 0)
+        pi.wave_clear()
+    
+    def _mask(self, pattern):
+        return sum(1 << pin for pin, dot in zip(self.relay_pins, pattern) if dot)
+    
+    def compile_cell(self, pattern, up_time, on_time, gap, start):
+        """Tek hücrenin darbeleri ve süresi (start: planlanan başlangıç, monotonic)"""
+        us = lambda seconds: max(1, int(seconds * 1e6))
+        if pattern is None:
+            # Bilinmeyen karakter: yazılmaz, karakter süresi kadar boşluk
+            return [self.pulse(0, self.all_mask, us(on_time))], on_time
+        
+        pulses = []
+        on = self._mask(pattern)
+        period = 1.0 / SOLENOID_PWM_FREQ
+        wait, pull_in, hold = self.model.plan_cell(pattern, up_time, on_time, now=start)
+        cycles = max(1, int(hold / period))
+        pwm = hold > 0 and on and self.model.hold_supported
+        if pwm and 2 * cycles + 3 > self.max_pulses:
+            # Uzun tutmanın PWM darbeleri (ms başına 2) DMA denetim bloklarına
+            # sığmaz: tek seviyede, tam akımla tut ve ısıyı buna göre planla
+            pwm = False
+            self.single_level_holds += 1
+            log.warning('actuator', "⚠️ Tutma PWM'i dalga sınırını aşıyor, tam akımla tutuluyor",
+                        hold=round(hold, 3), pulses=2 * cycles, limit=self.max_pulses)
+            wait, pull_in, hold = self.model.plan_cell(pattern, up_time, on_time, now=start,
+                                                       full_current=True)
+        if wait > 0:
+            self.model.record_wait(wait)
+            pulses.append(self.pulse(0, self.all_mask, us(wait)))
+        
+        pulses.append(self.pulse(on, self.all_mask & ~on, us(pull_in)))  # Çekme darbesi
+        if pwm:
+            # Düşük akımla tutma: dalga içinde PWM
+            high = period * SOLENOID_HOLD_DUTY / 100.0
+            for _ in range(cycles):
+                pulses.append(self.pulse(0, on, us(period - high)))
+                pulses.append(self.pulse(on, 0, us(high)))
+            self.model.record_cell(pattern, pull_in, hold, now=start + wait + pull_in + hold)
+        else:
+            if hold > 0:
+                pulses.append(self.pulse(0, 0, us(hold)))  # Tam akımla tut
+            self.model.record_cell(pattern, pull_in + hold, 0.0, now=start + wait + pull_in + hold)
+        pulses.append(self.pulse(0, self.all_mask, us(gap)))  # İniş + harf arası
+        
+        return pulses, wait + pull_in + hold + gap
+    
+    def write(self, cells, up_time, on_time, gap, should_abort):
+        """Hücreleri (None: bilinmeyen karakter) dalga biçimleri halinde yaz, tamamlananları say"""
+        written = 0
+        clock = self.clock.monotonic()  # Dalgalar art arda gönderilir: plan bu andan sürer
+        carry = None              # Önceki dalgaya sığmayan (planlanmış) hücre
+        while written < len(cells):
+            if should_abort():
+                break
+            # Darbe sınırına sığan kadar hücreyi tek dalgada topla
+            pulses, ends, elapsed = [], [], 0.0
+            index = written
+            while index < len(cells) and len(ends) < WAVE_MAX_CELLS:
+                cell, duration = carry or self.compile_cell(
+                    cells[index], up_time, on_time, gap, clock + elapsed)
+                carry = None
+                if pulses and len(pulses) + len(cell) > self.max_pulses:
+                    carry = (cell, duration)
+                    break
+                pulses.extend(cell)
+                elapsed += duration
+                ends.append(elapsed)
+                index += 1
+            
+            done = self.send(pulses, ends, should_abort)
+            written += done
+            if done < len(ends):
+                break
+            clock = self.clock.monotonic()
+        return written
+    
+    def send(self, pulses, ends, should_abort):
+        """Dalgayı gönder ve bitmesini bekle; kesilirse biten hücre sayısını döndür"""
+        self.pi.wave_add_generic(pulses)
+        wave_id = self.pi.wave_create()
+        try:
+            self.stopped_at = None
+            sent_at = self.clock.monotonic()
+            self.pi.wave_send_once(wave_id)
+            self.waves_sent += 1
+            while self.pi.wave_tx_busy():
+                if should_abort():
+                    self.abort()
+                    break
+                self.clock.sleep(WAVE_POLL_INTERVAL)
+            if self.stopped_at is not None:
+                # Kesildi (burada veya duraklatmada toggle_pause'dan): yalnızca bitenler yazıldı
+                return bisect.bisect_right(ends, self.stopped_at - sent_at)
+            return len(ends)
+        finally:
+            self.pi.wave_delete(wave_id)
+    
+    def abort(self):
+        """Gönderilen dalgayı kes ve tüm röleleri bırak"""
+        if self.pi.wave_tx_busy():
+            self.aborted += 1
+            self.stopped_at = self.clock.monotonic()
+        self.pi.wave_tx_stop()
+        for pin in self.relay_pins:
+            self.pi.write(pin, 0)
+    
+    def stats(self):
+        return {'waves': self.waves_sent, 'aborted': self.aborted,
+                'single_level_holds': self.single_level_holds}
+
+def connect_wave_actuator(kind, relay_pins, model, clock=None):
+    """Yapılandırmaya göre DMA dalga sürücüsü oluştur (yoksa None: yazılım zamanlaması)"""
+    if kind == 'mock':
+        return PigpioWaveActuator(MockPigpio(clock), relay_pins, model, clock)
+    if kind != 'pigpio':
+        return None
+    if pigpio is None:
+        log.warning('actuator', "⚠️ pigpio modülü yok, yazılım zamanlaması kullanılacak")
+        return None
+    pi = pigpio.pi()
+    if not pi.connected:
+        log.warning('actuator', "⚠️ pigpiod'a bağlanılamadı (sudo pigpiod), yazılım zamanlaması kullanılacak")
+        return None
+    log.info('actuator', "✅ Solenoidler pigpio DMA dalga biçimiyle sürülecek")
+    return PigpioWaveActuator(pi, relay_pins, model, clock)
+
+# ==================== KÜTÜPHANE KATALOĞU (SQLite) ====================
+class LibraryCatalog:
+    """Kitaplar, türetilmiş dosyalar ve ilerleme için gömülü SQLite kataloğu.
+    
+    WAL kipinde açılır; her güncelleme tek satırlık bir yazmadır ve açılışta
+    yalnızca gereken satırlar okunur. Eski kitaplar_auto.json ve
+    progress*.json dosyaları ilk açılışta bir kez içeri aktarılır.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS books (
+            filename     TEXT PRIMARY KEY,
+            name_tr      TEXT NOT NULL,
+            download_url TEXT,
+            size         INTEGER,
+            sha          TEXT,
+            sort_order   INTEGER,
+            removed      INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS books_sha ON books(sha);
+        CREATE INDEX IF NOT EXISTS books_order ON books(removed, sort_order);
+        
+        -- Kitaptan türetilen dosyalar: pdf, text, audiobook ...
+        CREATE TABLE IF NOT EXISTS artifacts (
+            filename   TEXT NOT NULL,
+            kind       TEXT NOT NULL,
+            path       TEXT NOT NULL,
+            size       INTEGER NOT NULL DEFAULT 0,
+            status     TEXT NOT NULL,
+            source_sha TEXT,
+            updated_at REAL,
+            last_used  REAL,
+            PRIMARY KEY (filename, kind)
+        );
+        CREATE INDEX IF NOT EXISTS artifacts_last_used ON artifacts(last_used);
+        
+        CREATE TABLE IF NOT EXISTS progress (
+            session   TEXT NOT NULL,
+            filename  TEXT NOT NULL,
+            position  INTEGER NOT NULL,
+            mode      INTEGER,
+            timestamp REAL,
+            PRIMARY KEY (session, filename)
+        );
+        
+        CREATE TABLE IF NOT EXISTS reading_sessions (
+            id             INTEGER PRIMARY KEY AUTOINCREMENT,
+            session        TEXT NOT NULL,
+            filename       TEXT NOT NULL,
+            mode           INTEGER,
+            started_at     REAL NOT NULL,
+            ended_at       REAL,
+            start_position INTEGER,
+            end_position   INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS reading_sessions_book ON reading_sessions(filename, started_at);
+    """
+    
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self.lock = Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(self.SCHEMA)
+    
+    def _execute(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+    
+    # ---- Kitaplar ----
+    def books(self):
+        """Kütüphanedeki kitaplar (liste sırasıyla)"""
+        rows = self._execute(
+            "SELECT filename, name_tr, download_url, size, sha FROM books "
+            "WHERE removed = 0 ORDER BY sort_order")
+        return [dict(row) for row in rows]
+    
+    def replace_books(self, books):
+        """GitHub listesini tek işlemde yaz; listede olmayanları kaldırılmış işaretle"""
+        with self.lock:
+            self.db.execute("BEGIN")
+            try:
+                self.db.execute("UPDATE books SET removed = 1")
+                for order, book in enumerate(books):
+                    self.db.execute(
+                        "INSERT INTO books (filename, name_tr, download_url, size, sha, sort_order, removed) "
+                        "VALUES (?, ?, ?, ?, ?, ?, 0) "
+                        "ON CONFLICT(filename) DO UPDATE SET name_tr = excluded.name_tr, "
+                        "download_url = excluded.download_url, size = excluded.size, "
+                        "sha = excluded.sha, sort_order = excluded.sort_order, removed = 0",
+                        (book['filename'], book['name_tr'], book.get('download_url', ''),
+                         book.get('size', 0), book.get('sha', ''), order))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+    
+    # ---- Türetilmiş dosyalar ----
+    def artifact(self, filename, kind):
+        rows = self._execute("SELECT * FROM artifacts WHERE filename = ? AND kind = ?",
+                             (filename, kind))
+        return dict(rows[0]) if rows else None
+    
+    def set_artifact(self, filename, kind, path, size, status, source_sha=None):
+        now = time.time()
+        self._execute(
+            "INSERT INTO artifacts (filename, kind, path, size, status, source_sha, updated_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(filename, kind) DO UPDATE SET path = excluded.path, size = excluded.size, "
+            "status = excluded.status, source_sha = excluded.source_sha, updated_at = excluded.updated_at",
+            (filename, kind, path, size, status, source_sha, now, now))
+    
+    def touch_artifacts(self, filename):
+        """Kitabın tüm dosyalarının son kullanım zamanını güncelle"""
+        self._execute("UPDATE artifacts SET last_used = ? WHERE filename = ?",
+                      (time.time(), filename))
+    
+    def delete_artifact(self, filename, kind):
+        self._execute("DELETE FROM artifacts WHERE filename = ? AND kind = ?", (filename, kind))
+    
+    def artifacts_for(self, filename):
+        return [dict(row) for row in self._execute(
+            "SELECT * FROM artifacts WHERE filename = ?", (filename,))]
+    
+    def total_artifact_size(self):
+        return self._execute("SELECT COALESCE(SUM(size), 0) FROM artifacts")[0][0]
+    
+    def books_by_last_use(self):
+        """Kitap başına toplam boyut ve son kullanım, en eski kullanılan önce"""
+        rows = self._execute(
+            "SELECT filename, SUM(size) AS size, MAX(last_used) AS last_used "
+            "FROM artifacts GROUP BY filename ORDER BY last_used")
+        return [dict(row) for row in rows]
+    
+    def books_in_progress(self):
+        """Herhangi bir oturumda yarıda kalmış kitaplar"""
+        rows = self._execute("SELECT DISTINCT filename FROM progress WHERE position > 0")
+        return {row[0] for row in rows}
+    
+    # ---- İlerleme ----
+    def get_progress(self, session, filename):
+        rows = self._execute("SELECT position, mode, timestamp FROM progress "
+                             "WHERE session = ? AND filename = ?", (session, filename))
+        return dict(rows[0]) if rows else None
+    
+    def save_progress(self, session, filename, position, mode):
+        self._execute(
+            "INSERT INTO progress (session, filename, position, mode, timestamp) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(session, filename) DO UPDATE SET position = excluded.position, "
+            "mode = excluded.mode, timestamp = excluded.timestamp",
+            (session, filename, position, mode, time.time()))
+    
+    def begin_reading(self, session, filename, mode, position):
+        """Okuma oturumu kaydı başlat, kimliğini döndür"""
+        with self.lock:
+            cursor = self.db.execute(
+                "INSERT INTO reading_sessions (session, filename, mode, started_at, start_position) "
+                "VALUES (?, ?, ?, ?, ?)", (session, filename, mode, time.time(), position))
+            return cursor.lastrowid
+    
+    def end_reading(self, reading_id, position):
+        self._execute("UPDATE reading_sessions SET ended_at = ?, end_position = ? WHERE id = ?",
+                      (time.time(), position, reading_id))
+    
+    # ---- Eski JSON dosyalarından geçiş ----
+    def migrate_json(self, books_dir):
+        """kitaplar_auto.json ve progress*.json dosyalarını bir kez içeri aktar"""
+        books_file = f"{books_dir}/kitaplar_auto.json"
+        if os.path.exists(books_file):
+            try:
+                with open(books_file, 'r', encoding='utf-8') as f:
+                    books = json.load(f)
+                self.replace_books(books)
+                os.replace(books_file, f"{books_file}.migrated")
+                log.info('catalog', f"📦 {len(books)} kitap kataloğa aktarıldı", books=len(books))
+            except Exception as e:
+                log.error('catalog', f"❌ Kitap listesi aktarılamadı: {e}", path=books_file)
+        
+        for name in os.listdir(books_dir):
+            if not (name.startswith('progress') and name.endswith('.json')):
+                continue
+            session = name[len('progress'):-len('.json')].lstrip('_') or "default"
+            progress_file = f"{books_dir}/{name}"
+            try:
+                with open(progress_file, 'r', encoding='utf-8') as f:
+                    progress = json.load(f)
+                for filename, entry in progress.items():
+                    self._execute(
+                        "INSERT OR REPLACE INTO progress (session, filename, position, mode, timestamp) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (session, filename, entry.get('position', 0), entry.get('mode'),
+                         entry.get('timestamp', time.time())))
+                os.replace(progress_file, f"{progress_file}.migrated")
+                log.info('catalog', f"📦 '{session}' ilerlemesi kataloğa aktarıldı", session=session)
+            except Exception as e:
+                log.error('catalog', f"❌ İlerleme aktarılamadı ({name}): {e}", path=progress_file)
+
+# ==================== DİSK KOTASI ====================
+class StorageManager:
+    """Kitap dosyaları için disk kotası ve LRU temizleme.
+    
+    PDF, çıkarılmış metin, önceden seslendirilmiş ses gibi her dosya
+    katalogda boyutu ve son okunma zamanıyla tutulur. Kota aşıldığında en
+    uzun süredir okunmayan kitabın tüm dosyaları silinir; seçili kitaplar
+    ve yarıda kalmış kitaplar asla silinmez. Silinen kitap seçildiğinde
+    yeniden indirilir.
+    """
+    
+    def __init__(self, library, quota_mb=STORAGE_QUOTA_MB, min_free_mb=STORAGE_MIN_FREE_MB):
+        self.library = library
+        self.catalog = library.catalog
+        self.quota = quota_mb * 1024 * 1024
+        self.min_free = min_free_mb * 1024 * 1024
+        self.lock = Lock()
+        self.evicted = 0
+        self.freed_bytes = 0
+    
+    def register_existing(self):
+        """Katalogdan önce indirilmiş dosyaları kataloğa ekle"""
+        for book in self.library.books:
+            for kind, path in (('pdf', self.library.pdf_path(book)),
+                               ('text', self.library.text_path(book))):
+                if os.path.exists(path) and not self.catalog.artifact(book['filename'], kind):
+                    self.catalog.set_artifact(book['filename'], kind, path, path_size(path),
+                                              'ready', book.get('sha'))
+    
+    def usage(self):
+        return self.catalog.total_artifact_size()
+    
+    def limit(self):
+        """Etkin sınır: kota ya da karttaki boş alan, hangisi daha darsa"""
+        try:
+            free = shutil.disk_usage(self.library.books_dir).free
+        except OSError:
+            return self.quota
+        return min(self.quota, self.usage() + free - self.min_free)
+    
+    def has_room(self, size):
+        return self.usage() + size <= self.limit()
+    
+    def protected_books(self):
+        """Silinemeyecek kitaplar: seçili olanlar ve yarıda kalanlar"""
+        return set(self.library.selected.values()) | self.catalog.books_in_progress()
+    
+    def make_room(self, size=0):
+        """Gerekirse en eski okunan kitapları silerek size bayt yer aç"""
+        with self.lock:
+            limit = self.limit()
+            usage = self.usage()
+            if usage + size <= limit:
+                return True
+            
+            protected = self.protected_books()
+            for entry in self.catalog.books_by_last_use():
+                if usage + size <= limit:
+                    break
+                if entry['filename'] in protected:
+                    continue
+                usage -= self.evict(entry['filename'])
+            
+            if usage + size > limit:
+                log.warning('storage', f"⚠️ Disk kotası dolu: {usage // (1024 * 1024)} MB kullanımda",
+                            usage=usage, limit=limit)
+                return False
+            return True
+    
+    def evict(self, filename):
+        """Kitabın tüm dosyalarını sil, boşalan bayt sayısını döndür"""
+        freed = 0
+        for artifact in self.catalog.artifacts_for(filename):
+            path = artifact['path']
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+                if os.path.exists(f"{path}.idx"):
+                    os.remove(f"{path}.idx")
+            except OSError as e:
+                log.error('storage', f"❌ {path} silinemedi: {e}", path=path)
+                continue
+            freed += artifact['size']
+            self.catalog.delete_artifact(filename, artifact['kind'])
+        
+        self.evicted += 1
+        self.freed_bytes += freed
+        log.info('storage', f"🧹 {filename} diskten kaldırıldı ({freed // 1024} KB)",
+                 book=filename, freed=freed)
+        return freed
+    
+    def stats(self):
+        return {
+            'usage_mb': round(self.usage() / (1024 * 1024), 1),
+            'limit_mb': round(self.limit() / (1024 * 1024), 1),
+            'evicted': self.evicted,
+            'freed_mb': round(self.freed_bytes / (1024 * 1024), 1),
+        }
+
+# ==================== KÜTÜPHANE DEPOSU ====================
+class Download:
+    """Süren bir indirme: alınan bayt izlenebilir, kısmi dosya okunabilir"""
+    
+    def __init__(self, book, path, foreground):
+        self.book = book
+        self.path = path              # Kısmi dosya (bitince kitabın PDF yoluna taşınır)
+        self.foreground = foreground  # Okuyucu bekliyor: arka plan eşitlemesinden önce gelir
+        self.received = 0
+        self.done = False
+        self.ok = False
+        self.cond = threading.Condition()
+    
+    def advance(self, count):
+        with self.cond:
+            self.received += count
+            self.cond.notify_all()
+    
+    def finish(self, ok):
+        with self.cond:
+            self.done = True
+            self.ok = ok
+            self.cond.notify_all()
+    
+    def wait_for(self, size, timeout=None):
+        """size bayt inene (veya indirme bitene) kadar bekle"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.done or self.received >= size, timeout)
+            return self.received
+
+class LibraryStore:
+    """Kitap listesi ve PDF deposu - birden fazla okuyucu oturumu paylaşabilir"""
+    
+    def __init__(self, books_dir=LOCAL_BOOKS_DIR):
+        self.books_dir = books_dir
+        self.audiobook_dir = f"{books_dir}/audiobooks"  # Önceden seslendirilmiş bölümler
+        self.books = []
+        self.update_lock = Lock()  # Aynı anda tek güncelleme
+        os.makedirs(f"{self.books_dir}/pdfs", exist_ok=True)
+        os.makedirs(f"{self.books_dir}/text", exist_ok=True)
+        os.makedirs(f"{self.books_dir}/cells", exist_ok=True)
+        self.catalog = LibraryCatalog(f"{self.books_dir}/katalog.db")
+        self.catalog.migrate_json(self.books_dir)
+        self.load_local_books()
+        self.selected = {}  # session_id -> seçili kitabın dosya adı (silinmez)
+        self.precompute = None  # Arka plan ön hazırlık (PrecomputeScheduler), isteğe bağlı
+        self.downloads = {}     # filename -> Download (süren indirmeler)
+        self.download_cond = threading.Condition()
+        self.foreground = 0     # Süren öncelikli indirme sayısı (arka plan eşitlemesi bekler)
+        self.streaming = {}     # filename -> GrowingText (inerken çıkarılan metinler, download_cond ile)
+        self.storage = StorageManager(self)
+        self.storage.register_existing()
+    
+    def pdf_path(self, book):
+        """Kitabın yerel PDF yolu"""
+        return f"{self.books_dir}/pdfs/{book['filename']}"
+    
+    def text_path(self, book):
+        """Kitabın çıkarılmış (temizlenmiş) metninin yolu"""
+        return f"{self.books_dir}/text/{os.path.splitext(book['filename'])[0]}.txt"
+    
+    def cells_path(self, book):
+        """Kitabın derlenmiş braille hücre akışının yolu"""
+        return f"{self.books_dir}/cells/{os.path.splitext(book['filename'])[0]}.cells"
+    
+    def select(self, session_id, book):
+        """Oturumun seçili kitabını kaydet (kota temizliğinden korunur)"""
+        self.selected[session_id] = book['filename']
+    
+    def ensure_pdf(self, book):
+        """PDF diskte yoksa (hiç indirilmemiş veya kota için silinmiş) indir"""
+        if os.path.exists(self.pdf_path(book)):
+            return True
+        if not self.storage.make_room(book.get('size', 0)):
+            return False
+        log.info('download', f"📥 {book['filename']} isteğe bağlı indiriliyor...", book=book['filename'])
+        return self.download_book(book, foreground=True)
+    
+    def open_text(self, book, control=None):
+        """Kitap metnini (gerekirse PDF'ten çıkarıp) eşlenmiş olarak aç
+        
+        control (PlaybackControl) verilirse indirilirken açılan kitapta ilk
+        sayfaları bekleme okuma durdurulunca bırakılır.
+        """
+        text_path = self.text_path(book)
+        with self.download_cond:
+            # Çıkarma bitip metni kapatmadan önce kullanıcı olarak eklen
+            streaming = self.streaming.get(book['filename'])
+            if streaming:
+                return streaming.acquire()
+        if not os.path.exists(text_path) and not os.path.exists(self.pdf_path(book)):
+            return self.open_streaming(book, control)
+        if not os.path.exists(text_path):
+            if not self.ensure_pdf(book):
+                return None
+            if not extract_pdf_text(self.pdf_path(book), text_path):
+                return None
+            self.catalog.set_artifact(book['filename'], 'text', text_path,
+                                      os.path.getsize(text_path), 'ready', book.get('sha'))
+            self.storage.make_room()
+        self.catalog.touch_artifacts(book['filename'])
+        try:
+            return BookText(text_path)
+        except Exception as e:
+            log.error('library', f"❌ Kitap metni açılamadı: {e}", path=text_path)
+            return None
+    
+    def open_streaming(self, book, control=None):
+        """İndirilmemiş kitabı öncelikli indir; ilk sayfalar çıkınca büyüyen metni döndür"""
+        if not book.get('download_url') or not self.storage.make_room(book.get('size', 0)):
+            return None
+        log.info('download', f"📥 {book['filename']} indirilirken okunacak...", book=book['filename'])
+        with self.download_cond:
+            # Aynı anda açan iki okuyucu tek çıkarıcıyı paylaşır
+            text = self.streaming.get(book['filename'])
+            if text:
+                text.acquire()
+            else:
+                text = GrowingText(self, book, self.start_download(book))
+                self.streaming[book['filename']] = text
+                text.start()
+        if text.wait_ready(control):
+            return text
+        text.close()
+        return None
+    
+    def is_streaming(self, book):
+        """Kitap indirilirken sayfa sayfa çıkarılıyor mu"""
+        with self.download_cond:
+            return book['filename'] in self.streaming
+    
+    def open_cells(self, book):
+        """Derlenmiş hücre akışını eşle (yoksa None: hücreler okurken çevrilir; kapatmak çağırana ait)"""
+        path = self.cells_path(book)
+        try:
+            with open(path, 'rb') as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+    
+    def load_local_books(self):
+        """Yerel kitapları yükle"""
+        try:
+            self.books = self.catalog.books()
+            log.info('library', f"📚 {len(self.books)} kitap yüklendi", books=len(self.books))
+        except Exception as e:
+            log.error('library', f"❌ Kitaplar yüklenirken hata: {e}")
+            self.books = []
+    
+    def scan_github_for_pdfs(self):
+        """GitHub'daki PDF'leri tara"""
+        log.info('update', "🌐 GitHub'daki PDF'ler taranıyor...")
+        
+        try:
+            headers = {'User-Agent': 'Braille-Book-Reader'}
+            response = requests.get(GITHUB_API_URL, headers=headers, timeout=15)
+            
+            if response.status_code == 200:
+                files = response.json()
+                books = []
+                
+                for file in files:
+                    if isinstance(file, dict) and file.get('type') == 'file':
+                        filename = file.get('name', '')
+                        if filename.lower().endswith('.pdf'):
+                            book_name = self.create_book_name(filename)
+                            books.append({
+                                'filename': filename,
+                                'name_tr': book_name,
+                                'download_url': file.get('download_url', ''),
+                                'size': file.get('size', 0),
+                                'sha': file.get('sha', '')[:8]
+                            })
+                
+                log.info('update', f"✅ {len(books)} PDF bulundu", books=len(books))
+                return books
+            else:
+                log.error('update', f"❌ GitHub API hatası: {response.status_code}",
+                          status=response.status_code)
+                return []
+                
+        except Exception as e:
+            log.error('update', f"❌ Tarama hatası: {e}")
+            return []
+    
+    def create_book_name(self, filename):
+        """Dosya adından kitap adı oluştur"""
+        name = filename.replace('.pdf', '').replace('.PDF', '')
+        for char in ['_', '-', '.']:
+            name = name.replace(char, ' ')
+        
+        words = []
+        for word in name.split():
+            if word.lower() in ['ve', 'ile', 'de', 'da', 'ki']:
+                words.append(word.lower())
+            else:
+                words.append(word[0].upper() + word[1:].lower())
+        
+        result = ' '.join(words)
+        return result[:40] if len(result) > 40 else result
+    
+    def update(self, announce=None):
+        """GitHub ile eşitle ve yeni kitapları indir (announce: sesli bildirim)"""
+        # Başka bir oturum güncelliyorsa onun bitmesini bekle
+        with self.update_lock:
+            github_books = self.scan_github_for_pdfs()
+            
+            if not github_books:
+                if announce:
+                    announce("GitHub'dan kitap listesi alınamadı.")
+                return
+            
+            if announce:
+                announce(f"{len(github_books)} kitap bulundu.")
+            
+            new_books = []
+            for book in github_books:
+                if not os.path.exists(self.pdf_path(book)) or self.is_stale(book):
+                    new_books.append(book)
+            
+            if announce and new_books:
+                announce(f"{len(new_books)} yeni kitap indirilecek.")
+            
+            # Yalnızca kotada boş yer varken indir; gerisi seçilince indirilir
+            success_count = 0
+            deferred = 0
+            for book in new_books:
+                if not self.storage.has_room(book.get('size', 0)):
+                    deferred += 1
+                    continue
+                if self.download_book(book):
+                    success_count += 1
+            if deferred:
+                log.info('storage', f"💾 {deferred} kitap kota nedeniyle seçildiğinde indirilecek",
+                         deferred=deferred)
+            
+            self.save_book_metadata(github_books)
+            self.books = github_books
+        
+        if self.precompute:
+            self.precompute.kick()
+        
+        if announce:
+            if success_count > 0:
+                announce(f"Güncelleme tamamlandı. {success_count} kitap eklendi.")
+            else:
+                announce("Tüm kitaplar güncel.")
+    
+    def is_stale(self, book):
+        """Yerel PDF GitHub'daki sürümden (blob sha) farklı mı"""
+        artifact = self.catalog.artifact(book['filename'], 'pdf')
+        return artifact is not None and artifact['source_sha'] != book.get('sha')
+    
+    def invalidate_derived(self, book):
+        """PDF değiştiğinde eski metni, indeksini ve hücre akışını sil"""
+        text_path = self.text_path(book)
+        for path in (text_path, f"{text_path}.idx", self.cells_path(book)):
+            if os.path.exists(path):
+                os.remove(path)
+        self.catalog.delete_artifact(book['filename'], 'text')
+        self.catalog.delete_artifact(book['filename'], 'cells')
+    
+    def download_book(self, book, foreground=False):
+        """Kitabı indir (aynı kitap zaten iniyorsa ona katıl); foreground: okuyucu bekliyor"""
+        download, owner = self._claim(book, foreground)
+        if owner:
+            self._stream(download)
+        else:
+            with download.cond:
+                download.cond.wait_for(lambda: download.done)
+        return download.ok
+    
+    def start_download(self, book):
+        """Kitabı öncelikli olarak arka planda indirmeye başlat, Download durumunu hemen döndür"""
+        download, owner = self._claim(book, True)
+        if owner:
+            Thread(target=self._stream, args=(download,), name=f"indirme-{book['filename']}",
+                   daemon=True).start()
+        return download
+    
+    def _claim(self, book, foreground):
+        """Süren indirmeyi bul (öncelik gerekiyorsa yükselt) ya da yenisini kaydet"""
+        with self.download_cond:
+            download = self.downloads.get(book['filename'])
+            owner = download is None
+            if owner:
+                download = Download(book, f"{self.pdf_path(book)}.part", False)
+                self.downloads[book['filename']] = download
+            if foreground and not download.foreground:
+                download.foreground = True
+                self.foreground += 1
+                self.download_cond.notify_all()
+            return download, owner
+    
+    def _yield_to_foreground(self, download):
+        """Okuyucunun beklediği bir indirme sürerken arka plan indirmesini beklet"""
+        with self.download_cond:
+            while self.foreground and not download.foreground:
+                self.download_cond.wait()
+    
+    def _stream(self, download):
+        """PDF'i parça parça diske akıt; kısmi dosya inerken okunabilir"""
+        realtime.demote()
+        book = download.book
+        ok = False
+        try:
+            response = requests.get(book['download_url'], stream=True, timeout=60)
+            if response.status_code == 200:
+                with open(download.path, 'wb') as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_KB * 1024):
+                        self._yield_to_foreground(download)
+                        f.write(chunk)
+                        f.flush()
+                        download.advance(len(chunk))
+                file_path = self.pdf_path(book)
+                os.replace(download.path, file_path)
+                self.invalidate_derived(book)
+                self.catalog.set_artifact(book['filename'], 'pdf', file_path,
+                                          download.received, 'ready', book.get('sha'))
+                log.info('download', f"📥 {book['filename']} indirildi",
+                         book=book['filename'], size=download.received, foreground=download.foreground)
+                ok = True
+            else:
+                log.error('download', f"❌ {book['filename']} indirilemedi: {response.status_code}",
+                          book=book['filename'], status=response.status_code)
+        except Exception as e:
+            log.error('download', f"❌ {book['filename']} indirme hatası: {e}", book=book['filename'])
+        finally:
+            if not ok and os.path.exists(download.path):
+                os.remove(download.path)
+            with self.download_cond:
+                self.downloads.pop(book['filename'], None)
+                if download.foreground:
+                    self.foreground -= 1
+                self.download_cond.notify_all()
+            download.finish(ok)
+    
+    def save_book_metadata(self, books):
+        """Metadata'yı kataloğa kaydet"""
+        try:
+            self.catalog.replace_books(books)
+            log.info('catalog', "📁 Metadata kaydedildi", books=len(books))
+        except Exception as e:
+            log.error('catalog', f"❌ Metadata kaydetme hatası: {e}")
+
+# ==================== KİTAP METNİ (mmap) ====================
+class BookText:
+    """Diskteki UTF-8 kitap metni üzerinde kopyasız okuma imleci.
+    
+    Metin mmap ile eşlenir; her TEXT_INDEX_STRIDE karakterde bir bayt
+    ofseti tutan indeks sayesinde herhangi bir karakter pozisyonundaki
+    bölüm, kitabın boyutundan bağımsız olarak sabit sürede çözülür.
+    Bellekte yalnızca istenen bölüm (ve son çözülen blok) bulunur.
+    """
+    
+    def __init__(self, path, stride=TEXT_INDEX_STRIDE):
+        self.path = path
+        self.stride = stride
+        self.file = open(path, 'rb')
+        stat = os.fstat(self.file.fileno())
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.index, self.length = self._load_index()
+        
+        # Son çözülen blok (sıralı karakter erişimi için)
+        self.block_start = -1
+        self.block = ""
+    
+    def _load_index(self):
+        """Karakter -> bayt indeksini yükle, yoksa bir kez tarayıp kaydet"""
+        index_path = f"{self.path}.idx"
+        try:
+            with open(index_path, 'rb') as f:
+                # Başlık: dosya boyutu, değişiklik zamanı, adım, karakter sayısı
+                header = array('Q')
+                header.frombytes(f.read(32))
+                if list(header[:3]) == [self.size, self.mtime_ns, self.stride]:
+                    index = array('Q')
+                    index.frombytes(f.read())
+                    return index, header[3]
+        except (OSError, ValueError, IndexError):
+            pass
+        
+        index = array('Q')
+        length = 0
+        offset = 0
+        with open(self.path, 'r', encoding='utf-8', errors='strict') as f:
+            while True:
+                piece = f.read(self.stride)
+                if not piece:
+                    break
+                index.append(offset)
+                offset += len(piece.encode('utf-8'))
+                length += len(piece)
+        
+        try:
+            partial = part_path(index_path)
+            with open(partial, 'wb') as f:
+                f.write(array('Q', [self.size, self.mtime_ns, self.stride, length]).tobytes())
+                f.write(index.tobytes())
+            os.replace(partial, index_path)
+        except OSError as e:
+            log.warning('library', f"⚠️ Metin indeksi kaydedilemedi: {e}", path=index_path)
+        return index, length
+    
+    def __len__(self):
+        return self.length
+    
+    def _byte_offset(self, position):
+        """Karakter pozisyonunun bayt ofseti (en fazla bir blok çözülür)"""
+        if position >= self.length:
+            return self.size
+        checkpoint, rest = divmod(position, self.stride)
+        offset = self.index[checkpoint]
+        if rest:
+            # UTF-8 karakteri en fazla 4 bayt
+            head = self.mm[offset:offset + rest * 4].decode('utf-8', errors='ignore')[:rest]
+            offset += len(head.encode('utf-8'))
+        return offset
+    
+    def slice(self, start, end):
+        """[start, end) karakter aralığını çöz (yalnızca o aralık kopyalanır)"""
+        start = max(0, start)
+        end = min(end, self.length)
+        if start >= end:
+            return ""
+        begin = self._byte_offset(start)
+        return self.mm[begin:self._byte_offset(end)].decode('utf-8')
+    
+    def char_at(self, position):
+        if not 0 <= position < self.length:
+            raise IndexError(position)
+        if not self.block_start <= position < self.block_start + len(self.block):
+            self.block_start = position - position % self.stride
+            self.block = self.slice(self.block_start, self.block_start + self.stride)
+        return self.block[position - self.block_start]
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError("Adımlı dilim desteklenmiyor")
+            start = key.start or 0
+            end = self.length if key.stop is None else key.stop
+            return self.slice(start, end)
+        return self.char_at(key)
+    
+    def sha1(self):
+        """Metnin özeti (mmap üzerinden, kopyasız)"""
+        return hashlib.sha1(self.mm).hexdigest()
+    
+    def close(self):
+        """Eşlemeyi ve dosyayı kapat (kitap değişince veya iş bitince)"""
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def text_sha1(text):
+    """str veya BookText (GrowingText) için metin özeti"""
+    if isinstance(text, str):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+    return text.sha1()
+
+def text_available(text, position, control=None):
+    """position'da okunacak metin var mı - büyüyen metinde gelene (veya bitene) kadar bekler
+    
+    control (PlaybackControl) verilirse bekleme okuma durdurulunca False ile
+    biter: indirme takılsa da üretici iş parçacığı serbest kalır.
+    """
+    wait_for = getattr(text, 'wait_for', None)
+    if wait_for is None:
+        return position < len(text)
+    while True:
+        available = wait_for(position, None if control is None else PROGRESSIVE_WAIT_POLL)
+        if available is not None:
+            return available
+        if control.stopped:
+            return False
+
+class GrowingText:
+    """İndirilmekte olan kitabın sayfa sayfa büyüyen metni (BookText arayüzü).
+    
+    Kısmi PDF'in yapısı izin verdiğinde (doğrusallaştırılmış PDF'lerde ilk
+    parçalar iner inmez, diğerlerinde xref yeniden kurulabildiğinde)
+    pdftotext -f/-l ile sıradaki sayfalar çıkarılıp metne eklenir. Bir
+    sayfa, ardındaki sayfa da okunabildiğinde eksiksiz inmiş sayılır.
+    Sayfa metinleri extract_pdf_text ile aynı şekilde temizlendiğinden
+    okunan her pozisyon son metinde de geçerlidir. İndirme bitince kalıcı
+    metin tam PDF'ten çıkarılır ve okuyucular ona geçer.
+    """
+    
+    def __init__(self, library, book, download):
+        self.library = library
+        self.book = book
+        self.download = download
+        self.text_path = library.text_path(book)
+        self.path = f"{self.text_path}.growing"
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+        self.current = BookText(self.path)
+        self.cond = threading.Condition()
+        self.complete = False
+        self.failed = False
+        self.pages = None       # Toplam sayfa (kısmi dosyadan okunabildiyse)
+        self.next_page = 1
+        self.first_text_at = None
+        self.users = 1          # Metni açık tutan okuyucular (oturumlar aynı nesneyi paylaşır)
+    
+    def start(self):
+        Thread(target=self._extract, name=f"cikarma-{self.book['filename']}", daemon=True).start()
+    
+    def __len__(self):
+        return len(self.current)
+    
+    def __getitem__(self, key):
+        # Eşleme eklemelerde değişip eskisi kapatıldığından kilit altında oku
+        with self.cond:
+            return self.current[key]
+    
+    def sha1(self):
+        with self.cond:
+            return self.current.sha1()
+    
+    def acquire(self):
+        """Paylaşılan metni bir okuyucu daha kullanıyor (open_text)"""
+        with self.cond:
+            self.users += 1
+        return self
+    
+    def close(self):
+        """Okuyucu bıraktı; son okuyucu bitmiş metnin eşlemesini kapatır"""
+        with self.cond:
+            self.users -= 1
+            if self.users <= 0 and self.complete:
+                self.current.close()
+    
+    def _replace(self, current):
+        """Yeni eşlemeye geç ve eskisini kapat (cond kilidi altında çağrılır)"""
+        previous, self.current = self.current, current
+        previous.close()
+    
+    def wait_for(self, position, timeout=None):
+        """position'a kadar metin çıkana (veya kitap bitene) kadar bekle; süre dolarsa None"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: len(self.current) > position or self.complete, timeout):
+                return None
+            return position < len(self.current)
+    
+    def wait_ready(self, control=None):
+        """İlk sayfalar çıkana kadar bekle; hiç metin çıkmadıysa (veya durdurulduysa) False"""
+        return text_available(self, 0, control)
+    
+    def _append(self, pages):
+        """Temizlenmiş sayfa metinlerini ekle ve eşlemeyi yenile"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for page in pages:
+                if page:
+                    if f.tell():
+                        f.write(' ')
+                    f.write(page)
+        current = BookText(self.path)
+        with self.cond:
+            self._replace(current)
+            self.next_page += len(pages)
+            self.cond.notify_all()
+        if self.first_text_at is None and len(current):
+            self.first_text_at = self.download.received
+            log.info('download', f"📖 {self.book['filename']}: ilk sayfalar indirme sürerken hazır",
+                     book=self.book['filename'], received=self.download.received,
+                     linearized=pdf_is_linearized(self.download.path))
+    
+    def _next_pages(self, path):
+        """Kısmi dosyadan güvenle eklenebilecek sıradaki sayfalar"""
+        self.pages = pdf_page_count(path) or self.pages
+        if not self.pages or self.next_page > self.pages:
+            return None
+        last = self.next_page + PROGRESSIVE_PAGE_BATCH
+        if last > self.pages:
+            return None  # Son sayfalar: indirme bitince
+        pages = extract_pdf_pages(path, self.next_page, last)
+        if not pages or not pages[-1]:
+            return None  # Ardındaki sayfa henüz okunamıyor
+        return pages[:-1]
+    
+    def _is_prefix_of(self, path):
+        """Büyüyen dosya path'in başıyla birebir aynı mı"""
+        with open(self.path, 'rb') as grown, open(path, 'rb') as full:
+            while True:
+                chunk = grown.read(1 << 16)
+                if not chunk:
+                    return True
+                if full.read(len(chunk)) != chunk:
+                    return False
+    
+    def _extract(self):
+        realtime.demote()
+        download = self.download
+        try:
+            while True:
+                done = download.done
+                if done and not download.ok:
+                    self.failed = True
+                    break
+                if done:
+                    self._finish(self.library.pdf_path(self.book))
+                    break
+                pages = self._next_pages(download.path)
+                if pages:
+                    self._append(pages)
+                    continue
+                download.wait_for(download.received + PROGRESSIVE_EXTRACT_KB * 1024)
+        except Exception as e:
+            log.error('download', f"❌ {self.book['filename']} kısmi metin hatası: {e}",
+                      book=self.book['filename'])
+            self.failed = True
+        finally:
+            with self.library.download_cond:
+                self.library.streaming.pop(self.book['filename'], None)
+            with self.cond:
+                self.complete = True
+                if self.users <= 0:
+                    self.current.close()  # Okuyucular indirme bitmeden bıraktı
+                self.cond.notify_all()
+    
+    def _finish(self, pdf_path):
+        """Kitabın kalıcı metnini tam PDF'ten çıkarıp yerleştir
+        
+        Kısmi dosyada henüz boş görünen ara sayfalar atlanmış olabilir; bu
+        yüzden büyüyen dosya kalıcı metin yapılmaz. Okunan metin tam metnin
+        öneki değilse o sırada kaydedilen pozisyonlar kayabilir: uyarılır.
+        """
+        if not extract_pdf_text(pdf_path, self.text_path):
+            self.failed = True
+            return
+        if not self._is_prefix_of(self.text_path):
+            log.warning('download', f"⚠️ {self.book['filename']}: indirilirken atlanan sayfalar vardı, "
+                        f"metin tam PDF'ten yeniden çıkarıldı", book=self.book['filename'])
+        for path in (self.path, f"{self.path}.idx"):
+            if os.path.exists(path):
+                os.remove(path)
+        current = BookText(self.text_path)
+        with self.cond:
+            self._replace(current)
+        self.library.catalog.set_artifact(self.book['filename'], 'text', self.text_path,
+                                          os.path.getsize(self.text_path), 'ready',
+                                          self.book.get('sha'))
+        self.library.storage.make_room()
+
+# ==================== ÖNCEDEN SESLENDİRİLMİŞ KİTAP ====================
+def extract_pdf_text(pdf_path, out_path):
+    """PDF metnini pdftotext ile çıkar, boşlukları temizleyerek out_path'e yaz"""
+    if not os.path.exists(pdf_path):
+        return False
+    
+    partial = part_path(out_path)  # Ön hazırlık ve okuyucu aynı kitabı çıkarabilir
+    try:
+        # pdftotext kontrolü
+        result = subprocess.run(['which', 'pdftotext'], 
+                               capture_output=True, 
+                               text=True)
+        if result.returncode != 0:
+            log.warning('extract', "⚠️ pdftotext bulunamadı, kuruluyor...")
+            subprocess.run(['sudo', 'apt', 'install', '-y', 'poppler-utils'], 
+                          stdout=subprocess.DEVNULL, 
+                          stderr=subprocess.DEVNULL)
+        
+        # Eşzamanlı çıkarmalar (oturumlar, ön-seslendirme) çakışmasın
+        with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as tmp_file:
+            temp_file = tmp_file.name
+        cmd = ["pdftotext", "-layout", "-enc", "UTF-8", pdf_path, temp_file]
+        subprocess.run(cmd, capture_output=True, text=True)
+        
+        # Metni satır satır temizle (tüm kitap bellekte tutulmaz)
+        with open(temp_file, 'r', encoding='utf-8', errors='ignore') as src, \
+                open(partial, 'w', encoding='utf-8') as dst:
+            first = True
+            for line in src:
+                words = line.split()
+                if words:
+                    if not first:
+                        dst.write(' ')
+                    dst.write(' '.join(words))
+                    first = False
+        os.remove(temp_file)
+        os.replace(partial, out_path)
+        return True
+    except Exception as e:
+        log.error('extract', f"❌ PDF okuma hatası: {e}", path=pdf_path)
+        if os.path.exists(partial):
+            os.remove(partial)
+        return False
+
+def pdf_page_count(pdf_path):
+    """PDF'in sayfa sayısı (pdfinfo); kısmi dosyada yapı henüz okunamıyorsa None"""
+    try:
+        result = subprocess.run(['pdfinfo', pdf_path], capture_output=True, text=True, timeout=30)
+    except Exception:
+        return None
+    for line in result.stdout.splitlines():
+        if line.startswith('Pages:'):
+            return int(line.split()[1]) or None
+    return None
+
+def pdf_is_linearized(pdf_path):
+    """Doğrusallaştırılmış (web için hızlı açılan) PDF mi - ilk sayfa dosyanın başındadır"""
+    try:
+        with open(pdf_path, 'rb') as f:
+            return b'/Linearized' in f.read(1024)
+    except OSError:
+        return False
+
+def extract_pdf_pages(pdf_path, first, last):
+    """[first, last] sayfalarının temizlenmiş metinleri (sayfa başına bir öğe); okunamazsa None"""
+    cmd = ["pdftotext", "-layout", "-enc", "UTF-8", "-f", str(first), "-l", str(last), pdf_path, "-"]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=120)
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    # pdftotext her sayfayı form feed ile bitirir; temizlik extract_pdf_text ile aynı
+    pages = result.stdout.decode('utf-8', errors='ignore').split('\f')[:last - first + 1]
+    if len(pages) < last - first + 1:
+        return None
+    return [' '.join(page.split()) for page in pages]
+
+def part_path(path):
+    """Yarım yazılan dosya için bu işe özgü geçici ad (aynı dosyayı üreten işler çakışmasın)"""
+    return f"{path}.{os.getpid()}-{threading.get_native_id()}.part"
+
+def path_size(path):
+    """Dosyanın veya dizinin (içeriğiyle) bayt cinsinden boyutu"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def read_chunk_end(text, position, chunk_size=2000, min_size=500):
+    """Okuma bloğunun bitişi: en fazla chunk_size karakter, mümkünse cümle sonunda"""
+    text_chunk = text[position:position + chunk_size]
+    
+    # Cümle sonu bul
+    sentence_end = max(text_chunk.rfind('.'), text_chunk.rfind('!'), text_chunk.rfind('?'))
+    if sentence_end > min_size:  # En az min_size karakter olsun
+        return position + sentence_end + 1
+    return position + len(text_chunk)
+
+def _render_segment(job):
+    """İşçi süreçte tek bölümü sentezle ve sıkıştır (ProcessPoolExecutor)"""
+    index, text, out_path, length_scale, fmt, piper_binary, piper_model = job
+    
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
+        wav_path = tmp_file.name
+    tmp_out = part_path(out_path)
+    try:
+        subprocess.run([piper_binary, "--model", piper_model, "--output_file", wav_path,
+                        "--length_scale", str(length_scale)],
+                       input=text, capture_output=True, text=True, timeout=600, check=True)
+        if fmt == "opus":
+            encode_cmd = ['opusenc', '--quiet', wav_path, tmp_out]
+        else:
+            encode_cmd = ['flac', '-s', '-f', '--best', '-o', tmp_out, wav_path]
+        subprocess.run(encode_cmd, capture_output=True, timeout=600, check=True)
+        
+        # Yarım kalan dosya tamamlanmış sayılmasın
+        os.replace(tmp_out, out_path)
+        return index, True
+    except Exception as e:
+        log.error('audiobook', f"❌ Bölüm {index} seslendirilemedi: {e}", segment=index, path=out_path)
+        return index, False
+    finally:
+        for path in (wav_path, tmp_out):
+            if os.path.exists(path):
+                os.remove(path)
+
+class Audiobook:
+    """Bir kitabın önceden seslendirilmiş bölümleri.
+    
+    Bölümler çıkarılmış metindeki cümle sonlarına hizalıdır ve okuma
+    modunun blok sınırlarıyla aynı kuralla (read_chunk_end) üretilir.
+    Her bölüm ayrı bir FLAC/Opus dosyasıdır; var olan dosyalar atlandığı
+    için yarıda kalan bir seslendirme kaldığı yerden devam eder.
+    """
+    
+    def __init__(self, book_key, text, length_scale=1.0, fmt=AUDIOBOOK_FORMAT,
+                 root_dir=AUDIOBOOK_DIR):
+        self.book_key = book_key
+        self.length_scale = round(length_scale, 3)
+        self.fmt = fmt
+        self.dir = f"{root_dir}/{os.path.splitext(book_key)[0]}"
+        self.manifest_path = f"{self.dir}/manifest.json"
+        self.text_sha = text_sha1(text)
+        self.segments = []
+        self.starts = []
+    
+    @classmethod
+    def plan(cls, book_key, text, length_scale=1.0, fmt=AUDIOBOOK_FORMAT,
+             root_dir=AUDIOBOOK_DIR):
+        """Metni cümle hizalı bölümlere ayır"""
+        audiobook = cls(book_key, text, length_scale, fmt, root_dir)
+        position = 0
+        while position < len(text):
+            end = read_chunk_end(text, position)
+            audiobook.segments.append((position, end))
+            position = end
+        audiobook.starts = [start for start, _ in audiobook.segments]
+        return audiobook
+    
+    @classmethod
+    def load(cls, book_key, text, length_scale=1.0, root_dir=AUDIOBOOK_DIR):
+        """Metin ve hızla eşleşen bir manifest varsa yükle, yoksa None"""
+        audiobook = cls(book_key, text, length_scale, root_dir=root_dir)
+        if not os.path.exists(audiobook.manifest_path):
+            return None
+        try:
+            with open(audiobook.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            log.error('audiobook', f"❌ Manifest okunamadı: {e}", path=audiobook.manifest_path)
+            return None
+        
+        if (manifest.get('text_sha') != audiobook.text_sha
+                or manifest.get('length_scale') != audiobook.length_scale):
+            return None
+        audiobook.fmt = manifest['format']
+        audiobook.segments = [tuple(segment) for segment in manifest['segments']]
+        audiobook.starts = [start for start, _ in audiobook.segments]
+        return audiobook
+    
+    def segment_path(self, index):
+        return f"{self.dir}/{index:05d}.{self.fmt}"
+    
+    def prepare_dir(self):
+        """Bölüm dizinini hazırla; başka metin/hız/biçimle üretilmiş eski bölümleri sil
+        
+        Dizin yalnızca kitap adına bağlıdır ve bölümler dosyanın varlığıyla
+        "hazır" sayılır: kitap güncellenince eski sesler yeni manifestle
+        geçerli görünmesin.
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = None
+        except (OSError, ValueError):
+            manifest = {}  # Bozuk manifest: bölümlerin neye ait olduğu bilinmiyor
+        if manifest is not None and (manifest.get('text_sha'), manifest.get('length_scale'),
+                                     manifest.get('format')) != (self.text_sha, self.length_scale, self.fmt):
+            log.info('audiobook', f"🗑️ {self.book_key}: eski seslendirme siliniyor (metin, hız veya biçim değişmiş)",
+                     book=self.book_key)
+            shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir, exist_ok=True)
+    
+    def is_rendered(self, index):
+        return os.path.exists(self.segment_path(index))
+    
+    def segment_at(self, position):
+        """Pozisyonu içeren bölüm: (indeks, başlangıç, bitiş) ya da None"""
+        index = bisect.bisect_right(self.starts, position) - 1
+        if index < 0:
+            return None
+        start, end = self.segments[index]
+        if position >= end:
+            return None
+        return index, start, end
+    
+    def leading_segments(self, seconds, speed=1.0):
+        """Baştan yaklaşık seconds saniyelik anlatımı kapsayan bölüm sayısı"""
+        chars = seconds * SPEECH_CHARS_PER_SECOND * speed
+        return bisect.bisect_left(self.starts, chars) or min(1, len(self.segments))
+    
+    def missing_jobs(self, text, limit=None):
+        """Henüz seslendirilmemiş bölümlerin işleri (limit: yalnızca ilk N bölüm)"""
+        segments = self.segments if limit is None else self.segments[:limit]
+        return [(i, text[start:end], self.segment_path(i), self.length_scale, self.fmt,
+                 PIPER_BINARY_PATH, PIPER_MODEL_PATH)
+                for i, (start, end) in enumerate(segments) if not self.is_rendered(i)]
+    
+    def rendered_count(self):
+        return sum(1 for i in range(len(self.segments)) if self.is_rendered(i))
+    
+    def save_manifest(self, rendered):
+        manifest = {
+            'book': self.book_key,
+            'text_sha': self.text_sha,
+            'length_scale': self.length_scale,
+            'format': self.fmt,
+            'rendered': rendered,
+            'segments': self.segments,
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def render(self, text, workers=None, limit=None):
+        """Eksik bölümleri tüm çekirdeklerde seslendir (sıralı birleştirme)"""
+        self.prepare_dir()
+        workers = workers or os.cpu_count() or 1
+        
+        jobs = self.missing_jobs(text, limit)
+        rendered = self.rendered_count()
+        log.info('audiobook', f"🎙️ {self.book_key}: {len(self.segments)} bölüm, {len(jobs)} eksik, {workers} işçi",
+                 book=self.book_key, segments=len(self.segments), missing=len(jobs), workers=workers)
+        self.save_manifest(rendered)
+        
+        # map() sonuçları sırayla döndürür; manifest her zaman tamamlanmış bölümleri sayar
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 mp_context=worker_context()) as executor:
+            for index, ok in executor.map(_render_segment, jobs):
+                if ok:
+                    rendered += 1
+                if rendered % 10 == 0:
+                    self.save_manifest(rendered)
+                    log.info('audiobook', f"🎙️ {self.book_key}: {rendered}/{len(self.segments)} bölüm hazır",
+                             book=self.book_key, rendered=rendered)
+        
+        self.save_manifest(rendered)
+        return rendered == len(self.segments)
+
+# ==================== BRAILLE HÜCRE AKIŞI ====================
+BRAILLE_MAP = {
+    'a': [1,0,0,0,0,0], 'b': [1,1,0,0,0,0], 'c': [1,0,0,1,0,0],
+    'ç': [1,0,0,1,1,0], 'd': [1,0,0,1,1,1], 'e': [1,0,0,0,1,0],
+    'f': [1,1,0,1,0,0], 'g': [1,1,0,1,1,0], 'ğ': [1,1,0,1,1,1],
+    'h': [1,1,0,0,1,0], 'ı': [0,1,0,1,0,1], 'i': [0,1,0,1,0,0],
+    'j': [0,1,0,1,1,0], 'k': [1,0,1,0,0,0], 'l': [1,1,1,0,0,0],
+    'm': [1,0,1,1,0,0], 'n': [1,0,1,1,1,0], 'o': [1,0,1,0,1,0],
+    'ö': [0,1,1,1,0,1], 'p': [1,1,1,1,0,0], 'r': [1,1,1,1,1,0],
+    's': [0,1,1,1,0,0], 'ş': [1,1,1,0,1,1], 't': [0,1,1,1,1,1],
+    'u': [1,0,1,0,0,1], 'ü': [0,1,1,1,1,0], 'v': [0,1,1,1,0,1],
+    'y': [1,0,1,1,1,1], 'z': [1,0,1,0,1,1],
+    ' ': [0,0,0,0,0,0], '.': [0,1,0,0,1,1], ',': [0,1,0,0,0,0],
+    '!': [0,1,1,0,1,0], '?': [0,1,1,0,0,1],
+    '0': [0,1,0,1,0,1], '1': [1,0,0,0,0,0], '2': [1,1,0,0,0,0],
+    '3': [1,0,0,1,0,0], '4': [1,0,0,1,1,0], '5': [1,0,0,0,1,0],
+    '6': [1,1,0,1,0,0], '7': [1,1,0,1,1,0], '8': [1,1,0,0,1,0],
+    '9': [0,1,0,1,1,0]
+}
+
+CELL_UNMAPPED = 0x80  # Haritada olmayan karakter (yazılmaz, boşluk kadar beklenir)
+
+def cell_byte(char):
+    """Karakterin hücre baytı: bit i = nokta i+1"""
+    pattern = BRAILLE_MAP.get(char.lower())
+    if pattern is None:
+        return CELL_UNMAPPED
+    return sum(1 << i for i, dot in enumerate(pattern) if dot)
+
+def cell_pattern(value):
+    """Hücre baytından solenoid desenine"""
+    return [(value >> i) & 1 for i in range(6)]
+
+def compile_cell_stream(text_path, out_path):
+    """Metni karakter başına bir baytlık hücre akışına derle (pozisyonlar metinle aynı)"""
+    table = {}
+    partial = part_path(out_path)
+    with open(text_path, 'r', encoding='utf-8') as src, open(partial, 'wb') as dst:
+        while True:
+            piece = src.read(1 << 16)
+            if not piece:
+                break
+            for char in set(piece) - table.keys():
+                table[char] = cell_byte(char)
+            dst.write(bytes(table[char] for char in piece))
+    os.replace(partial, out_path)
+    return True
+
+# ==================== ARKA PLAN ÖN HAZIRLIK ====================
+def worker_context():
+    """İşçi süreç havuzlarının başlatma bağlamı
+    
+    Süreç kayıt, indirme ve seslendirme iş parçacıklarını taşırken fork
+    edilirse çocuk başka iş parçacığının tuttuğu bir kilidi kopyalayıp
+    kilitlenebilir; işçiler bu yüzden temiz bir sunucu sürecinden başlatılır.
+    """
+    return multiprocessing.get_context(WORKER_START_METHOD)
+
+def _init_worker():
+    """İşçi süreç başlangıcı: kayıtları bu süreçten yaz"""
+    log.detach()
+
+def _lower_priority():
+    """İşçi süreci en düşük CPU ve G-Ç önceliğine al (alt süreçler de devralır)"""
+    _init_worker()
+    try:
+        os.nice(PRECOMPUTE_NICE)
+    except OSError:
+        pass
+    try:
+        subprocess.run(['ionice', '-c', '3', '-p', str(os.getpid())],
+                       capture_output=True, timeout=5)
+    except Exception:
+        pass
+
+def _precompute_text(job):
+    """İşçi süreçte metni çıkar, indeksini kur ve hücre akışını derle"""
+    pdf_path, text_path, cells_path = job
+    try:
+        if not os.path.exists(text_path) and not extract_pdf_text(pdf_path, text_path):
+            return False
+        BookText(text_path).close()  # .idx dosyası yoksa kurulur
+        if not os.path.exists(cells_path):
+            compile_cell_stream(text_path, cells_path)
+        return True
+    except Exception as e:
+        log.error('precompute', f"❌ {text_path} hazırlanamadı: {e}", path=text_path)
+        return False
+
+class PrecomputeScheduler:
+    """Cihaz boştayken tüm kitaplığı seçilmeye hazır hale getir.
+    
+    Her kitap için metni çıkarır, gezinme indeksini kurar, hücre akışını
+    derler ve anlatımın ilk birkaç dakikasını seslendirir; böylece bir kitap
+    seçildiğinde çıktı beklemeden başlar. İşler nice/ionice ile en düşük
+    öncelikte çalışan bir süreç havuzunda yürür. Bir oturum okurken yeni iş
+    verilmez (çalışan iş biter); okuma bitip PRECOMPUTE_IDLE_DELAY kadar
+    geçtiğinde veya kütüphane güncellendiğinde kalınan yerden devam edilir.
+    Yalnızca kotada yer varken çalışır, yer açmak için kitap silmez.
+    """
+    
+    def __init__(self, library, workers=PRECOMPUTE_WORKERS,
+                 audio_minutes=PRECOMPUTE_AUDIO_MINUTES, idle_delay=PRECOMPUTE_IDLE_DELAY,
+                 clock=None):
+        self.library = library
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.workers = workers
+        self.audio_seconds = audio_minutes * 60
+        self.idle_delay = idle_delay
+        self.executor = None
+        self.cond = threading.Condition()
+        self.active = set()     # Okuma yapan oturumlar
+        self.held = False       # Kaynak yöneticisi (ısı/yük) tarafından bekletiliyor
+        self.due = self.clock.monotonic() + idle_delay  # Sonraki tur zamanı (None: iş yok)
+        self.running = True
+        self.books_ready = 0
+        self.segments_rendered = 0
+        self.failed = 0
+        
+        self.thread = Thread(target=self._run, name="on-hazirlik", daemon=True)
+        self.thread.start()
+    
+    def kick(self):
+        """Hemen bir tur başlat (kütüphane güncellendikten sonra)"""
+        with self.cond:
+            self.due = self.clock.monotonic()
+            self.cond.notify_all()
+    
+    def session_active(self, session_id):
+        """Oturum okumaya başladı: yeni iş verme"""
+        with self.cond:
+            self.active.add(session_id)
+    
+    def session_idle(self, session_id):
+        """Oturum okumayı bitirdi: boşta kalınırsa devam et"""
+        with self.cond:
+            self.active.discard(session_id)
+            self.due = self.clock.monotonic() + self.idle_delay
+            self.cond.notify_all()
+    
+    def hold(self, held):
+        """Kaynak yöneticisi: sistem sıcak veya yüklüyken yeni iş verme"""
+        with self.cond:
+            self.held = held
+            self.cond.notify_all()
+    
+    def paused(self):
+        with self.cond:
+            return bool(self.active) or self.held or not self.running
+    
+    def _wait_turn(self):
+        """Tur zamanı gelene ve hiçbir oturum okumuyorken bekle"""
+        with self.cond:
+            while self.running:
+                now = self.clock.monotonic()
+                waiting = self.active or self.held
+                if not waiting and self.due is not None and now >= self.due:
+                    self.due = None
+                    return True
+                timeout = None if waiting or self.due is None else self.due - now
+                self.clock.wait(self.cond, timeout)
+            return False
+    
+    def _run(self):
+        while self._wait_turn():
+            try:
+                self.run_pass()
+            except Exception as e:
+                log.error('precompute', f"❌ Ön hazırlık hatası: {e}")
+    
+    def _submit(self, fn, job):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                initializer=_lower_priority,
+                                                mp_context=worker_context())
+        return self.executor.submit(fn, job)
+    
+    def run_pass(self):
+        """Tüm kitapları sırayla hazırla; bir oturum başlarsa yarıda bırak"""
+        for book in list(self.library.books):
+            if self.paused():
+                with self.cond:
+                    if self.due is None:
+                        self.due = self.clock.monotonic()  # Engel kalkınca devam et
+                return False
+            self.prepare_book(book)
+        return True
+    
+    def prepare_book(self, book):
+        library = self.library
+        filename = book['filename']
+        text_path = library.text_path(book)
+        cells_path = library.cells_path(book)
+        
+        if not (os.path.exists(text_path) and os.path.exists(cells_path)):
+            if library.is_streaming(book):
+                return  # Okuyucu inerken sayfa sayfa çıkarıyor
+            if not os.path.exists(library.pdf_path(book)):
+                return  # İndirilmemiş (veya kota için silinmiş) kitap
+            if not library.storage.has_room(book.get('size', 0)):
+                return
+            if not self._submit(_precompute_text, (library.pdf_path(book), text_path,
+                                                   cells_path)).result():
+                self.failed += 1
+                return
+            for kind, path in (('text', text_path), ('cells', cells_path)):
+                library.catalog.set_artifact(filename, kind, path, path_size(path),
+                                             'ready', book.get('sha'))
+        
+        # İşler bölüm metinlerini taşır: eşleme işler kurulunca kapatılır
+        with BookText(text_path) as text:
+            if len(text) < 10:
+                return
+            audiobook = (Audiobook.load(filename, text, 1.0, library.audiobook_dir) or
+                         Audiobook.plan(filename, text, root_dir=library.audiobook_dir))
+            limit = audiobook.leading_segments(self.audio_seconds)
+            audiobook.prepare_dir()
+            jobs = audiobook.missing_jobs(text, limit)
+        if jobs:
+            # Her işçide bir iş çalışsın; bir oturum başlarsa yenisi verilmez
+            running = deque()
+            for job in jobs:
+                if self.paused() or not library.storage.has_room(0):
+                    break
+                running.append(self._submit(_render_segment, job))
+                if len(running) >= self.workers:
+                    self._collect(running.popleft())
+            while running:
+                self._collect(running.popleft())
+            rendered = audiobook.rendered_count()
+            audiobook.save_manifest(rendered)
+            library.catalog.set_artifact(filename, 'audiobook', audiobook.dir,
+                                         path_size(audiobook.dir),
+                                         'ready' if rendered == len(audiobook.segments) else 'partial',
+                                         book.get('sha'))
+        if audiobook.rendered_count() >= limit:
+            self.books_ready += 1
+    
+    def _collect(self, future):
+        """Bölüm işinin bitmesini bekle ve sayaçları güncelle"""
+        _, ok = future.result()
+        if ok:
+            self.segments_rendered += 1
+        else:
+            self.failed += 1
+    
+    def stats(self):
+        return {
+            'paused': self.paused(),
+            'books_ready': self.books_ready,
+            'segments_rendered': self.segments_rendered,
+            'failed': self.failed,
+        }
+    
+    def shutdown(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+# ==================== KAYNAK YÖNETİCİSİ ====================
+class ResourceGovernor:
+    """Sıcaklık, CPU frekansı ve yüke göre sentez işlerini ayarla.
+    
+    Pi kasada uzun süre Piper çalıştırınca ısınıp frekansını düşürür; bu
+    durumda anlatım kesilir ve solenoid zamanlaması kayar. Yönetici
+    /sys/class/thermal, cpufreq ve /proc/loadavg'yi okuyarak üç seviyeden
+    birini seçer ve gerçek zamanlı işi öne alır:
+    
+        normal: tüm sentez işçileri, 2 blok ön-getirme, gezinme ısıtması
+                tam, arka plan açık
+        warm:   bir işçi eksik (tek işçide aynı), 2 blok ön-getirme,
+                gezinmede yalnız komşu kitaplar ısıtılır, arka plan bekler
+        hot:    tek işçi, 1 blok ön-getirme, gezinme ısıtması yok, arka
+                plan bekler
+    
+    Varsayılan tek Piper işçisinde işçi sayısı değişmez; yük, ısıtma ve
+    arka plan işlerinden düşülür.
+    
+    root ile sahte bir sysfs ağacı verilerek test edilebilir.
+    """
+    
+    LEVELS = ('normal', 'warm', 'hot')
+    
+    def __init__(self, pool, precompute=None, root="/", interval=GOVERNOR_INTERVAL):
+        self.pool = pool
+        self.precompute = precompute
+        self.root = root
+        self.interval = interval
+        self.level = 'normal'
+        self.reason = ""
+        self.sample = {}
+        self.changes = 0
+        self.history = deque(maxlen=50)  # (zaman, seviye, neden)
+        self.running = True
+        self.stop_event = Event()
+        self.apply()
+        if interval:
+            self.thread = Thread(target=self._run, name="kaynak-yoneticisi", daemon=True)
+            self.thread.start()
+    
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+    
+    def _read_number(self, path):
+        try:
+            with open(path, 'r') as f:
+                return float(f.read().split()[0])
+        except (OSError, ValueError, IndexError):
+            return None
+    
+    def read_sensors(self):
+        """En sıcak bölge (°C), frekans oranı ve yük"""
+        temps = [self._read_number(path) for path in
+                 glob.glob(self._path('sys/class/thermal/thermal_zone*/temp'))]
+        temps = [t / 1000.0 for t in temps if t is not None]
+        
+        cpufreq = self._path('sys/devices/system/cpu/cpu0/cpufreq')
+        cur = self._read_number(f"{cpufreq}/scaling_cur_freq")
+        top = self._read_number(f"{cpufreq}/cpuinfo_max_freq")
+        
+        return {
+            'temp_c': max(temps) if temps else None,
+            'freq_mhz': cur / 1000.0 if cur else None,
+            'freq_ratio': cur / top if cur and top else None,
+            'load': self._read_number(self._path('proc/loadavg')),
+            'cpus': os.cpu_count() or 1,
+        }
+    
+    def decide(self, sample):
+        """Sensör okumasından seviye ve nedeni (histerezisli)"""
+        temp = sample.get('temp_c')
+        ratio = sample.get('freq_ratio')
+        load = sample.get('load')
+        cpus = sample.get('cpus', 1)
+        
+        # Bulunulan seviyeden aşağı inmek için eşiğin altına biraz daha inilmeli
+        margin = GOVERNOR_HYSTERESIS
+        hot_limit = GOVERNOR_TEMP_HOT - (margin if self.level == 'hot' else 0)
+        warm_limit = GOVERNOR_TEMP_WARM - (margin if self.level != 'normal' else 0)
+        busy = load is not None and load >= cpus * 0.75
+        
+        if temp is not None and temp >= hot_limit:
+            return 'hot', f"{temp:.1f}°C"
+        if ratio is not None and ratio < GOVERNOR_THROTTLE_RATIO and busy:
+            return 'hot', f"frekans %{int(ratio * 100)}"
+        if temp is not None and temp >= warm_limit:
+            return 'warm', f"{temp:.1f}°C"
+        if load is not None and load >= cpus:
+            return 'warm', f"yük {load:.2f}"
+        return 'normal', ""
+    
+    def apply(self):
+        """Seviyeyi havuza, ön-getirmeye ve arka plan işlerine uygula"""
+        level_index = self.LEVELS.index(self.level)
+        workers = self.pool.max_workers
+        if self.level == 'hot':
+            workers = 1
+        elif self.level == 'warm' and workers > 1:
+            workers -= 1
+        self.pool.set_limit(workers)
+        self.pool.prefetch_depth = 1 if self.level == 'hot' else 2
+        self.pool.warm_range = (NAV_PREFETCH_RANGE, min(1, NAV_PREFETCH_RANGE), 0)[level_index]
+        if self.precompute:
+            self.precompute.hold(self.level != 'normal')
+    
+    def update(self):
+        """Sensörleri oku, seviye değiştiyse uygula"""
+        self.sample = self.read_sensors()
+        level, reason = self.decide(self.sample)
+        self.reason = reason
+        if level != self.level:
+            self.level = level
+            self.changes += 1
+            self.history.append((time.time(), level, reason))
+            self.apply()
+            log.info('governor', f"🌡️ Kaynak seviyesi: {level} {reason} → {self.pool.limit} işçi, "
+                     f"ön-getirme {self.pool.prefetch_depth}, ısıtma {self.pool.warm_range}, "
+                     f"arka plan {'bekliyor' if level != 'normal' else 'açık'}",
+                     state=level, reason=reason, workers=self.pool.limit,
+                     prefetch=self.pool.prefetch_depth, warm_range=self.pool.warm_range)
+        return level
+    
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.update()
+            except Exception as e:
+                log.error('governor', f"❌ Kaynak yöneticisi hatası: {e}")
+    
+    def stats(self):
+        """Son okuma ve verilen kararlar (metrikler)"""
+        return {
+            'level': self.level,
+            'reason': self.reason,
+            **self.sample,
+            'workers': self.pool.limit,
+            'prefetch_depth': self.pool.prefetch_depth,
+            'warm_range': self.pool.warm_range,
+            'background_held': self.level != 'normal',
+            'changes': self.changes,
+        }
+    
+    def shutdown(self):
+        self.stop_event.set()
+
+# ==================== OKUMA BORU HATTI ====================
+class PlaybackControl:
+    """Okuma boru hattının ortak duraklatma/durdurma durumu.
+    
+    Tüm aşamalar aynı koşul değişkeninde bekler: duraklatma, devam ve
+    durdurma bekleyen herkesi anında uyandırır (yoklama döngüsü yok).
+    Durdurulunca on_stop kancaları çağrılır (ses iptali, dalga kesme),
+    böylece çalan bir anlatımı veya dalga biçimini bekleyen aşama da çözülür.
+    """
+    
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.cond = threading.Condition()
+        self.paused = False
+        self.stopped = False
+        self.on_stop = []
+    
+    def pause(self):
+        with self.cond:
+            self.paused = True
+            self.cond.notify_all()
+    
+    def resume(self):
+        with self.cond:
+            self.paused = False
+            self.cond.notify_all()
+    
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        for hook in self.on_stop:
+            hook()
+    
+    def reset(self):
+        with self.cond:
+            self.stopped = False
+            self.paused = False
+    
+    def wait_while_paused(self):
+        """Duraklatılmışsa devam edilene kadar bekle; durdurulduysa False"""
+        with self.cond:
+            while self.paused and not self.stopped:
+                self.clock.wait(self.cond)
+            return not self.stopped
+    
+    def sleep(self, seconds):
+        """Durdurulunca erken dönen bekleme; durdurulduysa False"""
+        with self.cond:
+            deadline = self.clock.monotonic() + seconds
+            while not self.stopped:
+                remaining = deadline - self.clock.monotonic()
+                if remaining <= 0:
+                    break
+                self.clock.wait(self.cond, remaining)
+            return not self.stopped
+
+class Channel:
+    """Aşamalar arası sınırlı kuyruk: doluysa üretici, boşsa tüketici bekler"""
+    
+    def __init__(self, control, maxsize):
+        self.control = control
+        self.cond = control.cond
+        self.maxsize = max(1, maxsize)
+        self.items = deque()
+        self.closed = False
+    
+    def wait_space(self):
+        """Yer açılana kadar bekle (geri basınç); durdurulduysa veya kapandıysa False"""
+        with self.cond:
+            while len(self.items) >= self.maxsize and not self.closed and not self.control.stopped:
+                self.cond.wait()
+            return not self.closed and not self.control.stopped
+    
+    def put(self, item):
+        with self.cond:
+            self.items.append(item)
+            self.cond.notify_all()
+    
+    def get(self):
+        """Sıradaki öğe; kaynak bittiyse veya durdurulduysa None"""
+        with self.cond:
+            while not self.items and not self.closed and not self.control.stopped:
+                self.cond.wait()
+            if self.control.stopped or not self.items:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+    
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class Segment:
+    """Metnin [start, end) aralığı ve çevirmenin eklediği çıktılar"""
+    __slots__ = ('start', 'end', 'text', 'cells', 'clip', 'label', 'audio')
+    
+    def __init__(self, start, end, text, label=None, audio=None):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.cells = None   # Braille hücre desenleri (None öğe: bilinmeyen karakter)
+        self.clip = None    # Ses çıkışında ayrılmış anlatım parçası
+        self.label = label  # Eğitim modunda seslendirilecek açıklama
+        self.audio = audio  # Önceden seslendirilmiş bölüm dosyası (varsa)
+
+def sentence_segments(text, position, audiobook=None, control=None):
+    """Cümle sonunda biten anlatım blokları (önceden seslendirilmiş bölümlere hizalı)"""
+    while text_available(text, position, control):
+        segment = audiobook.segment_at(position) if audiobook else None
+        if segment:
+            # Bölüm ortasından devam ediliyorsa bölüm sonuna kadar canlı oku
+            index, start, end = segment
+            audio = audiobook.segment_path(index) if start == position and audiobook.is_rendered(index) else None
+        else:
+            end = read_chunk_end(text, position)
+            audio = None
+        yield Segment(position, end, text[position:end], audio=audio)
+        position = end
+
+def word_segments(text, position, max_chars=WAVE_MAX_CELLS, control=None):
+    """Kelime ve ardındaki boşluk (uzun kelimeler max_chars parçalarına bölünür)"""
+    while text_available(text, position, control):
+        window = text[position:position + max_chars]
+        space = window.find(' ')
+        end = space + 1 if space >= 0 else len(window)
+        yield Segment(position, position + end, window[:end])
+        position += end
+
+class ReadingPipeline:
+    """Metin kaynağı → bölütleyici → çevirmen → eşzamanlı çıkışlar.
+    
+    Üretici iş parçacığı bölütleri sırayla çevirir (braille hücreleri,
+    anlatım sentezini başlatma) ve sınırlı kanala koyar; kanal doluysa
+    bekler, böylece en fazla `depth` bölüt önden hazırlanır ve çıktıyla
+    örtüşür. Tüketici (çağıran iş parçacığı) her bölütü çıkışlara sırayla
+    verir; bir çıkış False döndürürse (durdurma) hat kapanır. Duraklatma ve
+    durdurma PlaybackControl üzerinden tüm aşamalara yayılır.
+    """
+    
+    def __init__(self, control, segments, translate, sinks, depth=2):
+        self.control = control
+        self.segments = segments
+        self.translate = translate
+        self.sinks = sinks
+        self.depth = depth
+        self.completed = False
+    
+    def _produce(self, channel):
+        try:
+            for segment in self.segments:
+                if not channel.wait_space():
+                    return
+                if self.translate:
+                    self.translate(segment)
+                channel.put(segment)
+        except Exception as e:
+            log.error('pipeline', f"❌ Boru hattı üretici hatası: {e}")
+        finally:
+            channel.close()
+    
+    def run(self):
+        """Hat bitene veya durdurulana kadar çalıştır; kaynak tükendiyse True"""
+        channel = Channel(self.control, self.depth)
+        producer = Thread(target=self._produce, args=(channel,), name="boru-hatti", daemon=True)
+        producer.start()
+        try:
+            while self.control.wait_while_paused():
+                segment = channel.get()
+                if segment is None:
+                    self.completed = not self.control.stopped
+                    break
+                if not all(sink(segment) for sink in self.sinks):
+                    break
+        finally:
+            channel.close()
+        return self.completed
+
+class ProgressSink:
+    """İlerleme çıkışı: pozisyonu ilerletir, aralıklarla kaydeder ve %10'larda bildirir"""
+    
+    def __init__(self, reader, text, save_every):
+        self.reader = reader
+        self.text = text  # Büyüyen metinde yüzde ancak indirme bitince bilinir
+        self.save_every = save_every
+        self.last_saved = reader.current_position
+    
+    def __call__(self, segment):
+        reader = self.reader
+        previous = reader.current_position
+        reader.current_position = segment.end
+        if segment.end - self.last_saved >= self.save_every:
+            reader.save_progress()
+            self.last_saved = segment.end
+        if not getattr(self.text, 'complete', True):
+            return True
+        total = len(self.text)
+        decile = segment.end * 10 // total
+        if decile > previous * 10 // total and segment.end < total:
+            reader.speak_async(f"Yüzde {decile * 10} tamamlandı")
+        return True
+
+# ==================== BRAILLE KİTAP OKUYUCU ====================
+class BrailleBookReader:
+    def __init__(self, session_id="default", gpio=None, pins=None,
+                 voice_engine=None, library=None, auto_update=True, actuator=None, clock=None):
+        self.session_id = session_id
+        log.info('startup', "🎵 BRAİLLE KİTAP OKUYUCU - PİPER TTS SÜRÜMÜ", session=session_id)
+        self.clock = clock if clock is not None else SYSTEM_CLOCK  # Simülatör sanal saat verir
+        self.gpio = gpio if gpio is not None else GPIO
+        self.pins = pins if pins is not None else GPIOPins
+        
+        # PİPER TTS ses motorunu kur
+        log.info('startup', "🔊 PİPER TTS başlatılıyor...", session=session_id)
+        self.voice_engine = voice_engine if voice_engine is not None else VoiceEngine(session_id=session_id)
+        
+        # GPIO Ayarları
+        self.gpio.setmode(self.gpio.BCM)
+        self.gpio.setwarnings(False)
+        
+        try:
+            # Sadece bu oturumun pinlerini sıfırla (diğer oturumlar etkilenmesin)
+            self.gpio.cleanup(self.pins.RELAY_PINS + self.pins.ALL_BUTTONS)
+            self.clock.sleep(0.3)
+        except:
+            pass
+        
+        # Değişkenler
+        self.current_book_index = 0
+        self.selected_book = None
+        self.current_mode = 0
+        self.modes = ["sadece_yazma", "sadece_okuma", "hem_okuma_hem_yazma", "egitim_modu"]
+        self.mode_names = ["Sadece Yazma", "Sadece Okuma", "Hem Okuma Hem Yazma", "Braille Eğitimi"]
+        
+        # HIZ AYARLARI
+        self.speech_speed = 1.0    # Ses hızı (1.0 normal)
+        self.write_speed = 0.5     # Yazma hızı (0.5 saniye/her karakter)
+        self.min_speed = 0.15      # Minimum yazma hızı (ısı modeli bobinleri korur)
+        self.max_speed = 1.0       # Maksimum yazma hızı
+        
+        # Fiziksel solenoid ayarları
+        self.solenoid_up_time = 0.1    # Solenoid yukarı çıkma (tam akım çekme) süresi
+        self.solenoid_down_time = 0.05 # Solenoid aşağı inme süresi (bekleme)
+        self.solenoid_model = SolenoidThermalModel(len(self.pins.RELAY_PINS), clock=self.clock)
+        self.hold_pwms = {}
+        self.wave = connect_wave_actuator(actuator or SOLENOID_BACKEND,
+                                          self.pins.RELAY_PINS, self.solenoid_model, self.clock)
+        self.current_cells = None  # Seçili kitabın derlenmiş hücre akışı (varsa)
+        
+        # Sistem durumu
+        self.is_running = True
+        self.is_playing = False
+        self.control = PlaybackControl(self.clock)  # Okuma hattının duraklatma/durdurma durumu
+        self.reading_thread = None
+        self.reading_id = None
+        self.book_completed = False
+        self.current_position = 0
+        self.current_text = ""
+        self.segment_expected = 0.0  # Çıkıştaki bölütün beklenen süresi (konum bölüt bitince ilerler)
+        self.announcing = None  # Okuma oturumunun beklediği duyuru (durdurulunca kesilir)
+        self.control.on_stop.append(self.voice_engine.stop_content)
+        self.control.on_stop.append(self._cancel_announcement)
+        if self.wave:
+            self.control.on_stop.append(self.wave.abort)
+        
+        # Buton takibi
+        self.button_states = {}
+        self.button_press_start = {}
+        self.last_button_time = {}
+        self.button_debounce = {}
+        for pin in self.pins.ALL_BUTTONS:
+            self.button_debounce[pin] = 0
+        
+        self.lock = RLock()  # Tuş işleyicileri iç içe alır (hız tuşu -> adjust_speed)
+        
+        # GPIO'yu ayarla
+        self.setup_gpio()
+        
+        # Braille haritasını yükle
+        self.setup_braille_map()
+        
+        # Kitapları yükle (yerelden, oturumlar arasında paylaşılabilir)
+        self.governor = None
+        if library is None:
+            library = LibraryStore()
+            library.precompute = PrecomputeScheduler(library, clock=self.clock)
+            self.governor = ResourceGovernor(self.voice_engine.pool, library.precompute)
+        self.library = library
+        
+        # Dizinleri oluştur (kitaplığın dizininde)
+        self.setup_directories()
+        
+        # Otomatik güncelleme thread'i (sunucu modunda sunucu yürütür)
+        if auto_update:
+            self.update_thread = Thread(target=self.auto_update_check, daemon=True)
+            self.update_thread.start()
+        
+        # Başlangıç mesajı - PİPER TTS İLE
+        # Sıraya alınır, beklenmez: ilk tuş basışı tanıtımı keser (barge-in)
+        self.speak_async("Braille kitap okuyucuya hoş geldiniz.")
+        
+        if self.books:
+            self.speak_async(f"Kütüphanenizde {len(self.books)} kitap bulunuyor.")
+            book_name = self.books[0]['name_tr']
+            self.speak_async(f"İlk kitap: {book_name}")
+            self.prefetch_neighbours()
+        else:
+            self.speak_async("Henüz hiç kitap yok. Lütfen güncelle tuşuna basarak kitapları indirin.")
+        
+        self.speak_async("İleri tuşu ile kitaplar arasında gezin.")
+        self.speak_async("Onay tuşu ile seçin veya duraklat.")
+        self.speak_async("Mod tuşu ile okuma modunu değiştirin.")
+        self.speak_async("Hız artırma ve azaltma tuşları ile okuma hızını ayarlayın.")
+        
+        log.info('startup', "✅ PİPER TTS sistemi başlatıldı!", session=self.session_id)
+    
+    @property
+    def books(self):
+        """Paylaşılan kütüphanedeki kitaplar"""
+        return self.library.books
+    
+    @property
+    def is_paused(self):
+        return self.control.paused
+    
+    @is_paused.setter
+    def is_paused(self, paused):
+        if paused:
+            self.control.pause()
+        else:
+            self.control.resume()
+    
+    # ==================== PİPER TTS SES FONKSİYONLARI ====================
+    def speak(self, text):
+        """Metni PİPER TTS ile seslendir"""
+        self.voice_engine.speak(text, wait=True, speed=self.speech_speed)
+    
+    def announce(self, text):
+        """Okuma oturumu duyurusu: bitmesini bekle, okuma durdurulursa kesilir
+        
+        Durdurma geldiğinde çalan/bekleyen duyuru iptal edilir (stop_reading
+        oturumun açılış konuşmalarını beklemez). Durdurulduktan sonra verilen
+        duyurular (ör. "Yazma durduruldu") sıraya girer ama beklenmez.
+        """
+        clip = self.voice_engine.speak(text, wait=False, speed=self.speech_speed)
+        self.announcing = clip
+        if not self.control.stopped:
+            clip.wait()
+        self.announcing = None
+    
+    def _cancel_announcement(self):
+        """Durdurma kancası: oturumun beklediği duyuruyu kes"""
+        clip = self.announcing
+        if clip is not None:
+            self.voice_engine.sink.cancel(clip)
+    
+    def speak_async(self, text):
+        """Asenkron seslendirme - PİPER TTS"""
+        self.voice_engine.speak_async(text, self.speech_speed)
+    
+    def prompt(self, text):
+        """Tuş yanıtı: çalan komutu kesip hemen seslendir, bitmesini bekleme (barge-in)"""
+        self.voice_engine.interrupt()
+        return self.voice_engine.speak_async(text, self.speech_speed)
+    
+    def prefetch_neighbours(self):
+        """Seçili kitabın iki yanındaki kitap adlarını önceden sentezlet (hızlı gezinme)"""
+        count = len(self.books)
+        # Kaynak yöneticisi sistem ısınınca ısıtılan komşu sayısını düşürür
+        for distance in range(1, self.voice_engine.pool.warm_range + 1):
+            for offset in (distance, -distance):
+                if count > 1:
+                    book = self.books[(self.current_book_index + offset) % count]
+                    self.voice_engine.warm(book['name_tr'], self.speech_speed)
+    
+    def narrate_async(self, text):
+        """Kitap içeriğini asenkron seslendir (arayüz komutları bunu keser)"""
+        return self.voice_engine.speak_async(text, self.speech_speed, PRIORITY_CONTENT)
+    
+    def adjust_speed(self, increase=True):
+        """Ses ve yazma hızını ayarla"""
+        with self.lock:
+            if increase:
+                # Ses hızını artır (daha hızlı konuşma)
+                self.speech_speed = min(2.0, self.speech_speed + 0.2)
+                # Yazma hızını azalt (daha hızlı yazma)
+                self.write_speed = max(self.min_speed, self.write_speed - 0.1)
+            else:
+                # Ses hızını azalt (daha yavaş konuşma)
+                self.speech_speed = max(0.5, self.speech_speed - 0.2)
+                # Yazma hızını artır (daha yavaş yazma)
+                self.write_speed = min(self.max_speed, self.write_speed + 0.1)
+            
+            speed_text = "hızlı" if self.speech_speed > 1.3 else "normal" if self.speech_speed > 0.8 else "yavaş"
+            write_text = "hızlı" if self.write_speed < 0.4 else "normal" if self.write_speed < 0.7 else "yavaş"
+            load = max(self.solenoid_model.stats()['load'])
+            log.info('speed', f"🔧 Hız ayarı: ses={self.speech_speed:.1f} ({speed_text}), yazma={self.write_speed:.1f}s ({write_text}), bobin yükü=%{load * 100:.0f}",
+                     session=self.session_id, speech=self.speech_speed, write=self.write_speed, coil_load=load)
+            self.prompt(f"Ses hızı {speed_text}, yazma hızı {write_text}")
+    
+    # ==================== GİTHUB PDF SİSTEMİ ====================
+    def setup_directories(self):
+        """Gerekli dizinleri oluştur"""
+        os.makedirs(f"{self.library.books_dir}/pdfs", exist_ok=True)
+    
+    def update_library(self, speak_progress=True):
+        """Kitaplığı güncelle"""
+        if speak_progress:
+            self.speak("Kitaplar güncelleniyor.")
+        
+        self.library.update(self.speak if speak_progress else None)
+    
+    def auto_update_check(self):
+        """Otomatik güncelleme kontrolü"""
+        while self.is_running:
+            self.clock.sleep(UPDATE_INTERVAL)
+            try:
+                requests.get("https://api.github.com", timeout=5)
+                self.update_library(speak_progress=False)
+            except:
+                pass
+    
+    # ==================== GPIO ve BUTON KONTROLÜ ====================
+    def setup_gpio(self):
+        """GPIO pinlerini ayarla"""
+        try:
+            # Röle pinleri - LOW = Röle kapalı (solenoid pasif)
+            for pin in self.pins.RELAY_PINS:
+                self.gpio.setup(pin, self.gpio.OUT)
+                self.gpio.output(pin, self.gpio.LOW)  # Başlangıçta tüm röleler KAPALI
+                if SOLENOID_HOLD_SUPPORTED:
+                    self.hold_pwms[pin] = self.gpio.PWM(pin, SOLENOID_PWM_FREQ)
+            
+            # Buton pinleri
+            for pin in self.pins.ALL_BUTTONS:
+                self.gpio.setup(pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+                self.button_states[pin] = self.gpio.HIGH
+                self.button_press_start[pin] = 0
+                self.last_button_time[pin] = self.clock.time()
+            
+            log.info('gpio', "✅ GPIO ayarlandı - Tüm röleler başlangıçta kapalı", session=self.session_id)
+            
+        except Exception as e:
+            log.error('gpio', f"❌ GPIO hatası: {e}", session=self.session_id)
+    
+    def check_buttons(self):
+        """Butonları kontrol et - DEBOUNCE ile"""
+        current_time = self.clock.time()
+        
+        for pin in self.pins.ALL_BUTTONS:
+            try:
+                current_state = self.gpio.input(pin)
+                last_state = self.button_states.get(pin, self.gpio.HIGH)
+                
+                # Debounce kontrolü (50ms)
+                if current_time - self.last_button_time[pin] < 0.05:
+                    continue
+                
+                # Buton basıldı
+                if current_state == self.gpio.LOW and last_state == self.gpio.HIGH:
+                    self.button_press_start[pin] = current_time
+                    self.last_button_time[pin] = current_time
+                    self.handle_button_press(pin)
+                
+                # Buton basılı tutuluyor
+                elif current_state == self.gpio.LOW and last_state == self.gpio.LOW:
+                    press_duration = current_time - self.button_press_start[pin]
+                    
+                    # 2 saniye basılı tutunca BAŞTAN BAŞLAT
+                    if press_duration >= 2.0 and pin == self.pins.BUTTON_NEXT:
+                        if self.is_playing and not self.is_paused:
+                            self.handle_long_press(pin, press_duration)
+                            self.button_press_start[pin] = current_time
+                
+                # Buton bırakıldı
+                elif current_state == self.gpio.HIGH and last_state == self.gpio.LOW:
+                    self.button_press_start[pin] = 0
+                
+                self.button_states[pin] = current_state
+                
+            except Exception as e:
+                # Arızalı bir giriş her 20 ms'de hata verir: kayıt hızı sınırlı
+                log.error('button', f"Buton kontrol hatası: {e}", session=self.session_id, pin=pin)
+    
+    def handle_button_press(self, pin):
+        """Kısa basma işleyici"""
+        current_time = self.clock.time()
+        button = next((name for name in self.pins.BUTTON_NAMES if getattr(self.pins, name) == pin), None)
+        # Kayıt dosyasındaki bu satırlar yük testinde tuş izi olarak oynatılabilir (--loadgen)
+        log.debug('press', f"🔘 {button}", session=self.session_id, pin=pin, button=button)
+        
+        # Double press koruması (kesilebilir komutlar sayesinde hızlı gezinmeye izin verir)
+        if current_time - self.button_debounce[pin] < NAV_REPEAT_GUARD:
+            return
+        
+        self.button_debounce[pin] = current_time
+        
+        with self.lock:
+            if pin == self.pins.BUTTON_NEXT:
+                self.next_book()
+            elif pin == self.pins.BUTTON_CONFIRM:
+                self.confirm_selection()
+            elif pin == self.pins.BUTTON_MODE:
+                self.next_mode()
+            elif pin == self.pins.BUTTON_SPEED_UP:
+                log.info('button', "⬆️ Hız artırma butonuna basıldı", session=self.session_id)
+                self.adjust_speed(increase=True)
+            elif pin == self.pins.BUTTON_SPEED_DOWN:
+                log.info('button', "⬇️ Hız azaltma butonuna basıldı", session=self.session_id)
+                self.adjust_speed(increase=False)
+            elif pin == self.pins.BUTTON_UPDATE:
+                self.manual_update()
+    
+    def handle_long_press(self, pin, duration):
+        """Uzun basma işleyici - KİTABI BAŞTAN BAŞLAT
+        
+        Okumanın durması (en çok 10 s) kilit dışında beklenir; kilit yalnızca
+        konum değişikliği ve yeniden başlatma için alınır, böylece diğer
+        tuşlar ve denetim komutları bu sırada bekletilmez.
+        """
+        with self.lock:
+            if pin != self.pins.BUTTON_NEXT or not self.is_playing or self.is_paused:
+                return
+            log.info('button', f"⏪ Uzun basma ({duration:.1f}s): Kitap baştan başlatılıyor...",
+                     session=self.session_id, duration=round(duration, 1))
+            self.prompt("Kitap baştan başlatılıyor")
+        
+        # Süren okumayı kilit dışında durdur (kendi ilerlemesini kaydederek biter)
+        if not self.stop_reading():
+            self.prompt("Önceki okuma henüz durmadı, biraz sonra tekrar deneyin.")
+            return
+        
+        with self.lock:
+            # Pozisyonu sıfırla ve ilerlemeyi kaydet
+            self.current_position = 0
+            self.save_progress()
+            
+            # Yeniden başlat (duraklatma durumunu koru)
+            self.start_reading()
+    
+    def next_book(self):
+        """Sonraki kitap"""
+        if not self.books:
+            self.prompt("Henüz kitap yok. Güncelle tuşuna basın.")
+            return
+        
+        self.current_book_index = (self.current_book_index + 1) % len(self.books)
+        book = self.books[self.current_book_index]
+        self.prompt(book['name_tr'])
+        self.prefetch_neighbours()
+    
+    def confirm_selection(self):
+        """Seçimi onayla veya DURAKLAT/DEVAM ET"""
+        if not self.books:
+            self.prompt("Önce kitapları güncelleyin.")
+            return
+        
+        if self.selected_book is None:
+            # Kitap seçimi
+            self.selected_book = self.books[self.current_book_index]
+            book = self.selected_book
+            self.library.select(self.session_id, book)
+            self.prompt(f"{book['name_tr']} seçildi. Mod seçmek için mod tuşuna basın.")
+        elif self.is_playing:
+            # DURAKLAT/DEVAM ET
+            self.toggle_pause()
+        else:
+            # Mod seçimi
+            self.prompt(f"{self.mode_names[self.current_mode]} seçildi. Başlıyor...")
+            self.start_reading()  # Okuma iş parçacığının ilk komutları bu duyurunun arkasına sıralanır
+    
+    def toggle_pause(self):
+        """Duraklat/Devam et"""
+        if not self.is_playing:
+            return
+        
+        self.is_paused = not self.is_paused
+        
+        if self.is_paused:
+            if self.wave:
+                self.wave.abort()  # Gönderilen dalga biçimini hemen kes
+            self.voice_engine.sink.pause_content()  # Anlatım kaldığı yerde bekler
+            self.prompt("Duraklatıldı")
+            self.clear_solenoids()  # Duraklatma sırasında röleleri kapat
+        else:
+            self.prompt("Devam ediliyor")
+            self.voice_engine.sink.resume_content()
+    
+    def next_mode(self):
+        """Sonraki mod"""
+        if self.selected_book is None:
+            self.prompt("Önce bir kitap seçin.")
+            return
+        
+        self.current_mode = (self.current_mode + 1) % len(self.modes)
+        self.prompt(self.mode_names[self.current_mode])
+    
+    def manual_update(self):
+        """Manuel güncelleme"""
+        Thread(target=self.update_library, args=(True,), daemon=True).start()
+    
+    # ==================== BRAILLE SİSTEMİ ====================
+    def setup_braille_map(self):
+        """Braille haritasını yükle"""
+        self.braille_map = dict(BRAILLE_MAP)
+    
+    def set_solenoids(self, pattern):
+        """Solenoidleri ayarla - 1 = HIGH (Aktif), 0 = LOW (Pasif)"""
+        for i, state in enumerate(pattern[:6]):
+            if i < len(self.pins.RELAY_PINS):
+                if state == 1:
+                    self.gpio.output(self.pins.RELAY_PINS[i], self.gpio.HIGH)
+                else:
+                    self.gpio.output(self.pins.RELAY_PINS[i], self.gpio.LOW)
+    
+    def hold_solenoids(self, pattern):
+        """Aktif solenoidleri düşük tutma seviyesine indir (PWM)"""
+        for i, state in enumerate(pattern[:6]):
+            pin = self.pins.RELAY_PINS[i]
+            if state == 1 and pin in self.hold_pwms:
+                self.hold_pwms[pin].start(SOLENOID_HOLD_DUTY)
+    
+    def clear_solenoids(self):
+        """Tüm solenoidleri KAPAT (LOW)"""
+        for pin in self.pins.RELAY_PINS:
+            if pin in self.hold_pwms:
+                self.hold_pwms[pin].stop()
+            self.gpio.output(pin, self.gpio.LOW)
+    
+    def actuate_cell(self, pattern, on_time):
+        """Hücreyi ısı modeline göre kabart: çekme darbesi + tutma, sonra indir"""
+        wait, pull_in, hold = self.solenoid_model.plan_cell(
+            pattern, self.solenoid_up_time, on_time)
+        
+        # Bobinler sınırdaysa soğumalarını bekle
+        if wait > 0:
+            self.solenoid_model.record_wait(wait)
+            self.clock.sleep(wait)
+        
+        # Solenoidleri tam akımla aktif et (çekme darbesi)
+        self.set_solenoids(pattern)
+        self.clock.sleep(pull_in)
+        
+        # Sürücü destekliyorsa düşük akımla tut
+        if self.solenoid_model.hold_supported:
+            self.hold_solenoids(pattern)
+        self.clock.sleep(hold)
+        
+        # Solenoidleri kapat
+        self.clear_solenoids()
+        self.solenoid_model.record_cell(pattern, pull_in, hold)
+    
+    def output_interrupted(self):
+        """Yazma kesilmeli mi (durdurma, duraklatma veya okuma bitti)"""
+        return self.control.stopped or not self.is_playing or self.is_paused
+    
+    def translate_cells(self, segment):
+        """Bölütün hücre desenleri: önceden derlenmiş akıştan, yoksa haritadan"""
+        cells = self.current_cells
+        if cells is not None:
+            return [None if value & CELL_UNMAPPED else cell_pattern(value)
+                    for value in cells[segment.start:segment.end]]
+        return [self.braille_map.get(char.lower()) for char in segment.text]
+    
+    def write_cells(self, cells):
+        """Hücreleri yaz (None: bilinmeyen karakter), kesilirse yazılan sayıyı döndür
+        
+        Yalnızca yazma döngüsü yükseltilir: aynı iş parçacığındaki diğer
+        çıkışlar (espeak-ng başlatan seslendirme) normal öncelikte kalır.
+        """
+        with realtime.promoted('actuation'):
+            return self._write_cells(cells)
+    
+    def _write_cells(self, cells):
+        if self.wave:
+            return self.wave.write(cells, self.solenoid_up_time, self.write_speed,
+                                   self.solenoid_down_time + 0.03, self.output_interrupted)
+        for count, pattern in enumerate(cells):
+            if self.output_interrupted():
+                return count
+            if pattern is None:
+                # Bilinmeyen karakter için boşluk
+                self.control.sleep(self.write_speed)
+                continue
+            # Karakteri yazma süresi (hıza göre ayarlanır, ısı modeli sınırlar)
+            self.actuate_cell(pattern, self.write_speed)
+            # SOLENOİDLERİN AŞAĞI İNMESİ İÇİN YETERLİ SÜRE BEKLE + harf arası boşluk
+            self.clock.sleep(self.solenoid_down_time + 0.03)
+        return len(cells)
+    
+    def write_character_fast(self, char):
+        """Bir karakteri FİZİKSEL olarak doğru şekilde yaz"""
+        pattern = self.braille_map.get(char.lower())
+        if pattern is None:
+            return False
+        return self.write_cells([pattern]) == 1
+    
+    def write_word_fast(self, word):
+        """Bir kelimeyi HIZLI yaz"""
+        cells = [self.braille_map.get(char.lower()) for char in word]
+        return self.write_cells(cells) == len(cells)
+    
+    # ==================== PDF OKUMA ====================
+    def read_pdf_content(self, book):
+        """PDF içeriğini oku - bellekte tutulmaz, diskten eşlenir (BookText)"""
+        return self.library.open_text(book, self.control) or ""
+    
+    def release_text(self):
+        """Önceki kitabın metin ve hücre eşlemelerini kapat"""
+        if not isinstance(self.current_text, str):
+            self.current_text.close()
+        if self.current_cells is not None:
+            self.current_cells.close()
+        self.current_text = ""
+        self.current_cells = None
+    
+    def start_reading(self):
+        """Okumaya başla - okuma ayrı iş parçacığında sürer, butonlar dinlenmeye devam eder"""
+        if not self.selected_book:
+            return False
+        
+        if not self.stop_reading():
+            # Eski oturum hâlâ çalışıyor: yanına ikinci bir oturum açılmaz
+            self.prompt("Önceki okuma henüz durmadı, biraz sonra tekrar deneyin.")
+            return False
+        self.reading_thread = self.clock.spawn(self._reading_session, f"okuma-{self.session_id}")
+        return True
+    
+    def stop_reading(self):
+        """Süren okumayı durdur ve bitmesini bekle; süre dolup bitmezse False"""
+        self.control.stop()
+        thread = self.reading_thread
+        if thread is None or thread is threading.current_thread():
+            self.reading_thread = None
+            return True
+        if thread.is_alive():
+            self.clock.join(thread, timeout=10)
+        if thread.is_alive():
+            # İş parçacığı saklanır: bir sonraki start_reading yeniden bekler
+            log.error('reading', "❌ Okuma iş parçacığı 10 saniyede durmadı", session=self.session_id)
+            return False
+        self.reading_thread = None
+        return True
+    
+    def _reading_session(self):
+        # Okurken arka plan ön hazırlığı yeni iş başlatmasın
+        if self.library.precompute:
+            self.library.precompute.session_active(self.session_id)
+        try:
+            self._start_reading()
+        except Exception as e:
+            log.error('reading', f"❌ Okuma hatası: {e}", session=self.session_id)
+            self.is_playing = False
+            self.clear_solenoids()
+        finally:
+            if self.library.precompute:
+                self.library.precompute.session_idle(self.session_id)
+    
+    def _start_reading(self):
+        # Her okuma başlamadan önce solenoidleri kapat
+        self.clear_solenoids()
+        
+        self.is_playing = False
+        self.voice_engine.stop_content()
+        self.control.reset()
+        
+        self.announce("Kitap yükleniyor.")
+        self.release_text()
+        self.current_text = self.read_pdf_content(self.selected_book)
+        self.current_cells = self.library.open_cells(self.selected_book)
+        if self.current_cells is not None and len(self.current_cells) != len(self.current_text):
+            self.current_cells.close()
+            self.current_cells = None  # Eski/eksik akış: hücreler okurken çevrilir
+        if self.control.stopped:
+            return  # Kitap yüklenirken durduruldu
+        
+        if not self.current_text or len(self.current_text) < 10:
+            self.announce("Kitap okunamadı veya boş.")
+            return
+        
+        book_key = self.selected_book['filename']
+        progress = self.library.catalog.get_progress(self.session_id, book_key)
+        if not getattr(self.current_text, 'complete', True):
+            self.announce("Kitap indiriliyor, ilk sayfalardan başlanıyor.")
+        
+        if progress:
+            self.current_position = progress['position']
+            if self.current_position > 0 and not getattr(self.current_text, 'complete', True):
+                self.announce("Kayıtlı yerden devam edilecek, o sayfalar indirilince yazılacak.")
+            elif self.current_position > 0:
+                percent_complete = (self.current_position / len(self.current_text)) * 100
+                self.announce(f"Kitap yüklendi. Yüzde {int(percent_complete)} tamamlanmış. Kayıtlı yerden devam ediliyor.")
+            else:
+                self.announce("Kitap baştan başlatılıyor.")
+        else:
+            self.current_position = 0
+        
+        self.is_playing = True
+        
+        # Başlamadan önce tekrar solenoidleri kontrol et
+        self.clear_solenoids()
+        
+        # Okuma oturumunu kaydet (nereden nereye okundu)
+        self.book_completed = False
+        self.reading_id = self.library.catalog.begin_reading(
+            self.session_id, book_key, self.current_mode, self.current_position)
+        
+        if self.modes[self.current_mode] == "sadece_yazma":
+            self.mode_write_only()
+        elif self.modes[self.current_mode] == "sadece_okuma":
+            self.mode_read_only()
+        elif self.modes[self.current_mode] == "hem_okuma_hem_yazma":
+            self.mode_read_and_write()
+        elif self.modes[self.current_mode] == "egitim_modu":
+            self.mode_education()
+        
+        # Kitap bittiyse pozisyon sıfırlanmıştır; oturum kitap sonunda bitti
+        end_position = len(self.current_text) if self.book_completed else self.current_position
+        self.library.catalog.end_reading(self.reading_id, end_position)
+        self.reading_id = None
+    
+    def run_pipeline(self, segments, translate, sinks, depth=2):
+        """Bir mod yapılandırmasını çalıştır; kaynak tükendiyse True"""
+        sinks = [self.timing_sink] + list(sinks)
+        try:
+            return ReadingPipeline(self.control, segments, translate, sinks, depth).run()
+        finally:
+            self.segment_expected = 0.0
+    
+    def timing_sink(self, segment):
+        """Zamanlama çıkışı: çıkışa giren bölütün beklenen süresini kaydet
+        
+        Okuma modunda bir bölüt iki dakikayı aşabilir; denetim soketinin
+        durum satırı bunu taşır, yük testi takılmayı buna göre ölçer.
+        Seslendirme ve yazma toplanır (üst sınır).
+        """
+        spoken = len(segment.text) + len(segment.label or "")
+        seconds = spoken / (SPEECH_CHARS_PER_SECOND * self.speech_speed)
+        if segment.cells is not None:
+            cell_time = self.solenoid_up_time + self.write_speed + self.solenoid_down_time + 0.03
+            seconds += len(segment.cells) * cell_time
+        self.segment_expected = seconds
+        return True
+    
+    def braille_sink(self, segment):
+        """Braille çıkışı: bölütün hücrelerini yaz, duraklatılırsa kaldığı hücreden sürdür"""
+        written = 0
+        while written < len(segment.cells):
+            if not self.control.wait_while_paused() or not self.is_playing:
+                # Kesilen bölütte yazılan kısma kadar ilerle
+                self.current_position = segment.start + written
+                return False
+            written += self.write_cells(segment.cells[written:])
+        return True
+    
+    def finish_mode(self, done_message, stopped_message):
+        """Mod bitişi: solenoidleri kapat, ilerlemeyi kaydet, sonucu bildir"""
+        self.is_playing = False
+        self.clear_solenoids()  # Mod bittiğinde solenoidleri kapat
+        self.save_progress()
+        
+        # İndirme yarıda kaldıysa metnin sonu kitabın sonu değildir
+        finished = self.current_position >= len(self.current_text)
+        if finished and not getattr(self.current_text, 'failed', False):
+            self.announce(done_message)
+            # Kitabı tamamladık, pozisyonu sıfırla
+            self.book_completed = True
+            self.current_position = 0
+            self.save_progress()
+        else:
+            self.announce(stopped_message)
+    
+    def mode_write_only(self):
+        """Sadece yazma modu - TÜM KİTAP"""
+        self.announce("Sadece yazma modu başlıyor. Kitabın tamamı yazılacak.")
+        self.control.sleep(0.5)
+        
+        def translate(segment):
+            segment.cells = self.translate_cells(segment)
+        
+        # Kelime kelime (pigpio varsa her kelime tek dalga biçimi); her 100 karakterde kayıt
+        self.run_pipeline(word_segments(self.current_text, self.current_position,
+                                        control=self.control),
+                          translate,
+                          [self.braille_sink, ProgressSink(self, self.current_text, 100)])
+        
+        self.finish_mode("Kitabın tamamı yazıldı. Tebrikler!", "Yazma durduruldu.")
+    
+    def mode_read_only(self):
+        """Sadece okuma modu - TÜM KİTAP"""
+        self.announce("Okuma modu başlıyor. Kitabın tamamı okunacak.")
+        self.control.sleep(0.3)
+        
+        # Önceden seslendirilmiş bölümler varsa onları çal, yoksa canlı sentezle
+        audiobook = Audiobook.load(self.selected_book['filename'], self.current_text,
+                                   1.0 / self.speech_speed, self.library.audiobook_dir)
+        if audiobook:
+            log.info('reading', f"🎙️ Önceden seslendirilmiş bölümler kullanılıyor ({len(audiobook.segments)})",
+                     session=self.session_id, segments=len(audiobook.segments))
+        
+        def translate(segment):
+            # Bloğu ses çıkışı kuyruğuna ver; önceki bloklar çalarken sentezlenir
+            if segment.audio:
+                segment.clip = self.voice_engine.play_file(segment.audio, wait=False)
+            if segment.clip is None and segment.text.strip():
+                segment.clip = self.narrate_async(segment.text)
+        
+        def audio_sink(segment):
+            # Bloğun çalması bitene kadar bekle (durdurulunca iptal edilir ve uyanır)
+            if segment.clip:
+                segment.clip.wait()
+            return not self.control.stopped and self.is_playing
+        
+        # Kaynak yöneticisi sistem ısınınca ön-getirme derinliğini düşürür
+        self.run_pipeline(sentence_segments(self.current_text, self.current_position,
+                                            audiobook, self.control),
+                          translate,
+                          [audio_sink, ProgressSink(self, self.current_text, 5000)],
+                          depth=self.voice_engine.pool.prefetch_depth)
+        
+        log.info('reading', f"🔈 Ses çıkışı: {self.voice_engine.sink.stats()}", session=self.session_id)
+        log.info('reading', f"🗣️ TTS gecikmesi: {self.voice_engine.tts_stats()}", session=self.session_id)
+        if self.governor:
+            log.info('reading', f"🌡️ Kaynak yöneticisi: {self.governor.stats()}", session=self.session_id)
+        
+        self.finish_mode("Kitabın tamamı okundu. Tebrikler!", "Okuma durduruldu.")
+    
+    def mode_read_and_write(self):
+        """Hem okuma hem yazma modu - TÜM KİTAP"""
+        self.announce("Okuma ve yazma modu başlıyor. Kitabın tamamı okunup yazılacak.")
+        self.control.sleep(0.3)
+        
+        def translate(segment):
+            segment.cells = self.translate_cells(segment)
+            if segment.text.strip():
+                # Kelime yazılırken sesi hazır olsun
+                self.voice_engine.prefetch(segment.text.strip(), self.speech_speed)
+        
+        def narration_sink(segment):
+            word = segment.text.strip()
+            if word:
+                # Kelimeyi OKU (asenkron olarak, sırayla)
+                self.narrate_async(word)
+                # Boşluk yaz (sessiz)
+                self.clear_solenoids()
+                return self.control.sleep(self.write_speed * 1.5)
+            return True
+        
+        # Her kelime önce yazılır, sonra okunur; her 500 karakterde kayıt
+        self.run_pipeline(word_segments(self.current_text, self.current_position,
+                                        control=self.control),
+                          translate,
+                          [self.braille_sink, narration_sink, ProgressSink(self, self.current_text, 500)])
+        
+        self.finish_mode("Kitabın tamamı okunup yazıldı. Tebrikler!",
+                         "Okuma modu durduruldu. Devam etmek için onay tuşuna basın.")
+    
+    def mode_education(self):
+        """Braille eğitim modu - TÜM ALFABE"""
+        self.announce("Braille eğitim modu başlıyor. Tüm alfabe öğretilecek.")
+        self.control.sleep(0.5)
+        
+        # Tüm harfleri ve rakamları içeren liste
+        letters = [
+            ("a", "a harfi"), ("b", "b harfi"), ("c", "c harfi"),
+            ("ç", "ç harfi"), ("d", "d harfi"), ("e", "e harfi"),
+            ("f", "f harfi"), ("g", "g harfi"), ("ğ", "ğ harfi"),
+            ("h", "h harfi"), ("ı", "ı harfi"), ("i", "i harfi"),
+            ("j", "j harfi"), ("k", "k harfi"), ("l", "l harfi"),
+            ("m", "m harfi"), ("n", "n harfi"), ("o", "o harfi"),
+            ("ö", "ö harfi"), ("p", "p harfi"), ("r", "r harfi"),
+            ("s", "s harfi"), ("ş", "ş harfi"), ("t", "t harfi"),
+            ("u", "u harfi"), ("ü", "ü harfi"), ("v", "v harfi"),
+            ("y", "y harfi"), ("z", "z harfi")
+        ]
+        
+        numbers = [
+            ("0", "sıfır"), ("1", "bir"), ("2", "iki"),
+            ("3", "üç"), ("4", "dört"), ("5", "beş"),
+            ("6", "altı"), ("7", "yedi"), ("8", "sekiz"),
+            ("9", "dokuz")
+        ]
+        
+        punctuation = [
+            (".", "nokta"), (",", "virgül"), 
+            ("!", "ünlem işareti"), ("?", "soru işareti")
+        ]
+        
+        sections = [
+            ("Şimdi harfleri öğrenelim.", letters),
+            ("Şimdi rakamları öğrenelim.", numbers),
+            ("Şimdi noktalama işaretlerini öğrenelim.", punctuation),
+        ]
+        
+        def lessons():
+            # Bölüm girişi hücresiz bir bölüttür
+            for intro, items in sections:
+                yield Segment(0, 0, "", intro)
+                for char, description in items:
+                    yield Segment(0, 0, char, description)
+        
+        def translate(segment):
+            segment.cells = [self.braille_map[char] for char in segment.text if char in self.braille_map]
+            self.voice_engine.prefetch(segment.label, self.speech_speed, PRIORITY_URGENT)
+        
+        def lesson_sink(segment):
+            self.announce(segment.label)
+            if not segment.cells:
+                return not self.control.stopped
+            if not self.control.sleep(0.3):
+                return False
+            for pattern in segment.cells:
+                self.actuate_cell(pattern, 1.5)  # Her hücreden sonra solenoidler kapanır
+            return self.control.sleep(0.3) and self.is_playing
+        
+        completed = self.run_pipeline(lessons(), translate, [lesson_sink])
+        
+        self.is_playing = False
+        self.clear_solenoids()  # Mod bittiğinde solenoidleri kapat
+        if completed:
+            self.announce("Braille eğitimi tamamlandı. Tüm harfleri, rakamları ve noktalama işaretlerini öğrendiniz.")
+        else:
+            self.announce("Eğitim durduruldu.")
+    
+    # ==================== İLERLEME YÖNETİMİ ====================
+    def save_progress(self):
+        """İlerlemeyi kaydet"""
+        if not self.selected_book:
+            return
+        
+        try:
+            # Tek satırlık yazma (tüm ilerleme dosyası yeniden yazılmaz)
+            self.library.catalog.save_progress(self.session_id, self.selected_book['filename'],
+                                               self.current_position, self.current_mode)
+        except Exception as e:
+            log.error('reading', f"❌ İlerleme kaydetme hatası: {e}", session=self.session_id)
+    
+    # ==================== ANA DÖNGÜ ====================
+    def main_loop(self):
+        """Ana program döngüsü"""
+        try:
+            while self.is_running:
+                self.check_buttons()
+                self.clock.sleep(0.02)  # Hızlı kontrol
+                
+        except KeyboardInterrupt:
+            log.info('shutdown', "⏹️ Durduruldu", session=self.session_id)
+            self.cleanup()
+        except Exception as e:
+            log.error('shutdown', f"❌ Hata: {e}", session=self.session_id)
+            self.cleanup()
+    
+    def cleanup(self):
+        """Temizlik"""
+        self.is_running = False
+        self.is_playing = False
+        self.stop_reading()  # Ses iptali ve dalga kesme durdurma kancalarıyla yapılır
+        
+        self.clear_solenoids()  # Kapanmadan önce solenoidleri kapat
+        self.save_progress()
+        self.release_text()
+        self.gpio.cleanup(self.pins.RELAY_PINS + self.pins.ALL_BUTTONS)
+        log.info('shutdown', "✅ Sistem kapatıldı", session=self.session_id)
+        log.flush(1.0)
+
+# ==================== ÇOKLU CİHAZ SUNUCUSU ====================
+class ReaderDaemon:
+    """Tek bilgisayardan birden fazla braille hücresi ve ses çıkışını yönet
+    
+    Oturumlar tek Piper işçi havuzunu, ses önbelleğini ve kütüphane deposunu
+    paylaşır; her oturumun kendi GPIO/pin haritası, ses cihazı ve ilerlemesi
+    vardır. Örnek yapılandırma:
+    
+        {"tts_workers": 2, "books_dir": "/home/pixel/braille_books",
+         "log_target": "journald",
+         "sessions": [
+            {"id": "sinif1", "audio_device": "plughw:1,0", "actuator": "pigpio"},
+            {"id": "sinif2", "gpio": "sim", "audio_device": "plughw:2,0",
+             "relay_pins": [5, 6, 12, 13, 16, 20],
+             "buttons": {"BUTTON_NEXT": 7, "BUTTON_CONFIRM": 8}}]}
+    """
+    
+    def __init__(self, config):
+        self.config = config
+        self.is_running = True
+        books_dir = config.get('books_dir', LOCAL_BOOKS_DIR)
+        log.configure(config.get('log_target'), config.get('log_file', f"{books_dir}/okuyucu.log"))
+        self.cache = AudioCache(f"{books_dir}/audio_cache")
+        self.pool = PiperWorkerPool(config.get('tts_workers', PIPER_WORKERS), self.cache)
+        self.library = LibraryStore(books_dir)
+        self.library.precompute = PrecomputeScheduler(self.library)
+        self.governor = ResourceGovernor(self.pool, self.library.precompute)
+        self.sessions = {}
+        
+        for session_config in config.get('sessions', []):
+            self.add_session(session_config)
+    
+    @classmethod
+    def from_file(cls, path):
+        """JSON yapılandırma dosyasından sunucu oluştur"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    def add_session(self, session_config):
+        """Yeni bir okuyucu oturumu ekle"""
+        session_id = session_config['id']
+        if session_id in self.sessions:
+            raise ValueError(f"Oturum zaten var: {session_id}")
+        
+        if session_config.get('gpio', 'rpi') == 'sim':
+            gpio = SimulatedGPIO()
+        elif GPIO is None:
+            raise RuntimeError("RPi.GPIO yüklü değil, 'gpio': 'sim' kullanın")
+        else:
+            gpio = GPIO
+        
+        pins = GPIOPins(session_config.get('relay_pins'), session_config.get('buttons'))
+        voice_engine = VoiceEngine(self.pool, session_id, session_config.get('audio_device'))
+        reader = BrailleBookReader(session_id, gpio, pins, voice_engine,
+                                   self.library, auto_update=False,
+                                   actuator=session_config.get('actuator'))
+        self.sessions[session_id] = reader
+        return reader
+    
+    def auto_update_check(self):
+        """Paylaşılan kütüphaneyi tek noktadan güncelle"""
+        while self.is_running:
+            time.sleep(UPDATE_INTERVAL)
+            try:
+                requests.get("https://api.github.com", timeout=5)
+                self.library.update()
+            except:
+                pass
+    
+    def run(self):
+        """Tüm oturumları başlat ve kapatılana kadar bekle"""
+        for session_id, reader in self.sessions.items():
+            Thread(target=reader.main_loop, name=f"oturum-{session_id}", daemon=True).start()
+        Thread(target=self.auto_update_check, daemon=True).start()
+        
+        log.info('server', f"✅ Sunucu {len(self.sessions)} oturumla çalışıyor", sessions=len(self.sessions))
+        try:
+            while self.is_running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            log.info('server', "⏹️ Sunucu durduruldu")
+        finally:
+            self.shutdown()
+    
+    def shutdown(self):
+        self.is_running = False
+        for reader in self.sessions.values():
+            reader.cleanup()
+        self.governor.shutdown()
+        self.library.precompute.shutdown()
+        self.pool.shutdown()
+
+# ==================== SİMÜLATÖR (SANAL ZAMAN) ====================
+class SimulatedClip:
+    """Sanal zamanda [start, end) aralığında çalan parça (AudioClip arayüzü)"""
+    
+    def __init__(self, clock, priority, text, start, end):
+        self.clock = clock
+        self.priority = priority
+        self.text = text
+        self.start = start
+        self.end = end
+        self.cancelled = False
+        self.error = None
+        self.future = None
+    
+    def wait(self, timeout=None):
+        """Çalma bitene (veya iptal edilene) kadar sanal zamanda bekle"""
+        limit = None if timeout is None else self.clock.monotonic() + timeout
+        while not self.cancelled and self.clock.monotonic() < self.end:
+            if limit is not None and self.clock.monotonic() >= limit:
+                return False
+            self.clock.sleep(min(SIM_POLL_INTERVAL, self.end - self.clock.monotonic()))
+        return True
+
+class SimulatedAudioSink:
+    """Sahte aplay: parçaları sanal zamanda art arda "çalar" ve kaydeder.
+    
+    Öncelikler arası öne geçme ve içerik duraklatma modellenmez; iptal
+    edilen parça o anda susar, kalanlar planlandıkları zamanda çalar.
+    """
+    
+    def __init__(self, clock):
+        self.clock = clock
+        self.lock = Lock()
+        self.clips = []         # Henüz bitmemiş parçalar
+        self.log = []           # (başlangıç, öncelik, metin) - sıraya giren her parça
+        self.line_end = 0.0     # Sıradaki parçanın başlayabileceği an
+        self.cancelled = 0
+        self.content_paused = False
+    
+    def play(self, priority, text, duration):
+        with self.lock:
+            now = self.clock.monotonic()
+            self.clips = [clip for clip in self.clips if clip.end > now]
+            start = max(now, self.line_end)
+            clip = SimulatedClip(self.clock, priority, text, start, start + duration)
+            self.clips.append(clip)
+            self.log.append((start, priority, text))
+            self.line_end = clip.end
+            return clip
+    
+    def cancel(self, clip):
+        """Tek parçayı iptal et (çalıyorsa o anda susar)"""
+        with self.lock:
+            now = self.clock.monotonic()
+            if clip.end > now and not clip.cancelled:
+                clip.cancelled = True
+                self.cancelled += 1
+            self.clips = [clip for clip in self.clips if not clip.cancelled and clip.end > now]
+            self.line_end = max([clip.end for clip in self.clips], default=now)
+    
+    def cancel_all(self, priority):
+        """Bir öncelik sınıfındaki bitmemiş parçaları iptal et - iptal edilenleri döndürür"""
+        with self.lock:
+            now = self.clock.monotonic()
+            clips = [clip for clip in self.clips if clip.priority == priority and clip.end > now]
+            for clip in clips:
+                clip.cancelled = True
+            self.cancelled += len(clips)
+            self.clips = [clip for clip in self.clips if not clip.cancelled and clip.end > now]
+            self.line_end = max([clip.end for clip in self.clips], default=now)
+        return clips
+    
+    def pause_content(self):
+        self.content_paused = True
+    
+    def resume_content(self):
+        self.content_paused = False
+    
+    def stats(self):
+        with self.lock:
+            return {'played': len(self.log), 'cancelled': self.cancelled}
+
+class SimulatedVoiceEngine:
+    """Sahte Piper: sentez anında biter, süre metin uzunluğundan hesaplanır (VoiceEngine arayüzü)"""
+    
+    def __init__(self, clock, session_id="sim"):
+        self.clock = clock
+        self.session_id = session_id
+        self.sink = SimulatedAudioSink(clock)
+        self.pool = self            # Okuyucu havuzdan yalnızca prefetch_depth ve warm_range okur
+        self.prefetch_depth = 1
+        self.warm_range = NAV_PREFETCH_RANGE
+        self.synthesized = set()    # Önceden sentezletilen (metin, hız) çiftleri
+    
+    def speak(self, text, wait=True, speed=1.0, priority=PRIORITY_URGENT):
+        clip = self.sink.play(priority, text, len(text) / (SPEECH_CHARS_PER_SECOND * speed))
+        if wait:
+            clip.wait()
+        return clip
+    
+    def speak_async(self, text, speed=1.0, priority=PRIORITY_URGENT):
+        return self.speak(text, False, speed, priority)
+    
+    def prefetch(self, text, speed=1.0, priority=PRIORITY_CONTENT):
+        self.warm(text, speed)
+    
+    def warm(self, text, speed=1.0):
+        self.synthesized.add((text, speed))
+    
+    def interrupt(self):
+        self.sink.cancel_all(PRIORITY_URGENT)
+    
+    def stop_content(self):
+        self.sink.resume_content()
+        self.sink.cancel_all(PRIORITY_CONTENT)
+    
+    def play_file(self, path, wait=True, priority=PRIORITY_CONTENT):
+        return None  # Önceden seslendirilmiş bölümler yok: canlı sentez yoluna düşer
+    
+    def pending(self):
+        return 0
+    
+    def tts_stats(self):
+        return {'synthesized': len(self.synthesized)}
+
+class DeviceSimulator:
+    """Sanal saat, sahte GPIO, sahte Piper/aplay ve betikli tuşlarla tam cihaz.
+    
+    Betik (sanal saniye, tuş adı[, basılı tutma süresi]) ya da (sanal
+    saniye, denetim soketi komutu) öğelerinden oluşur:
+    
+        sim = DeviceSimulator(LibraryStore("/tmp/kitaplar"))
+        rapor = sim.run([(1, 'BUTTON_CONFIRM'), (2, 'BUTTON_CONFIRM'),
+                         (60, {'cmd': 'seek', 'position': 5000})])
+    
+    Kayıtlar kitaplık dizinindeki okuyucu.log'a yazılır (log_target ile
+    başka bir hedef seçilebilir); /home/pixel'e dokunulmaz.
+    
+    Okuma bitene (veya until anına) kadar sürer. Bütün bir kitabın yazılması
+    saatler yerine saniyeler alır; röle kenarları (gpio.edges), seslendirilen
+    metinler (voice.sink.log) ve kayıtlı ilerleme sonradan incelenebilir.
+    """
+    
+    def __init__(self, library, session_id="sim", actuator="gpio", start=0.0, log_target=None):
+        log.configure(log_target, f"{library.books_dir}/okuyucu.log")
+        self.clock = VirtualClock(start)
+        self.gpio = SimulatedGPIO(self.clock)
+        self.voice = SimulatedVoiceEngine(self.clock, session_id)
+        self.library = library
+        self.reader = BrailleBookReader(session_id, gpio=self.gpio, voice_engine=self.voice,
+                                        library=library, auto_update=False,
+                                        actuator=actuator, clock=self.clock)
+        self.control = ControlServer({session_id: self.reader})  # Soket açılmaz, komutlar doğrudan
+        self.results = []  # Betikteki komutların yanıtları
+    
+    def command(self, command):
+        """Denetim soketi komutunu uygula (select, mode, start, seek, ...)"""
+        response = self.control.execute({'commands': [command]})
+        self.results.append(response['results'][0])
+        return response
+    
+    def press(self, name, hold=0.1):
+        """Tuşa bas, basılı tut ve bırak - ana döngünün yoklaması gibi"""
+        pin = getattr(self.reader.pins, name)
+        self.gpio.press(pin)
+        self.reader.check_buttons()
+        release_at = self.clock.monotonic() + hold
+        while self.clock.monotonic() < release_at:
+            self.clock.sleep(min(SIM_POLL_INTERVAL, release_at - self.clock.monotonic()))
+            self.reader.check_buttons()
+        self.gpio.release(pin)
+        self.reader.check_buttons()
+    
+    def run(self, script, until=None):
+        """Betiği uygula, okuma bitene (veya until anına) kadar sür ve raporu döndür"""
+        started = time.monotonic()
+        with self.clock.actor():
+            for event in sorted(script, key=lambda event: event[0]):
+                self.clock.sleep_until(event[0])
+                if isinstance(event[1], dict):
+                    self.command(event[1])
+                else:
+                    self.press(*event[1:])
+            if until is not None:
+                self.clock.sleep_until(until)
+                self.reader.stop_reading()
+            elif self.reader.reading_thread:
+                self.clock.join(self.reader.reading_thread)
+        return self.report(time.monotonic() - started)
+    
+    def report(self, wall_seconds):
+        reader = self.reader
+        book = reader.selected_book
+        progress = reader.library.catalog.get_progress(reader.session_id, book['filename']) if book else None
+        return {
+            'virtual_seconds': round(self.clock.monotonic(), 3),
+            'wall_seconds': round(wall_seconds, 3),
+            'relay_edges': len(self.gpio.edges),
+            'waves': reader.wave.stats() if reader.wave else None,
+            'solenoids': reader.solenoid_model.stats(),
+            'speech': self.voice.sink.stats(),
+            'position': progress['position'] if progress else None,
+            'completed': reader.book_completed,
+        }
+
+def simulate_book(filename, mode=0, actuator="gpio"):
+    """Kitabı sanal zamanda baştan sona işle (--simulate) ve raporu yazdır"""
+    library = LibraryStore()
+    names = [book['filename'] for book in library.books]
+    if filename not in names:
+        print(f"❌ Kitap bulunamadı: {filename}")
+        return None
+    # Simülasyon kendi oturumunda baştan başlar (okuyucunun ilerlemesine dokunmaz)
+    library.catalog.save_progress("simulasyon", filename, 0, mode)
+    sim = DeviceSimulator(library, session_id="simulasyon", actuator=actuator)
+    
+    # Kitaba git, seç, modu ayarla, başlat (tanıtım ilk basışta kesilir)
+    presses = ['BUTTON_NEXT'] * names.index(filename) + ['BUTTON_CONFIRM']
+    presses += ['BUTTON_MODE'] * mode + ['BUTTON_CONFIRM']
+    report = sim.run([(float(i + 1), name) for i, name in enumerate(presses)])
+    print(f"🧪 Simülasyon: {json.dumps(report, ensure_ascii=False)}")
+    return report
+
+# ==================== DENETİM SOKETİ ====================
+class ControlServer:
+    """Fiziksel tuşların yanında yerel Unix soketinden JSON denetim arayüzü
+    
+    Her satır bir istektir; bir istek birden çok komutu sırayla taşır ve tek
+    yanıt satırı alır (betikli oturumlar ve uzun yük testleri için):
+    
+        {"id": 1, "session": "default", "commands": [
+            {"cmd": "select", "book": "kitap.pdf"}, {"cmd": "mode", "mode": 1},
+            {"cmd": "start"}, {"cmd": "seek", "position": 5000},
+            {"cmd": "speed", "change": "up"}, {"cmd": "pause"}, {"cmd": "resume"},
+            {"cmd": "press", "button": "BUTTON_NEXT"}, {"cmd": "stop"}, {"cmd": "state"}]}
+        -> {"id": 1, "ok": true, "ms": 1.2, "state": {...},
+            "results": [{"cmd": "select", "ok": true, "ms": 0.3}, ...]}
+    
+    Hatalı komutta kalan komutlar atlanır. {"subscribe": true} gönderen
+    bağlantıya bundan sonra kayıt olayları ("log"), komut süreleri
+    ("command") ve her CONTROL_STATE_INTERVAL saniyede oturum durumları
+    ("state") akıtılır. Komutlar tuş işleyicileriyle aynı okuyucu kilidi
+    altında çalışır (okumanın durmasını beklemek kilit dışında yapılır);
+    yetişemeyen abonenin en eski olayları düşürülür.
+    """
+    
+    def __init__(self, sessions, path=CONTROL_SOCKET, interval=CONTROL_STATE_INTERVAL):
+        self.sessions = sessions    # oturum kimliği -> BrailleBookReader
+        self.path = path
+        self.interval = interval
+        self.server = None
+        self.is_running = False
+        self.lock = Lock()
+        self.subscribers = []       # Abone bağlantılarının (olay kuyruğu, uyandırma) çiftleri
+        self.requests = 0
+        self.dropped = 0
+    
+    def start(self):
+        """Soketi aç, istek ve durum iş parçacıklarını başlat"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # Önceki çalıştırmadan kalan soket
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        control = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                control.serve(self.rfile, self.wfile)
+        
+        self.server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        self.server.daemon_threads = True
+        os.chmod(self.path, 0o660)
+        self.is_running = True
+        Thread(target=self.server.serve_forever, name="denetim", daemon=True).start()
+        Thread(target=self._publish_states, name="denetim-durum", daemon=True).start()
+        log.subscribe(self._on_log)
+        log.info('control', f"🎛️ Denetim soketi: {self.path}", path=self.path)
+        return self
+    
+    def shutdown(self):
+        self.is_running = False
+        log.unsubscribe(self._on_log)
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        with contextlib.suppress(OSError):
+            os.unlink(self.path)
+    
+    def serve(self, rfile, wfile):
+        """Bir bağlantının isteklerini yanıtla; abone olursa olayları akıt"""
+        try:
+            for line in rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    self._send(wfile, {'ok': False, 'error': f"Geçersiz JSON: {e}"})
+                    continue
+                if not isinstance(request, dict):
+                    self._send(wfile, {'ok': False, 'error': "İstek bir JSON nesnesi olmalı"})
+                    continue
+                if request.get('subscribe'):
+                    self._stream(wfile)
+                    return
+                if not self._send(wfile, self.execute(request)):
+                    return
+        except OSError:
+            pass  # İstemci bağlantıyı kapattı
+    
+    def execute(self, request):
+        """İstekteki komutları sırayla uygula ve yanıtı döndür"""
+        started = time.monotonic()
+        self.requests += 1
+        response = {'id': request.get('id')}
+        session_id = request.get('session')
+        if session_id is None and len(self.sessions) == 1:
+            session_id = next(iter(self.sessions))
+        reader = self.sessions.get(session_id)
+        if reader is None:
+            response.update(ok=False, error=f"Bilinmeyen oturum: {session_id}")
+            return response
+        commands = request.get('commands', [])
+        if not isinstance(commands, list):
+            response.update(ok=False, error="'commands' bir liste olmalı")
+            return response
+        
+        results = []
+        for command in commands:
+            command_started = time.monotonic()
+            valid = isinstance(command, dict)
+            try:
+                if not valid:
+                    raise ValueError("Komut bir JSON nesnesi olmalı")
+                result = self.run_command(reader, command) or {}
+                result['ok'] = True
+            except Exception as e:
+                result = {'ok': False, 'error': str(e)}
+            result['cmd'] = command.get('cmd') if valid else None
+            result['ms'] = round((time.monotonic() - command_started) * 1000, 2)
+            results.append(result)
+            self._publish({'type': 'command', 'ts': time.time(), 'session': reader.session_id,
+                           'cmd': result['cmd'], 'ok': result['ok'], 'ms': result['ms']})
+            if not result['ok']:
+                break
+        
+        response.update(ok=all(result['ok'] for result in results), results=results,
+                        state=self.state(reader),
+                        ms=round((time.monotonic() - started) * 1000, 2))
+        return response
+    
+    def run_command(self, reader, command):
+        """Tek komutu uygula; yanıta eklenecek alanları döndür"""
+        name = command.get('cmd')
+        if name == 'press':
+            # Fiziksel tuşla aynı yol (tekrar koruması ve sesli yanıt dahil)
+            button = command['button']
+            if button not in reader.pins.BUTTON_NAMES:
+                raise ValueError(f"Bilinmeyen tuş: {button}")
+            reader.handle_button_press(getattr(reader.pins, button))
+            return None
+        if name == 'state':
+            return {'state': self.state(reader)}
+        # Okumayı durdurmak 10 saniyeye kadar sürebilir: bu komutlar beklemeyi
+        # okuyucu kilidi dışında yapar, tuşlar bu sırada yanıt vermeye devam eder
+        if name == 'select':
+            self.select_book(reader, command['book'])
+            return None
+        if name == 'stop':
+            self.stop(reader)
+            return None
+        if name == 'seek':
+            self.seek(reader, int(command['position']))
+            return None
+        if name == 'start':
+            if reader.selected_book is None:
+                raise ValueError("Önce bir kitap seçin")
+            self.stop(reader)
+        
+        with reader.lock:
+            if name == 'mode':
+                mode = command['mode']
+                index = reader.modes.index(mode) if isinstance(mode, str) else int(mode)
+                if not 0 <= index < len(reader.modes):
+                    raise ValueError(f"Bilinmeyen mod: {mode}")
+                reader.current_mode = index
+                reader.prompt(reader.mode_names[index])
+            elif name == 'start':
+                reader.prompt(f"{reader.mode_names[reader.current_mode]} seçildi. Başlıyor...")
+                if not reader.start_reading():
+                    raise RuntimeError("Okuma başlatılamadı")
+            elif name == 'speed':
+                self.set_speed(reader, command)
+            elif name in ('pause', 'resume'):
+                if not reader.is_playing:
+                    raise ValueError("Okuma sürmüyor")
+                if reader.is_paused != (name == 'pause'):
+                    reader.toggle_pause()
+            else:
+                raise ValueError(f"Bilinmeyen komut: {name}")
+        return None
+    
+    def select_book(self, reader, book):
+        """Kitabı adıyla veya sırasıyla seç (süren okuma durdurulur)"""
+        names = [entry['filename'] for entry in reader.books]
+        if isinstance(book, int):
+            index = book
+        elif book in names:
+            index = names.index(book)
+        else:
+            raise ValueError(f"Kitap bulunamadı: {book}")
+        if not 0 <= index < len(names):
+            raise ValueError(f"Kitap sırası geçersiz: {index}")
+        
+        self.stop(reader)
+        with reader.lock:
+            reader.current_book_index = index
+            reader.selected_book = reader.books[index]
+            reader.library.select(reader.session_id, reader.selected_book)
+            reader.prompt(f"{reader.selected_book['name_tr']} seçildi.")
+            reader.prefetch_neighbours()
+    
+    @staticmethod
+    def stop(reader):
+        """Süren okumayı kilit dışında durdur; iş parçacığı durmazsa hata"""
+        if not reader.stop_reading():
+            raise RuntimeError("Okuma iş parçacığı durmadı")
+    
+    def seek(self, reader, position):
+        """Konuma git: okuma sürüyorsa durdur, kaydet ve oradan yeniden başlat"""
+        if reader.selected_book is None:
+            raise ValueError("Önce bir kitap seçin")
+        # is_playing açılış duyuruları bitene kadar False'tur; oturum sürüyor mu ona bakılır
+        thread = reader.reading_thread
+        was_reading = thread is not None and thread.is_alive()
+        self.stop(reader)  # Okuma kendi konumunu kaydederek biter, üzerine yazılır
+        with reader.lock:
+            length = len(reader.current_text) if reader.current_text else None
+            reader.current_position = max(0, position if length is None else min(position, length - 1))
+            reader.save_progress()
+            if was_reading and not reader.start_reading():
+                raise RuntimeError("Okuma yeniden başlatılamadı")
+    
+    def set_speed(self, reader, command):
+        """Hızı bir adım ('change': up/down) ya da doğrudan ('speech', 'write') ayarla"""
+        change = command.get('change')
+        if change is not None:
+            if change not in ('up', 'down'):
+                raise ValueError(f"Geçersiz hız değişimi: {change}")
+            reader.adjust_speed(increase=change == 'up')
+            return
+        if 'speech' in command:
+            reader.speech_speed = min(2.0, max(0.5, float(command['speech'])))
+        if 'write' in command:
+            reader.write_speed = min(reader.max_speed, max(reader.min_speed, float(command['write'])))
+        log.info('speed', f"🔧 Hız ayarı (denetim): ses={reader.speech_speed:.1f}, yazma={reader.write_speed:.2f}s",
+                 session=reader.session_id, speech=reader.speech_speed, write=reader.write_speed)
+    
+    @staticmethod
+    def state(reader):
+        """Oturumun anlık durumu"""
+        book = reader.selected_book
+        text = reader.current_text
+        return {
+            'session': reader.session_id,
+            'ts': time.time(),
+            'book': book['filename'] if book else None,
+            'index': reader.current_book_index,
+            'mode': reader.modes[reader.current_mode],
+            'playing': reader.is_playing,
+            'paused': reader.is_paused,
+            'position': reader.current_position,
+            'segment_expected': round(reader.segment_expected, 1),
+            'length': len(text) if text else 0,
+            'complete': getattr(text, 'complete', True),
+            'speech_speed': round(reader.speech_speed, 2),
+            'write_speed': round(reader.write_speed, 2),
+        }
+    
+    def stats(self):
+        with self.lock:
+            subscribers = len(self.subscribers)
+        return {'requests': self.requests, 'subscribers': subscribers, 'dropped': self.dropped}
+    
+    def _stream(self, wfile):
+        queue = deque(maxlen=CONTROL_SUBSCRIBER_QUEUE)
+        wake = Event()
+        subscriber = (queue, wake)
+        with self.lock:
+            self.subscribers.append(subscriber)
+        try:
+            if not self._send(wfile, {'type': 'subscribed', 'sessions': list(self.sessions)}):
+                return
+            while self.is_running:
+                wake.wait(self.interval)
+                wake.clear()
+                while queue:
+                    if not self._send(wfile, queue.popleft()):
+                        return
+        finally:
+            with self.lock:
+                self.subscribers.remove(subscriber)
+    
+    def _publish(self, event):
+        """Olayı tüm abonelerin kuyruğuna ekle (bloklamaz)"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for queue, wake in subscribers:
+            if len(queue) == queue.maxlen:
+                self.dropped += 1
+            queue.append(event)
+            wake.set()
+    
+    def _on_log(self, record):
+        if self.subscribers:
+            self._publish({'type': 'log', **record})
+    
+    def _publish_states(self):
+        while self.is_running:
+            time.sleep(self.interval)
+            if self.subscribers:
+                for reader in list(self.sessions.values()):
+                    self._publish({'type': 'state', **self.state(reader)})
+    
+    @staticmethod
+    def _send(wfile, message):
+        try:
+            wfile.write(json.dumps(message, ensure_ascii=False, default=str).encode('utf-8') + b"\n")
+            wfile.flush()
+            return True
+        except OSError:
+            return False
+
+class ControlClient:
+    """Denetim soketi istemcisi (betikler ve yük üreteci için)"""
+    
+    def __init__(self, path=CONTROL_SOCKET, timeout=30.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile('rwb')
+        self.next_id = 0
+    
+    def call(self, commands, session=None):
+        """Komutları tek istekte gönder ve yanıtı bekle"""
+        self.next_id += 1
+        request = {'id': self.next_id, 'commands': commands}
+        if session is not None:
+            request['session'] = session
+        self._write(request)
+        return self._read()
+    
+    def events(self):
+        """Olay akışına abone ol; olayları geldikçe döndür"""
+        self._write({'subscribe': True})
+        while True:
+            event = self._read()
+            if event is None:
+                return
+            yield event
+    
+    def close(self):
+        with contextlib.suppress(OSError):
+            self.sock.shutdown(socket.SHUT_RDWR)
+        with contextlib.suppress(OSError):
+            self.file.close()
+            self.sock.close()
+    
+    def _write(self, message):
+        self.file.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n")
+        self.file.flush()
+    
+    def _read(self):
+        line = self.file.readline()
+        return json.loads(line) if line else None
+
+def load_trace(path, session=None):
+    """Tuş izini oku: ilk basışı 0. saniyeye alınmış [(saniye, tuş adı)]
+    
+    Her satır {"t": 1.5, "button": "BUTTON_NEXT"} biçiminde ya da okuyucunun
+    kayıt dosyasındaki bir 'press' olayıdır (LOG_LEVEL = "debug" ile yazılır).
+    """
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('event', 'press') != 'press' or not record.get('button'):
+                continue
+            if session is not None and record.get('session', session) != session:
+                continue
+            events.append((float(record.get('t', record.get('ts', 0))), record['button']))
+    events.sort()
+    if not events:
+        return []
+    return [(t - events[0][0], button) for t, button in events]
+
+class LoadGenerator:
+    """Kayıtlı tuş izini denetim soketi üzerinden saatlerce tekrar oynat
+    
+    İz bitince baştan alınır. Her basışın gidiş-dönüş süresi ölçülür; durum
+    akışından takılmalar çıkarılır: okuma sürerken çıkıştaki bölütün
+    beklenen süresinden stall_seconds fazla ilerlemeyen konum ("progress"),
+    geciken durum satırları ("heartbeat")
+    ve eşikten uzun süren ya da yanıtsız komutlar ("command").
+    """
+    
+    def __init__(self, path=CONTROL_SOCKET, trace=(), session=None, speedup=1.0,
+                 stall_seconds=CONTROL_STALL_SECONDS):
+        self.path = path
+        self.trace = list(trace)
+        self.session = session
+        self.speedup = speedup
+        self.stall_seconds = stall_seconds
+        self.latencies = []
+        self.stalls = []
+        self.errors = 0
+        self.events = 0
+        self.started = None
+        self.client = None
+        self.feed = None
+        self.is_running = False
+    
+    def run(self, duration):
+        """İzi duration saniye boyunca tekrarla ve raporu döndür"""
+        if not self.trace:
+            raise ValueError("Tuş izi boş")
+        self.started = time.monotonic()
+        self.is_running = True
+        self.client = ControlClient(self.path, self.stall_seconds * 3)
+        watcher = Thread(target=self._watch, name="yuk-izleme", daemon=True)
+        watcher.start()
+        try:
+            while time.monotonic() - self.started < duration:
+                base = time.monotonic()
+                for offset, button in self.trace:
+                    delay = base + offset / self.speedup - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    if time.monotonic() - self.started >= duration:
+                        break
+                    self._press(button)
+                time.sleep(1.0 / self.speedup)  # Tekrarlar arasında bir (iz) saniyesi boşluk
+        finally:
+            self.is_running = False
+            self.client.close()
+            if self.feed:
+                self.feed.close()
+            watcher.join(timeout=5)
+        return self.report(time.monotonic() - self.started)
+    
+    def report(self, wall_seconds):
+        latencies = sorted(self.latencies)
+        
+        def percentile(q):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+        
+        return {
+            'seconds': round(wall_seconds, 1),
+            'commands': len(latencies),
+            'errors': self.errors,
+            'latency_ms': {'p50': percentile(0.50), 'p95': percentile(0.95),
+                           'p99': percentile(0.99), 'max': percentile(1.0)},
+            'stalls': len(self.stalls),
+            'stall_events': self.stalls[-20:],  # Son takılmalar
+            'events': self.events,
+        }
+    
+    def _press(self, button):
+        started = time.monotonic()
+        try:
+            response = self.client.call([{'cmd': 'press', 'button': button}], self.session)
+        except OSError as e:
+            # Yanıtsız kalan bağlantının akışı bozulmuştur: yeniden bağlan
+            self.errors += 1
+            self._stall('command', time.monotonic() - started, button=button, error=str(e))
+            self.client.close()
+            self.client = ControlClient(self.path, self.stall_seconds * 3)
+            return
+        elapsed = time.monotonic() - started
+        self.latencies.append(elapsed)
+        if not response or not response.get('ok'):
+            self.errors += 1
+        if elapsed >= self.stall_seconds:
+            self._stall('command', elapsed, button=button)
+    
+    def _stall(self, kind, seconds, **fields):
+        self.stalls.append({'kind': kind, 'at': round(time.monotonic() - self.started, 1),
+                            'seconds': round(seconds, 3), **fields})
+    
+    def _watch(self):
+        """Durum akışından takılmaları çıkar (bağlantı koparsa yeniden abone olur)"""
+        progress = {}  # oturum -> [konum, son değişim anı, bildirildi mi]
+        while self.is_running:
+            last_state = time.monotonic()
+            try:
+                self.feed = ControlClient(self.path, max(self.stall_seconds, 3 * CONTROL_STATE_INTERVAL))
+                for event in self.feed.events():
+                    if not self.is_running:
+                        return
+                    self.events += 1
+                    if event.get('type') != 'state':
+                        continue
+                    now = time.monotonic()
+                    if now - last_state > 3 * CONTROL_STATE_INTERVAL:
+                        self._stall('heartbeat', now - last_state)
+                    last_state = now
+                    session = event['session']
+                    if self.session is not None and session != self.session:
+                        continue
+                    entry = progress.get(session)
+                    if (entry is None or not event['playing'] or event['paused']
+                            or event['position'] != entry[0]):
+                        progress[session] = [event['position'], now, False]
+                    elif (now - entry[1] >= self.stall_seconds + event.get('segment_expected', 0)
+                          and not entry[2]):
+                        self._stall('progress', now - entry[1], session=session, position=entry[0],
+                                    expected=event.get('segment_expected'))
+                        entry[2] = True
+            except (OSError, ValueError) as e:
+                if self.is_running:
+                    self._stall('heartbeat', time.monotonic() - last_state, error=str(e))
+                    time.sleep(CONTROL_STATE_INTERVAL)
+            finally:
+                if self.feed:
+                    self.feed.close()
+
+def run_load_test(trace_path, seconds, path=CONTROL_SOCKET, session=None, speedup=1.0):
+    """Tuş izini çalışan okuyucuya karşı oynat (--loadgen) ve raporu yazdır"""
+    trace = load_trace(trace_path, session)
+    if not trace:
+        print(f"❌ Tuş izinde basış yok: {trace_path}")
+        return None
+    print(f"🏋️ Yük testi: {len(trace)} basışlık iz, {seconds:g} saniye, {speedup:g}x hız")
+    report = LoadGenerator(path, trace, session, speedup).run(seconds)
+    print(f"📊 Yük testi: {json.dumps(report, ensure_ascii=False)}")
+    return report
+
+# ==================== ANA PROGRAM ====================
+def prerender_books(names, workers=None):
+    """Seçilen kitapları (veya 'hepsi') önceden seslendir"""
+    library = LibraryStore()
+    if names == ['hepsi']:
+        books = library.books
+    else:
+        books = [book for book in library.books if book['filename'] in names]
+    
+    for book in books:
+        text = library.open_text(book)
+        if not text or len(text) < 10:
+            print(f"⚠️ {book['filename']}: metin çıkarılamadı")
+            if text:
+                text.close()
+            continue
+        audiobook = Audiobook.plan(book['filename'], text, root_dir=library.audiobook_dir)
+        try:
+            complete = audiobook.render(text, workers)
+        finally:
+            text.close()
+        library.catalog.set_artifact(book['filename'], 'audiobook', audiobook.dir,
+                                     path_size(audiobook.dir),
+                                     'ready' if complete else 'partial', book.get('sha'))
+        if complete:
+            print(f"✅ {book['filename']} seslendirildi")
+
+def main():
+    """Ana fonksiyon"""
+    parser = argparse.ArgumentParser(description="Braille kitap okuyucu")
+    parser.add_argument('--daemon', metavar='CONFIG',
+                        help="Birden fazla cihazı tek süreçten yöneten sunucu modu (JSON yapılandırma)")
+    parser.add_argument('--prerender', metavar='KITAP', nargs='+',
+                        help="Kitapları önceden seslendir (dosya adları veya 'hepsi'), kaldığı yerden devam eder")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Ön-seslendirme işçi sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument('--realtime', action='store_true', default=REALTIME_MODE,
+                        help="Solenoid ve ses iş parçacıklarını ayrılmış çekirdekte SCHED_FIFO ile çalıştır")
+    parser.add_argument('--jitter', metavar='SANIYE', type=float,
+                        help="Yük altında zamanlama titremesini mod kapalı/açık ölç ve çık")
+    parser.add_argument('--simulate', metavar='KITAP',
+                        help="Kitabı donanımsız, sanal zamanda baştan sona işle ve zamanlama raporu ver")
+    parser.add_argument('--mode', type=int, default=0, choices=range(4),
+                        help="Simülasyon modu: 0 yazma, 1 okuma, 2 okuma+yazma, 3 eğitim")
+    parser.add_argument('--actuator', default="gpio", choices=["gpio", "mock"],
+                        help="Simülasyonda solenoid sürücüsü (mock: DMA dalga biçimi)")
+    parser.add_argument('--control', metavar='SOKET', nargs='?', const=CONTROL_SOCKET,
+                        help=f"Yerel JSON denetim soketini aç (varsayılan: {CONTROL_SOCKET})")
+    parser.add_argument('--loadgen', metavar='IZ',
+                        help="Kayıtlı tuş izini --control soketindeki okuyucuya karşı tekrar oynat")
+    parser.add_argument('--duration', metavar='SANIYE', type=float, default=3600.0,
+                        help="Yük testi süresi")
+    parser.add_argument('--session', default=None,
+                        help="Yük testinde hedef oturum (sunucu modunda)")
+    parser.add_argument('--speedup', type=float, default=1.0,
+                        help="Tuş izini kaç kat hızlı oynat")
+    args = parser.parse_args()
+    
+    if args.prerender:
+        prerender_books(args.prerender, args.workers)
+        return
+    
+    if args.simulate:
+        simulate_book(args.simulate, args.mode, args.actuator)
+        return
+    
+    if args.jitter:
+        jitter_report(args.jitter)
+        return
+    
+    if args.loadgen:
+        run_load_test(args.loadgen, args.duration, args.control or CONTROL_SOCKET,
+                      args.session, args.speedup)
+        return
+    
+    if args.realtime:
+        realtime.enable()  # İş parçacıkları açılmadan önce
+    
+    print("=" * 60)
+    print("🎵 BRAİLLE KİTAP OKUYUCU - PİPER TTS SÜRÜMÜ")
+    print("=" * 60)
+    print("🎯 ÖZELLİKLER:")
+    print("  • Fiziksel solenoid kontrolü iyileştirildi")
+    print("  • Hız kontrolü butonları düzeltildi")
+    print("  • Debounce eklenerek buton tepkisi iyileştirildi")
+    print("  • Solenoidler için yukarı çıkma/aşağı inme süreleri eklendi")
+    print("  • Röleler sadece yazarken aktif")
+    print("=" * 60)
+    
+    # Bağımlılıkları kontrol et
+    try:
+        import requests
+        if not args.daemon:
+            import RPi.GPIO
+        print("✅ Temel Python paketleri yüklü")
+    except ImportError as e:
+        print(f"❌ Eksik paket: {e}")
+        print("Kurulum için: pip install requests RPi.GPIO")
+        return
+    
+    if args.daemon:
+        daemon = ReaderDaemon.from_file(args.daemon)
+        control = ControlServer(daemon.sessions, args.control).start() if args.control else None
+        try:
+            daemon.run()
+        finally:
+            if control:
+                control.shutdown()
+        return
+    
+    # Programı başlat
+    reader = BrailleBookReader()
+    control = ControlServer({reader.session_id: reader}, args.control).start() if args.control else None
+    
+    try:
+        reader.main_loop()
+    except Exception as e:
+        print(f"Hata: {e}")
+        reader.cleanup()
+    finally:
+        if control:
+            control.shutdown()
+
+if __name__ == "__main__":
+    main()
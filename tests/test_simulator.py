@@ -0,0 +1,96 @@
+"""Sanal zamanlı cihaz simülatörüyle uçtan uca regresyon testleri
+
+Donanım, Piper ve aplay gerekmez; her test kendi geçici kitaplığında çalışır.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import piper_braill10 as reader_module
+from piper_braill10 import DeviceSimulator, LibraryStore
+
+TEXT = "Merhaba dünya. Bu bir deneme cümlesidir. Braille okuyucu sanal zamanda çalışıyor. "
+
+
+class SimulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        reader_module.log.configure('console', os.path.join(self.tmp.name, 'okuyucu.log'))
+        self.library = self.make_library(TEXT * 20)
+    
+    def make_library(self, text):
+        library = LibraryStore(self.tmp.name)
+        book = {'filename': 'deneme.pdf', 'name_tr': 'Deneme', 'download_url': '', 'size': 0, 'sha': 's'}
+        library.catalog.replace_books([book])
+        with open(library.pdf_path(book), 'wb') as f:
+            f.write(b'%PDF')
+        with open(library.text_path(book), 'w', encoding='utf-8') as f:
+            f.write(text)
+        library.books = library.catalog.books()
+        self.length = len(text)
+        return library
+    
+    def relay_edges(self, sim, since=0.0):
+        pins = set(sim.reader.pins.RELAY_PINS)
+        return [edge for edge in sim.gpio.edges if edge[1] in pins and edge[0] >= since]
+    
+    def assert_relays_released(self, sim):
+        last = {}
+        for _, pin, value in self.relay_edges(sim):
+            last[pin] = value
+        self.assertTrue(last, "hiç röle sürülmedi")
+        self.assertTrue(all(value == 0 for value in last.values()), last)
+    
+    def test_buttons_write_whole_book(self):
+        sim = DeviceSimulator(self.library, actuator="gpio")
+        report = sim.run([(1, 'BUTTON_CONFIRM'), (2, 'BUTTON_CONFIRM')])
+        
+        self.assertTrue(report['completed'])
+        self.assertEqual(report['position'], 0)  # Biten kitap baştan başlar
+        self.assertGreater(report['solenoids']['cells'], 0)
+        self.assertGreaterEqual(self.relay_edges(sim)[0][0], 2)  # Başlatmadan önce röle sürülmez
+        self.assert_relays_released(sim)
+    
+    def test_commands_select_mode_start_seek(self):
+        sim = DeviceSimulator(self.library, actuator="gpio")
+        seek_at, seek_to = 40.0, 1000
+        report = sim.run([
+            (1, {'cmd': 'select', 'book': 'deneme.pdf'}),
+            (2, {'cmd': 'mode', 'mode': 'sadece_yazma'}),
+            (3, {'cmd': 'start'}),
+            (seek_at, {'cmd': 'seek', 'position': seek_to}),
+        ], until=120)
+        
+        self.assertTrue(all(result['ok'] for result in sim.results), sim.results)
+        self.assertFalse(report['completed'])
+        self.assertGreater(report['position'], seek_to)  # Yeni konumdan yazmaya devam etti
+        self.assertLess(report['position'], seek_to + 200)
+        self.assertLess(report['position'], self.length)
+        before = self.relay_edges(sim)
+        after = self.relay_edges(sim, since=seek_at)
+        self.assertGreater(len(before) - len(after), 0)
+        self.assertGreater(len(after), 0)
+        self.assert_relays_released(sim)
+    
+    def test_long_press_restarts_book(self):
+        start = [(1, 'BUTTON_CONFIRM'), (2, 'BUTTON_CONFIRM')]
+        # Ayrı oturum: kendi ilerlemesini kaydeder, karşılaştırmayı etkilemez
+        plain = DeviceSimulator(self.library, session_id="duz", actuator="gpio").run(start, until=120)
+        sim = DeviceSimulator(self.library, actuator="gpio")
+        report = sim.run(start + [(60, 'BUTTON_NEXT', 2.5)], until=120)
+    
+        spoken = [text for _, _, text in sim.voice.sink.log]
+        self.assertIn("Kitap baştan başlatılıyor", spoken)
+        self.assertFalse(report['completed'])
+        self.assertGreater(report['position'], 0)  # Baştan yeniden yazmaya başladı
+        self.assertLess(report['position'], plain['position'] * 0.6)
+        self.assertGreater(len(self.relay_edges(sim, since=62)), 0)
+        self.assert_relays_released(sim)
+
+
+if __name__ == '__main__':
+    unittest.main()